@@ -0,0 +1,61 @@
+"""
+Connection pools shared by appliance objects that send their requests to the same endpoint (eg. an admin proxy)
+
+Every appliance object keeps its own requests session, with its own credentials, client certificate and cookies.
+Only the HTTP adapter, which holds the pooled (TLS) connections, is shared: it is mounted on the session of every
+appliance for the endpoint. Connections with different TLS settings (verify, client certificate) are kept in
+separate pools by urllib3.
+"""
+import logging
+import threading
+
+import requests.adapters
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open per endpoint, raise it when many threads use appliances behind one endpoint
+pool_maxsize = 16
+
+_adapters = {}
+_lock = threading.Lock()
+
+
+def _prefix(protocol, hostname, port):
+    return "{0}://{1}:{2}/".format(protocol, hostname, port).lower()
+
+
+def shared_adapter(protocol, hostname, port, factory=None):
+    """
+    The HTTP adapter for an endpoint, created on first use
+
+    :param factory: function that creates the adapter (eg. with retries), the first appliance for the endpoint decides
+    """
+    prefix = _prefix(protocol, hostname, port)
+    with _lock:
+        adapter = _adapters.get(prefix, None)
+        if adapter is None:
+            logger.debug("Creating connection pool for {0}".format(prefix))
+            if factory is None:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+            else:
+                adapter = factory()
+            _adapters[prefix] = adapter
+        return adapter
+
+
+def mount(session, protocol, hostname, port, factory=None):
+    """
+    Send the requests of session to the endpoint over the shared connection pool
+    """
+    session.mount(_prefix(protocol, hostname, port), shared_adapter(protocol, hostname, port, factory=factory))
+
+
+def close_all():
+    """
+    Close the connections of all shared pools
+    """
+    with _lock:
+        adapters = list(_adapters.values())
+        _adapters.clear()
+    for adapter in adapters:
+        adapter.close()
@@ -1,6 +1,38 @@
+import json
 import logging
+import threading
 from abc import ABCMeta, abstractmethod
 
+# Parses the body (bytes) of JSON responses, see set_json_codec
+_json_loads = json.loads
+
+
+def set_json_codec(loads):
+    """
+    Use another JSON parser for the responses of all appliances (eg. orjson.loads)
+
+    :param loads: function that takes the body as bytes, and raises a ValueError when it is not JSON
+    """
+    global _json_loads
+    _json_loads = loads if loads is not None else json.loads
+
+
+class _LazyJSON(object):
+    """
+    Body of a response that is only parsed when 'data' is used
+    """
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content
+
+    def decode(self):
+        try:
+            return _json_loads(self.content)
+        except ValueError:
+            # Not JSON (also not UTF-8), the body as is
+            return self.content
+
 
 class IBMError(Exception):
     def __init__(self, *args, **kwargs):
@@ -16,6 +48,71 @@ class IBMResponse(dict):
     def __init__(self, *args, **kwargs):
         self.update(*args, **kwargs)
 
+    def set_json_content(self, content):
+        """
+        Set 'data' to the JSON body of a response, it is parsed on first access (the body is kept when not JSON)
+        """
+        dict.__setitem__(self, 'data', _LazyJSON(content))
+
+    def _resolve(self):
+        data = dict.get(self, 'data', None)
+        if type(data) is _LazyJSON:
+            dict.__setitem__(self, 'data', data.decode())
+
+    # Every way to read the values parses the body first
+    def __getitem__(self, key):
+        if key == 'data':
+            self._resolve()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key == 'data':
+            self._resolve()
+        return dict.get(self, key, default)
+
+    def __iter__(self):
+        self._resolve()
+        return dict.__iter__(self)
+
+    def items(self):
+        self._resolve()
+        return dict.items(self)
+
+    def values(self):
+        self._resolve()
+        return dict.values(self)
+
+    def pop(self, *args):
+        self._resolve()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._resolve()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self._resolve()
+        return dict.setdefault(self, key, default)
+
+    def copy(self):
+        self._resolve()
+        return IBMResponse(dict.items(self))
+
+    def __eq__(self, other):
+        self._resolve()
+        if isinstance(other, IBMResponse):
+            other._resolve()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._resolve()
+        return dict.__repr__(self)
+
     def succeeded_with_data(self):
         """
         Determines whether the execution succeeded with data retrieved.
@@ -54,6 +151,7 @@ class IBMAppliance(metaclass=ABCMeta):
         self.user = user
 
         self.facts = {}
+        self.facts_lock = threading.RLock()
         self.get_facts()
 
     @abstractmethod
@@ -106,7 +204,7 @@ class IBMAppliance(metaclass=ABCMeta):
         """
         pass
 
-    def create_return_object(self, rc=0, data={}, warnings=[],
+    def create_return_object(self, rc=0, data=None, warnings=None,
                              changed=False):
         """
         Create a response object with the given properties.
@@ -116,6 +214,13 @@ class IBMAppliance(metaclass=ABCMeta):
         :param changed: Whether there was any change.
         :return: The IBMResponse object.
         """
+        # New objects for every call, never the defaults or lists shared with the caller
+        if data is None:
+            data = {}
+        if warnings is None:
+            warnings = []
+        elif isinstance(warnings, list):
+            warnings = list(warnings)
         return IBMResponse({'rc': rc,
                             'data': data,
                             'changed': changed,
@@ -6,6 +6,7 @@ import logging
 from .ibmappliance import IBMAppliance
 from .ibmappliance import IBMError
 from .ibmappliance import IBMFatal
+from .transport import Transport
 from ibmsecurity.utilities import tools
 from io import open
 from os import environ
@@ -17,7 +18,8 @@ except NameError:
 
 
 class ISAMAppliance(IBMAppliance):
-    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, debug=True):
+    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, debug=True, connect_timeout=None,
+                 read_timeout=None, retries=None):
         self.logger = logging.getLogger(__name__)
         self.debug = debug
         if self.debug: self.logger.debug('Creating an ISAMAppliance')
@@ -26,7 +28,12 @@ class ISAMAppliance(IBMAppliance):
         else:
             self.lmi_port = lmi_port
         self.hostname = hostname
-        self.session = requests.session()
+        # Pooled session with timeouts and retries
+        self.transport = Transport(connect_timeout=connect_timeout, read_timeout=read_timeout, retries=retries,
+                                   logger=self.logger)
+        self.session = self.transport.session
+        # Active ibmsecurity.isam.changeset.ChangeSet, if any
+        self.changeset = None
 
         # If we did not get a value for verify, try the environment variable
         if verify is None:
@@ -99,69 +106,46 @@ See the following URL for more details:
 
         # Examine the response.
         if (http_response.status_code == 403):
+            text = http_response.text
             self.logger.error("  Request failed: ")
             self.logger.error("     status code: {0}".format(http_response.status_code))
-            if http_response.text != "":
-                self.logger.error("     text: " + http_response.text)
+            if text != "":
+                self.logger.error("     text: " + text)
             # Unconditionally raise exception to abort execution
-            raise IBMFatal("HTTP Return code: {0}".format(http_response.status_code), http_response.text)
+            raise IBMFatal("HTTP Return code: {0}".format(http_response.status_code), text)
         elif (
                 http_response.status_code != 200 and http_response.status_code != 204 and http_response.status_code != 201):
+            text = http_response.text
             self.logger.error("  Request failed: ")
             self.logger.error("     status code: {0}".format(http_response.status_code))
-            if http_response.text != "":
-                self.logger.error("     text: " + http_response.text)
+            if text != "":
+                self.logger.error("     text: " + text)
             if not ignore_error:
-                raise IBMError("HTTP Return code: {0}".format(http_response.status_code), http_response.text)
+                raise IBMError("HTTP Return code: {0}".format(http_response.status_code), text)
             return_obj['changed'] = False  # force changed to be False as there is an error
         else:
             return_obj['rc'] = 0
 
-        # Handle if there was json on input but response was not in json format
-        try:
-            json_data = json.loads(http_response.text)
-            return_obj['data'] = json_data
-        except ValueError:
-            return_obj['data'] = http_response.content
-            return
-
-        if self.debug: self.logger.debug("Status Code: {0}".format(http_response.status_code))
-        if http_response.text != "":
-            if self.debug: self.logger.debug("Text: " + http_response.content.decode("utf-8"))
+        # The body is only parsed when 'data' is used, the body itself when it is not JSON
+        content = http_response.content
+        return_obj.set_json_content(content)
 
-        for key in http_response.headers:
-            if key == 'g-type':
-                if http_response.headers[key] == 'application/octet-stream; charset=UTF-8':
-                    json_data = {}
-                    return_obj.data = http_response.content
-                    return
+        if self.debug and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Status Code: {0}".format(http_response.status_code))
+            if content:
+                self.logger.debug("Text: " + content.decode("utf-8", errors="replace"))
 
-        if http_response.text == "":
-            json_data = {}
-        else:
-            json_data = json.loads(http_response.text)
-
-        return_obj['data'] = json_data
-        try:
-            json_data = json.loads(http_response.content.decode("utf-8"))
-            return_obj['data'] = json_data
-        except UnicodeDecodeError:
-            return_obj['data'] = http_response.content
-        except ValueError:
-            if isinstance(http_response.content, bytes):
-                return_obj['data'] = http_response.content.decode("utf-8")
-            else:
-                return_obj['data'] = http_response.content
+    def _record_change(self, return_obj, uri):
+        # Let an active change set know about successful changes, so it can commit without checking first
+        if self.changeset is not None and return_obj['changed'] and return_obj['rc'] == 0:
+            self.changeset.record_change(uri)
 
     def _process_connection_error(self, ignore_error, return_obj, error_message=""):
-        if not ignore_error:
-            self.logger.critical(f"Failed to connect to server: {error_message}")
-            raise IBMError("HTTP Return code: 502", f"Failed to connect to server : {error_message}")
-        else:
-            self.logger.debug(f"Failed to connect to server: {error_message}")
-            return_obj['rc'] = 502
+        self.transport.connection_error(return_obj, ignore_error, error_message)
 
-    def _process_warnings(self, uri, requires_modules, requires_version, requires_model, warnings=[]):
+    def _process_warnings(self, uri, requires_modules, requires_version, requires_model, warnings=None):
+        # Warnings of this call go in a new list, so the list of the caller is never modified
+        warnings = [] if warnings is None else list(warnings)
         # flag to indicate if processing needs to return and not continue
         return_call = False
         if self.debug: self.logger.debug("Checking for minimum version: {0}.".format(requires_version))
@@ -212,7 +196,7 @@ See the following URL for more details:
         return warnings, return_call
 
     def invoke_post_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
-                          requires_version=None, warnings=[], json_response=True, data_as_files=False,
+                          requires_version=None, warnings=None, json_response=True, data_as_files=False,
                           requires_model=None):
         """
         Send multipart/form-data upload file request to the appliance.
@@ -237,37 +221,25 @@ See the following URL for more details:
             }
         if self.debug: self.logger.debug("Headers are: {0}".format(headers))
 
-        if data_as_files is False:
-            files = list()
-            for file2post in fileinfo:
-                files.append((file2post['file_formfield'],
-                              (tools.path_leaf(file2post['filename']), open(file2post['filename'], 'rb'),
-                               file2post['mimetype'])))
-        else:
-            files = data
+        # Files are streamed from disk
+        files = [(file2post['file_formfield'], tools.path_leaf(file2post['filename']), file2post['filename'],
+                  file2post['mimetype']) for file2post in fileinfo]
 
         self._suppress_ssl_warning()
 
-        try:
-            if data_as_files is False:
-                r = self.session.post(url=self._url(uri=uri), data=data, files=files, headers=headers)
-            else:
-                r = self.session.post(url=self._url(uri=uri), files=files, headers=headers)
-            return_obj['changed'] = True  # POST of file would be a change
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError as e:
-            if not ignore_error:
-                self.logger.critical(f"Failed to connect to server: {str(e)}")
-                raise IBMError("HTTP Return code: 502", f"Failed to connect to server: {str(e)}")
-            else:
-                if self.debug: self.logger.debug(f"Failed to connect to server : {str(e)}")
-                return_obj.rc = 502
+        if data_as_files is False:
+            r = self.transport.send_files(return_obj, 'POST', self._url(uri=uri), data, files, ignore_error,
+                                          self._process_response, headers=headers)
+        else:
+            r = self.transport.send(return_obj, 'POST', self._url(uri=uri), ignore_error, self._process_response,
+                                    changed=True, files=data, headers=headers)
+        if r is not None:
+            self._record_change(return_obj=return_obj, uri=uri)
 
         return return_obj
 
     def invoke_put_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
-                         requires_version=None, warnings=[], requires_model=None):
+                         requires_version=None, warnings=None, requires_model=None):
         """
         Send multipart/form-data upload file request to the appliance.
         """
@@ -286,31 +258,21 @@ See the following URL for more details:
         }
         if self.debug: self.logger.debug("Headers are: {0}".format(headers))
 
-        files = list()
-
-        for file2post in fileinfo:
-            files.append((file2post['file_formfield'],
-                          (file2post['filename'], open(file2post['filename'], 'rb'), file2post['mimetype'])))
+        # Files are streamed from disk
+        files = [(file2post['file_formfield'], file2post['filename'], file2post['filename'], file2post['mimetype'])
+                 for file2post in fileinfo]
 
         self._suppress_ssl_warning()
 
-        try:
-            r = self.session.put(url=self._url(uri=uri), data=data, files=files, headers=headers)
-            return_obj['changed'] = True  # POST of file would be a change
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError as e:
-            if not ignore_error:
-                self.logger.critical(f"Failed to connect to server. {str(e)}")
-                raise IBMError("HTTP Return code: 502", f"Failed to connect to server : {str(e)}")
-            else:
-                if self.debug: self.logger.debug(f"Failed to connect to server: {str(e)}")
-                return_obj.rc = 502
+        r = self.transport.send_files(return_obj, 'PUT', self._url(uri=uri), data, files, ignore_error,
+                                      self._process_response, headers=headers)
+        if r is not None:
+            self._record_change(return_obj=return_obj, uri=uri)
 
         return return_obj
 
     def invoke_get_file(self, description, uri, filename, no_headers=False, ignore_error=False, requires_modules=None,
-                        requires_version=None, warnings=[], requires_model=None):
+                        requires_version=None, warnings=None, requires_model=None):
         """
         Invoke a GET request and download the response data to a file
         """
@@ -334,45 +296,16 @@ See the following URL for more details:
 
         self._suppress_ssl_warning()
 
-        try:
-            r = self.session.get(url=self._url(uri=uri), stream=True, headers=headers)
-
-            if (r.status_code != 200 and r.status_code != 204 and r.status_code != 201):
-                self.logger.error("  Request failed: ")
-                self.logger.error("     status code: {0}".format(r.status_code))
-                if r.text != "":
-                    self.logger.error("     text: " + r.text)
-                if not ignore_error:
-                    raise IBMError("HTTP Return code: {0}".format(r.status_code), r.text)
-                else:
-                    return_obj['rc'] = r.status_code
-                    return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
-            else:
-                with open(filename, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=1024):
-                        if chunk:  # filter out keep-alive new chunks
-                            f.write(chunk)
-                return_obj['rc'] = 0
-                return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
-
-        except requests.exceptions.ConnectionError as e:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
-
-        except IOError:
-            if not ignore_error:
-                self.logger.critical("Failed to write to file: " + filename)
-                raise IBMError("HTTP Return code: 999", "Failed to write to file: " + filename)
-            else:
-                if self.debug: self.logger.debug("Failed to write to file: " + filename)
-                return_obj['rc'] = 999
-
-        return return_obj
+        return self.transport.get_file(return_obj, self._url(uri=uri), filename, ignore_error, headers=headers)
 
-    def _invoke_request(self, func, description, uri, ignore_error, data={}, requires_modules=None,
-                        requires_version=None, warnings=[], requires_model=None):
+    def _invoke_request(self, method, description, uri, ignore_error, data=None, requires_modules=None,
+                        requires_version=None, warnings=None, requires_model=None, pending_change=True):
         """
         Send a request to the LMI.  This function is private and should not be
         used directly.  The invoke_get/invoke_put/etc functions should be used instead.
+
+        method: GET, PUT, POST or DELETE, the data is sent as JSON (see Transport.send_json)
+        pending_change: False when the request does not change the configuration (a query sent as POST)
         """
         self._log_desc(description=description)
         self.session.cookies.pop('LtpaToken2', None)
@@ -385,42 +318,16 @@ See the following URL for more details:
         if return_call:
             return return_obj
 
-        # There maybe some cases when header should be blank (not json)
-        headers = {
-            'Accept': 'application/json',
-            'Content-type': 'application/json'
-        }
-        if self.debug: self.logger.debug("Headers are: {0}".format(headers))
-
-        # Process the input data into JSON
-        json_data = json.dumps(data)
-
-        if self.debug: self.logger.debug("Input Data: " + json_data)
-
         self._suppress_ssl_warning()
 
-        try:
-            if func == self.session.get or func == self.session.delete:
-                if data != {}:
-                    r = func(url=self._url(uri), data=json_data, headers=headers, verify=self.verify)
-                else:
-                    r = func(url=self._url(uri), headers=headers, verify=self.verify)
-            else:
-                r = func(url=self._url(uri), data=json_data,
-                         headers=headers, verify=self.verify, cert=self.cert)
-
-            if func != self.session.get:
-                return_obj['changed'] = True  # Anything but GET should result in change
-
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError as e:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+        r = self.transport.send_json(return_obj, method, self._url(uri), data, ignore_error, self._process_response)
+        if r is not None and pending_change:
+            self._record_change(return_obj=return_obj, uri=uri)
 
         return return_obj
 
-    def _invoke_request_with_headers(self, func, description, uri, ignore_error, headers, data={},
-                                     requires_modules=None, requires_version=None, warnings=[], requires_model=None):
+    def _invoke_request_with_headers(self, method, description, uri, ignore_error, headers, data=None,
+                                     requires_modules=None, requires_version=None, warnings=None, requires_model=None):
         """
         Send a request to the LMI.  This function is private and should not be
         used directly.  The invoke_get/invoke_put/etc functions should be used instead.
@@ -436,63 +343,47 @@ See the following URL for more details:
 
         self.logger.debug("Headers are: {0}".format(headers))
 
-        # Process the input data into JSON
-        json_data = json.dumps(data)
-
-        self.logger.debug("Input Data: " + json_data)
-
         self._suppress_ssl_warning()
 
-        try:
-            if func == self.session.get or func == self.session.delete:
-
-                if data != {}:
-                    r = func(url=self._url(uri), data=json_data, headers=headers)
-                else:
-                    r = func(url=self._url(uri), headers=headers)
-            else:
-                r = func(url=self._url(uri), data=json_data,
-                         headers=headers, verify=self.verify, cert=self.cert)
-
-            if func != self.session.get:
-                return_obj['changed'] = True  # Anything but GET should result in change
-
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError as e:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+        r = self.transport.send_json(return_obj, method, self._url(uri), data, ignore_error, self._process_response,
+                                     headers=headers)
+        if r is not None:
+            self._record_change(return_obj=return_obj, uri=uri)
 
         return return_obj
 
     def invoke_put(self, description, uri, data, ignore_error=False, requires_modules=None, requires_version=None,
-                   warnings=[], requires_model=None):
+                   warnings=None, requires_model=None):
         """
         Send a PUT request to the LMI.
         """
 
         self._log_request("PUT", uri, description)
-        response = self._invoke_request(self.session.put, description, uri,
+        response = self._invoke_request('PUT', description, uri,
                                         ignore_error, data,
                                         requires_modules=requires_modules, requires_version=requires_version,
                                         requires_model=requires_model, warnings=warnings)
         return response
 
     def invoke_post(self, description, uri, data, ignore_error=False, requires_modules=None, requires_version=None,
-                    warnings=[], requires_model=None):
+                    warnings=None, requires_model=None, pending_change=True):
         """
         Send a POST request to the LMI.
+
+        Set pending_change to False for queries, tests and pdadmin commands that are sent as POST: they do not
+        leave changes to commit, so an active change set does not record them.
         """
 
         self._log_request("POST", uri, description)
-        response = self._invoke_request(self.session.post, description, uri,
+        response = self._invoke_request('POST', description, uri,
                                         ignore_error, data,
                                         requires_modules=requires_modules, requires_version=requires_version,
                                         requires_model=requires_model,
-                                        warnings=warnings)
+                                        warnings=warnings, pending_change=pending_change)
         return response
 
     def invoke_post_snapshot_id(self, description, uri, data, ignore_error=False, requires_modules=None,
-                                requires_version=None, warnings=[], requires_model=None):
+                                requires_version=None, warnings=None, requires_model=None):
         """
         Send a POST request to the LMI.  Snapshot id is part of the uri.
         Requires different headers to normal post.
@@ -516,29 +407,20 @@ See the following URL for more details:
 
         self._suppress_ssl_warning()
 
-        try:
-            r = self.session.post(url=self._url(uri=uri), data=data, headers=headers)
-            return_obj['changed'] = False  # POST of snapshot id would not be a change
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError as e:
-            if not ignore_error:
-                self.logger.critical(f"Failed to connect to server: {str(e)}")
-                raise IBMError("HTTP Return code: 502", f"Failed to connect to server : {str(e)}")
-            else:
-                self.logger.debug(f"Failed to connect to server : {str(e)}")
-                return_obj.rc = 502
+        # POST of snapshot id would not be a change
+        self.transport.send(return_obj, 'POST', self._url(uri=uri), ignore_error, self._process_response,
+                            changed=False, data=data, headers=headers)
 
         return return_obj
 
     def invoke_get(self, description, uri, ignore_error=False, requires_modules=None, requires_version=None,
-                   warnings=[], requires_model=None):
+                   warnings=None, requires_model=None):
         """
         Send a GET request to the LMI.
         """
         self._log_request("GET", uri, description)
 
-        response = self._invoke_request(self.session.get, description, uri,
+        response = self._invoke_request('GET', description, uri,
                                         ignore_error, requires_modules=requires_modules,
                                         requires_version=requires_version, requires_model=requires_model,
                                         warnings=warnings)
@@ -547,42 +429,37 @@ See the following URL for more details:
 
     def invoke_get_with_headers(self, description, uri, headers, ignore_error=False, requires_modules=None,
                                 requires_version=None,
-                                warnings=[], requires_model=None):
+                                warnings=None, requires_model=None):
         """
         Send a GET request to the LMI with passed in headers.
         """
         self._log_request("GET", uri, description)
 
-        response = self._invoke_request_with_headers(self.session.get, description, uri,
+        response = self._invoke_request_with_headers('GET', description, uri,
                                                      ignore_error, headers=headers, requires_modules=requires_modules,
                                                      requires_version=requires_version, requires_model=requires_model,
                                                      warnings=warnings)
         self._log_response(response)
         return response
 
-    def invoke_delete(self, description, uri, data={}, ignore_error=False, requires_modules=None, requires_version=None,
-                      warnings=[], requires_model=None):
+    def invoke_delete(self, description, uri, data=None, ignore_error=False, requires_modules=None, requires_version=None,
+                      warnings=None, requires_model=None):
         """
         Send a DELETE request to the LMI.
         """
         self._log_request("DELETE", uri, description)
-        if data != {}:
+        if data:
             self.logger.info("Input Data:{0}".format(data))
-            response = self._invoke_request(self.session.delete, description, uri, ignore_error, data=data,
-                                            requires_modules=requires_modules, requires_version=requires_version,
-                                            requires_model=requires_model,
-                                            warnings=warnings)
-        else:
-            response = self._invoke_request(self.session.delete, description, uri, ignore_error,
-                                            requires_modules=requires_modules, requires_version=requires_version,
-                                            requires_model=requires_model,
-                                            warnings=warnings)
+        response = self._invoke_request('DELETE', description, uri, ignore_error, data=data or None,
+                                        requires_modules=requires_modules, requires_version=requires_version,
+                                        requires_model=requires_model,
+                                        warnings=warnings)
         self._log_response(response)
         return response
 
     def invoke_request(self, description, method, uri, filename=None, ignore_error=False, requires_modules=None,
                        requires_version=None,
-                       warnings=[], requires_model=None, **kwargs):
+                       warnings=None, requires_model=None, **kwargs):
         """
         parse and send a appropriate request to the appliance.
         """
@@ -603,58 +480,28 @@ See the following URL for more details:
                 if self.debug: self.logger.debug("Input json Data: " + json_data)
                 args['json'] = json_data
             elif key == 'data':
-                try:
-                    json.loads(value)
-                    if self.debug: self.logger.debug("Input Data: " + value)
-                    args['data'] = value
-                except ValueError:
-                    if self.debug: self.logger.debug("Input Data: " + value)
-                    args['data'] = value
+                if self.debug: self.logger.debug("Input Data: " + value)
+                args['data'] = value
             else:
                 args[key] = value
 
-        self._suppress_ssl_warning()
-
-        try:
-            streaminargs = False
-            r = self.session.request(method, url=self._url(uri), **args)
-            # check for stream=True
-            if "stream" in args and args["stream"] == True:
-                streaminargs = True
-                if filename == None:
-                    return_obj['warnings'] = return_obj['warnings'].append(
-                        "filename is missing, for stream=True, filename needs to be non null")
-                    return return_obj
-                # else stream content to file
-                else:
-                    if (r.status_code != 200 and r.status_code != 204 and r.status_code != 201):
-                        self.logger.error("  Request failed: ")
-                        self.logger.error("     status code: {0}".format(r.status_code))
-                        if r.text != "":
-                            self.logger.error("     text: " + r.text)
-                        if not ignore_error:
-                            raise IBMError("HTTP Return code: {0}".format(r.status_code), r.text)
-                        else:
-                            return_obj['rc'] = r.status_code
-                            return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
-                    else:
-                        with open(filename, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=1024):
-                                if chunk:  # filter out keep-alive new chunks
-                                    f.write(chunk)
-                        return_obj['rc'] = 0
-                        return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
-
-            if method == "get" or (method == "post" and streaminargs == True):
-                return_obj['changed'] = False
-            else:
-                return_obj['changed'] = True  # Anything but GET or a POST with stream=True set should result in change
+        # With stream=True the body is written to filename
+        stream = args.pop('stream', False) is True
+        if stream and filename is None:
+            return_obj['warnings'].append("filename is missing, for stream=True, filename needs to be non null")
+            return return_obj
 
-            if streaminargs == False:
-                self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+        self._suppress_ssl_warning()
 
-        except requests.exceptions.ConnectionError as e:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+        if stream:
+            self.transport.get_file(return_obj, self._url(uri), filename, ignore_error, method=method, **args)
+            # Anything but GET or a POST with stream=True set should result in change
+            return_obj['changed'] = return_obj['rc'] == 0 and method.lower() not in ('get', 'post')
+        else:
+            r = self.transport.send(return_obj, method, self._url(uri), ignore_error, self._process_response,
+                                    changed=method.lower() != 'get', **args)
+            if r is not None:
+                self._record_change(return_obj=return_obj, uri=uri)
 
         return return_obj
 
@@ -663,22 +510,24 @@ See the following URL for more details:
         Get facts about the appliance
         """
         # Fact collection will abort on any exception
-        try:
-            self.get_version()
-
-            # Check if appliance is setup before collecting Activation information
-            import ibmsecurity.isam.base.setup_complete
-            ret_obj = ibmsecurity.isam.base.setup_complete.get(self)
-            if ret_obj['data'].get('configured') is True:
-                self.get_activations()
-        # Be sure to let fatal error unconditionally percolate up the stack
-        except IBMFatal:
-            raise
-
-        # Exceptions like those connection related will be ignored
-        except Exception as e:
-            self.logger.error( traceback.print_exc() )
-            pass
+        # Only one thread at a time refreshes the facts of an appliance
+        with self.facts_lock:
+            try:
+                self.get_version()
+
+                # Check if appliance is setup before collecting Activation information
+                import ibmsecurity.isam.base.setup_complete
+                ret_obj = ibmsecurity.isam.base.setup_complete.get(self)
+                if ret_obj['data'].get('configured') is True:
+                    self.get_activations()
+            # Be sure to let fatal error unconditionally percolate up the stack
+            except IBMFatal:
+                raise
+
+            # Exceptions like those connection related will be ignored
+            except Exception as e:
+                self.logger.error( traceback.print_exc() )
+                pass
 
     def get_version(self):
         """
@@ -686,29 +535,29 @@ See the following URL for more details:
 
         When firmware are installed or partition are changed, then this value is updated
         """
-        self.facts['version'] = None
+        facts = {'version': None}
         import ibmsecurity.isam.base.version
         import ibmsecurity.isam.base.firmware
 
         try:
             ret_obj = ibmsecurity.isam.base.version.get(self)
-            self.facts['version'] = ret_obj['data']['firmware_version']
+            facts['version'] = ret_obj['data']['firmware_version']
 
-            if tools.version_compare(self.facts['version'], '9.0.3.0') > 0:
+            if tools.version_compare(facts['version'], '9.0.3.0') > 0:
                 if 'deployment_model' in ret_obj['data']:
-                    self.facts['model'] = ret_obj['data']['deployment_model']
+                    facts['model'] = ret_obj['data']['deployment_model']
 
                 if 'product_name' in ret_obj['data']:
-                    self.facts['product_name'] = ret_obj['data']['product_name']
+                    facts['product_name'] = ret_obj['data']['product_name']
 
                 if 'product_description' in ret_obj['data']:
-                    self.facts['product_description'] = ret_obj['data']['product_description']
+                    facts['product_description'] = ret_obj['data']['product_description']
 
                 if 'firmware_build' in ret_obj['data']:
-                    self.facts['firmware_build'] = ret_obj['data']['firmware_build']
+                    facts['firmware_build'] = ret_obj['data']['firmware_build']
 
                 if 'firmware_label' in ret_obj['data']:
-                    self.facts['firmware_label'] = ret_obj['data']['firmware_label']
+                    facts['firmware_label'] = ret_obj['data']['firmware_label']
 
         # Be sure to let fatal error unconditionally percolate up the stack
         except IBMFatal:
@@ -720,11 +569,13 @@ See the following URL for more details:
                 for partition in ret_obj['data']:
                     if partition['active'] is True:
                         ver = partition['firmware_version'].split(' ')
-                        self.facts['version'] = ver[-1]
-                self.facts['model'] = "Appliance"
+                        facts['version'] = ver[-1]
+                facts['model'] = "Appliance"
             except:
                 self.logger.error( traceback.print_exc() )
                 pass
+        # Update the facts at once, other threads never see a partial update
+        self.facts.update(facts)
         return
 
     def get_activations(self):
@@ -733,13 +584,14 @@ See the following URL for more details:
 
         When new modules are activated or old ones de-activated this value is updated.
         """
-        self.facts['activations'] = []
         import ibmsecurity.isam.base.activation
 
+        activations = []
         ret_obj = ibmsecurity.isam.base.activation.get_all(self)
         for activation in ret_obj['data']:
             if activation['enabled'] == 'True':
-                self.facts['activations'].append(activation['id'])
+                activations.append(activation['id'])
+        self.facts['activations'] = activations
 
     def _log_request(self, method, url, desc):
         self.logger.debug("Request: %s %s desc=%s", method, url, desc)
@@ -26,6 +26,9 @@ class ISAMApplianceAdminProxy(ISAMAppliance):
 
         ISAMAppliance.__init__(self, hostname, user, cert=cert)
 
+        # All appliances behind this admin proxy share its connection pool
+        self.transport.mount_shared(self.adminProxyProtocol, self.adminProxyHostname, self.adminProxyPort)
+
     def _url(self, uri):
         # shorten the junction name from hostname parameter
         # e.g.  isam.ibm.com -junction-> /isam          (with short name)
@@ -1,10 +1,10 @@
-import json
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 import logging
 from .ibmappliance import IBMAppliance
 from .ibmappliance import IBMError
 from .ibmappliance import IBMFatal
+from .transport import Transport
 from ibmsecurity.utilities import tools
 from io import open
 from os import environ
@@ -16,7 +16,8 @@ except NameError:
 
 
 class ISVGAppliance(IBMAppliance):
-    def __init__(self, hostname, user, lmi_port=443, verify=None):
+    def __init__(self, hostname, user, lmi_port=443, verify=None, cert=None, connect_timeout=None, read_timeout=None,
+                 retries=None):
         self.logger = logging.getLogger(__name__)
         self.logger.debug('Creating an ISVGAppliance')
         if isinstance(lmi_port, basestring):
@@ -24,7 +25,10 @@ class ISVGAppliance(IBMAppliance):
         else:
             self.lmi_port = lmi_port
         self.hostname = hostname
-        self.session = requests.session()
+        # Pooled session with timeouts and retries
+        self.transport = Transport(connect_timeout=connect_timeout, read_timeout=read_timeout, retries=retries,
+                                   logger=self.logger)
+        self.session = self.transport.session
 
         # If we did not get a value for verify, try the environment variable
         if verify is None:
@@ -105,49 +109,37 @@ See the following URL for more details:
             return_obj['changed'] = False
             return_obj['rc'] = 0
         elif (http_response.status_code != 200 and http_response.status_code != 204 and http_response.status_code != 201):
+            text = http_response.text
             self.logger.error("  Request failed: ")
             self.logger.error("     status code: {0}".format(http_response.status_code))
-            if http_response.text != "":
-                self.logger.error("     text: " + http_response.text)
+            if text != "":
+                self.logger.error("     text: " + text)
             if not ignore_error:
-                raise IBMError("HTTP Return code: {0}".format(http_response.status_code), http_response.text)
+                raise IBMError("HTTP Return code: {0}".format(http_response.status_code), text)
             return_obj['changed'] = False  # force changed to be False as there is an error
         else:
             return_obj['rc'] = 0
 
-        # Handle if there was json on input but response was not in json format
-        json_data = {}
-        try:
-            json_data = json.loads(http_response.text)
-        except ValueError:
-            return_obj['data'] = http_response.content
-            return
-
-        self.logger.debug("Status Code: {0}".format(http_response.status_code))
-        if http_response.text != "":
-            self.logger.debug("Text: " + http_response.content.decode("utf-8"))
-
-        for key in http_response.headers:
-            if key == 'g-type':
-                if http_response.headers[key] == 'application/octet-stream; charset=UTF-8':
-                    json_data = {}
-                    return_obj.data = http_response.content
-                    return
+        # The body is only parsed when 'data' is used, the body itself when it is not JSON
+        content = http_response.content
+        return_obj.set_json_content(content)
 
-        if http_response.text != "":
-            json_data = json.loads(http_response.text)
-
-        return_obj['data'] = json_data
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Status Code: {0}".format(http_response.status_code))
+            if content:
+                self.logger.debug("Text: " + content.decode("utf-8", errors="replace"))
 
     def _process_connection_error(self, ignore_error, return_obj):
-        if not ignore_error:
-            self.logger.critical("Failed to connect to server.")
-            raise IBMError("HTTP Return code: 502", "Failed to connect to server")
-        else:
-            self.logger.debug("Failed to connect to server.")
-            return_obj['rc'] = 502
+        self.transport.connection_error(return_obj, ignore_error)
+
+    def _request_args(self):
+        # Basic auth on every request, also when a client certificate is used. Redirects are not followed: a 302
+        # means the endpoint can not be used yet (see _process_response)
+        return {'auth': (self.user.username, self.user.password), 'allow_redirects': False}
 
-    def _process_warnings(self, uri, requires_modules, requires_version, warnings=[]):
+    def _process_warnings(self, uri, requires_modules, requires_version, warnings=None):
+        # Warnings of this call go in a new list, so the list of the caller is never modified
+        warnings = [] if warnings is None else list(warnings)
         # flag to indicate if processing needs to return and not continue
         return_call = False
         self.logger.debug("Checking for minimum version: {0}.".format(requires_version))
@@ -187,7 +179,7 @@ See the following URL for more details:
         return warnings, return_call
 
     def invoke_post_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
-                          requires_version=None, warnings=[], json_response=True):
+                          requires_version=None, warnings=None, json_response=True):
         """
         Send multipart/form-data upload file request to the appliance.
         """
@@ -211,32 +203,19 @@ See the following URL for more details:
             }
         self.logger.debug("Headers are: {0}".format(headers))
 
-        files = list()
-        for file2post in fileinfo:
-            files.append((file2post['file_formfield'],
-                          (tools.path_leaf(file2post['filename']), open(file2post['filename'], 'rb'),
-                           file2post['mimetype'])))
+        # Files are streamed from disk
+        files = [(file2post['file_formfield'], tools.path_leaf(file2post['filename']), file2post['filename'],
+                  file2post['mimetype']) for file2post in fileinfo]
 
         self._suppress_ssl_warning()
 
-        try:
-            r = requests.post(url=self._url(uri=uri), data=data, auth=(self.user.username, self.user.password),
-                              files=files, verify=self.verify, headers=headers)
-            return_obj['changed'] = True  # POST of file would be a change
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError:
-            if not ignore_error:
-                self.logger.critical("Failed to connect to server.")
-                raise IBMError("HTTP Return code: 502", "Failed to connect to server")
-            else:
-                self.logger.debug("Failed to connect to server.")
-                return_obj.rc = 502
+        self.transport.send_files(return_obj, 'POST', self._url(uri=uri), data, files, ignore_error,
+                                  self._process_response, headers=headers)
 
         return return_obj
 
     def invoke_put_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
-                         requires_version=None, warnings=[]):
+                         requires_version=None, warnings=None):
         """
         Send multipart/form-data upload file request to the appliance.
         """
@@ -255,32 +234,19 @@ See the following URL for more details:
         }
         self.logger.debug("Headers are: {0}".format(headers))
 
-        files = list()
-
-        for file2post in fileinfo:
-            files.append((file2post['file_formfield'],
-                          (file2post['filename'], open(file2post['filename'], 'rb'), file2post['mimetype'])))
+        # Files are streamed from disk
+        files = [(file2post['file_formfield'], file2post['filename'], file2post['filename'], file2post['mimetype'])
+                 for file2post in fileinfo]
 
         self._suppress_ssl_warning()
 
-        try:
-            r = requests.put(url=self._url(uri=uri), data=data, auth=(self.user.username, self.user.password),
-                             files=files, verify=self.verify, headers=headers)
-            return_obj['changed'] = True  # POST of file would be a change
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError:
-            if not ignore_error:
-                self.logger.critical("Failed to connect to server.")
-                raise IBMError("HTTP Return code: 502", "Failed to connect to server")
-            else:
-                self.logger.debug("Failed to connect to server.")
-                return_obj.rc = 502
+        self.transport.send_files(return_obj, 'PUT', self._url(uri=uri), data, files, ignore_error,
+                                  self._process_response, headers=headers)
 
         return return_obj
 
     def invoke_get_file(self, description, uri, filename, no_headers=False, mime_types=None, ignore_error=False, requires_modules=None,
-                        requires_version=None, warnings=[]):
+                        requires_version=None, warnings=None):
         """
         Invoke a GET request and download the response data to a file
         """
@@ -308,46 +274,16 @@ See the following URL for more details:
 
         self._suppress_ssl_warning()
 
-        try:
-            r = requests.get(url=self._url(uri=uri), auth=(self.user.username, self.user.password), verify=self.verify,
-                             stream=True, headers=headers, allow_redirects=False)
-
-            if (r.status_code != 200 and r.status_code != 204 and r.status_code != 201):
-                self.logger.error("  Request failed: ")
-                self.logger.error("     status code: {0}".format(r.status_code))
-                if r.text != "":
-                    self.logger.error("     text: " + r.text)
-                if not ignore_error:
-                    raise IBMError("HTTP Return code: {0}".format(r.status_code), r.text)
-                else:
-                    return_obj['rc'] = r.status_code
-                    return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
-            else:
-                with open(filename, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=1024):
-                        if chunk:  # filter out keep-alive new chunks
-                            f.write(chunk)
-                return_obj['rc'] = 0
-                return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
+        return self.transport.get_file(return_obj, self._url(uri=uri), filename, ignore_error, headers=headers,
+                                       **self._request_args())
 
-        except requests.exceptions.ConnectionError:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
-
-        except IOError:
-            if not ignore_error:
-                self.logger.critical("Failed to write to file: " + filename)
-                raise IBMError("HTTP Return code: 999", "Failed to write to file: " + filename)
-            else:
-                self.logger.debug("Failed to write to file: " + filename)
-                return_obj['rc'] = 999
-
-        return return_obj
-
-    def _invoke_request(self, func, description, uri, ignore_error, data={}, requires_modules=None,
-                        requires_version=None, warnings=[]):
+    def _invoke_request(self, method, description, uri, ignore_error, data=None, requires_modules=None,
+                        requires_version=None, warnings=None):
         """
         Send a request to the LMI.  This function is private and should not be
         used directly.  The invoke_get/invoke_put/etc functions should be used instead.
+
+        method: GET, PUT, POST or DELETE, the data is sent as JSON (see Transport.send_json)
         """
         self._log_desc(description=description)
 
@@ -358,76 +294,45 @@ See the following URL for more details:
         if return_call:
             return return_obj
 
-        # There maybe some cases when header should be blank (not json)
-        headers = {
-            'Accept': 'application/json',
-            'Content-type': 'application/json'
-        }
-        self.logger.debug("Headers are: {0}".format(headers))
-
-        # Process the input data into JSON
-        json_data = json.dumps(data)
-
-        self.logger.debug("Input Data: " + json_data)
-
         self._suppress_ssl_warning()
 
-        try:
-            if func == requests.get or func == requests.delete:
-
-                if data != {}:
-                    r = func(url=self._url(uri), data=json_data, auth=(self.user.username, self.user.password),
-                             verify=self.verify, headers=headers, allow_redirects=False)
-                else:
-                    r = func(url=self._url(uri), auth=(self.user.username, self.user.password),
-                             verify=self.verify, headers=headers, allow_redirects=False)
-            else:
-                r = func(url=self._url(uri), data=json_data,
-                         auth=(self.user.username, self.user.password),
-                         verify=self.verify, headers=headers)
-
-            if func != requests.get:
-                return_obj['changed'] = True  # Anything but GET should result in change
-
-            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
-
-        except requests.exceptions.ConnectionError:
-            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
+        self.transport.send_json(return_obj, method, self._url(uri), data, ignore_error, self._process_response,
+                                 **self._request_args())
 
         return return_obj
 
     def invoke_put(self, description, uri, data, ignore_error=False, requires_modules=None, requires_version=None,
-                   warnings=[]):
+                   warnings=None):
         """
         Send a PUT request to the LMI.
         """
-        return self._invoke_request(requests.put, description, uri, ignore_error, data,
+        return self._invoke_request('PUT', description, uri, ignore_error, data,
                                     requires_modules=requires_modules, requires_version=requires_version,
                                     warnings=warnings)
 
     def invoke_post(self, description, uri, data, ignore_error=False, requires_modules=None, requires_version=None,
-                    warnings=[]):
+                    warnings=None):
         """
         Send a POST request to the LMI.
         """
-        return self._invoke_request(requests.post, description, uri, ignore_error, data,
+        return self._invoke_request('POST', description, uri, ignore_error, data,
                                     requires_modules=requires_modules, requires_version=requires_version,
                                     warnings=warnings)
 
     def invoke_get(self, description, uri, ignore_error=False, requires_modules=None, requires_version=None,
-                   warnings=[]):
+                   warnings=None):
         """
         Send a GET request to the LMI.
         """
-        return self._invoke_request(requests.get, description, uri, ignore_error, requires_modules=requires_modules,
+        return self._invoke_request('GET', description, uri, ignore_error, requires_modules=requires_modules,
                                     requires_version=requires_version, warnings=warnings)
 
     def invoke_delete(self, description, uri, ignore_error=False, requires_modules=None, requires_version=None,
-                      warnings=[]):
+                      warnings=None):
         """
         Send a DELETE request to the LMI.
         """
-        return self._invoke_request(requests.delete, description, uri, ignore_error, requires_modules=requires_modules,
+        return self._invoke_request('DELETE', description, uri, ignore_error, requires_modules=requires_modules,
                                     requires_version=requires_version, warnings=warnings)
 
     def get_facts(self):
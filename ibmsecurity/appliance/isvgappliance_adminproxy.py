@@ -32,6 +32,9 @@ class ISVGApplianceAdminProxy(ISVGAppliance):
 
         ISVGAppliance.__init__(self, hostname, user)
 
+        # All appliances behind this admin proxy share its connection pool
+        self.transport.mount_shared(self.adminProxyProtocol, self.adminProxyHostname, self.adminProxyPort)
+
     def _url(self, uri):
         # shorten the junction name from hostname parameter
         # e.g.  isvg.ibm.com -junction-> /isvg          (with short name)
@@ -0,0 +1,337 @@
+"""
+HTTP transport shared by the ISAM, ISDS and ISVG appliance classes
+
+Every appliance object has a Transport, which owns its requests session:
+- connections are pooled per host (and shared per admin proxy endpoint, see connection_pool.py)
+- every request has a connect and read timeout
+- idempotent requests (GET, HEAD, OPTIONS) are retried with exponential backoff on connection errors, read errors
+  and 502/503/504 responses; other requests are only retried when the connection could not be made, as then
+  nothing was sent
+- file uploads are streamed from disk in a multipart body, downloads are written to disk in chunks
+- one dispatch for all appliance classes (send, send_json, send_files, get_file): connection errors, download errors
+  and the changed flag are handled here, the appliance class only processes the response (its process_response hook)
+
+The defaults can be set with the environment variables IBMSECLIB_CONNECT_TIMEOUT, IBMSECLIB_READ_TIMEOUT (seconds,
+"none" for no timeout) and IBMSECLIB_RETRIES.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import uuid
+from os import environ
+
+import requests
+import requests.adapters
+
+from ibmsecurity.appliance import connection_pool
+from ibmsecurity.appliance.ibmappliance import IBMError
+
+try:
+    from urllib3.fields import RequestField
+    from urllib3.util.retry import Retry
+except ImportError:
+    from requests.packages.urllib3.fields import RequestField
+    from requests.packages.urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Long running LMI calls (fixpack install, snapshot apply, ...) only answer when they are done
+default_connect_timeout = 30
+default_read_timeout = 1800
+default_retries = 3
+default_backoff_factor = 0.5
+retry_methods = frozenset(['GET', 'HEAD', 'OPTIONS'])
+retry_status = (502, 503, 504)
+chunk_size = 1024 * 1024
+
+# Errors that mean the appliance could not be reached (or did not answer in time)
+connection_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def _env_timeout(name, default):
+    value = environ.get(name, None)
+    if value is None or value == '':
+        return default
+    if value.lower() == 'none':
+        return None
+    return float(value)
+
+
+def _retry(retries, backoff_factor):
+    kwargs = {'total': retries, 'connect': retries, 'read': retries, 'status': retries,
+              'backoff_factor': backoff_factor, 'status_forcelist': retry_status, 'raise_on_status': False}
+    try:
+        return Retry(allowed_methods=retry_methods, **kwargs)
+    except TypeError:
+        # urllib3 older than 1.26
+        return Retry(method_whitelist=retry_methods, **kwargs)
+
+
+class _Session(requests.Session):
+    """
+    Session with a default timeout for every request, that can be changed for the requests of one thread
+    """
+    timeout = None
+
+    def __init__(self):
+        super(_Session, self).__init__()
+        self.local = threading.local()
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout', None) is None:
+            kwargs['timeout'] = getattr(self.local, 'timeout', None) or self.timeout
+        return super(_Session, self).request(method, url, **kwargs)
+
+
+def form_fields(fields):
+    """
+    (name, value) pairs of form fields (a dict or a list of pairs), encoded as requests does for data= with files=:
+    None values are left out, every item of a list or tuple value is a field of its own
+    """
+    if isinstance(fields, dict):
+        fields = list(fields.items())
+    for name, value in fields or []:
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        if isinstance(value, (str, bytes)) or not hasattr(value, '__iter__'):
+            value = [value]
+        for v in value:
+            if v is None:
+                continue
+            if not isinstance(v, bytes):
+                v = str(v).encode('utf-8')
+            yield name, v
+
+
+class MultipartStream(object):
+    """
+    multipart/form-data body that reads the files while it is sent, instead of building the body in memory.
+    The body is the same as the one requests builds for data=fields and files=files (see form_fields).
+
+    :param fields: dict or list of (name, value) form fields
+    :param files: list of (formfield, filename in the form, path, mimetype)
+    :param boundary: boundary of the parts, a random one by default
+    """
+
+    def __init__(self, fields, files, boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={0}".format(self.boundary)
+        separator = "--{0}\r\n".format(self.boundary).encode('utf-8')
+        self._parts = []
+        for name, value in form_fields(fields):
+            # The headers are rendered by urllib3, as for requests, so names are quoted the same way
+            header = RequestField.from_tuples(name, value).render_headers().encode('utf-8')
+            self._parts.append((separator + header + value + b"\r\n", None))
+        for formfield, filename, path, mimetype in files:
+            field = RequestField(name=formfield, data=b'', filename=filename)
+            field.make_multipart(content_type=mimetype)
+            self._parts.append((separator + field.render_headers().encode('utf-8'), path))
+            self._parts.append((b"\r\n", None))
+        self._parts.append(("--{0}--\r\n".format(self.boundary).encode('utf-8'), None))
+        self.length = sum(len(data) + (os.path.getsize(path) if path else 0) for data, path in self._parts)
+        self._index = 0
+        self._buffer = b''
+        self._file = None
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        out = []
+        wanted = size
+        while wanted > 0:
+            if self._buffer:
+                data, self._buffer = self._buffer[:wanted], self._buffer[wanted:]
+            elif self._file is not None:
+                data = self._file.read(wanted)
+                if not data:
+                    self._file.close()
+                    self._file = None
+                    continue
+            elif self._index < len(self._parts):
+                self._buffer, path = self._parts[self._index]
+                self._index += 1
+                if path:
+                    # The file is read after its header
+                    self._file = open(path, 'rb')
+                continue
+            else:
+                break
+            out.append(data)
+            wanted -= len(data)
+        return b''.join(out)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Transport(object):
+    """
+    Pooled requests session with timeouts and retries, and streaming uploads and downloads
+    """
+
+    def __init__(self, verify=None, cert=None, auth=None, connect_timeout=None, read_timeout=None, retries=None,
+                 backoff_factor=default_backoff_factor, logger=None):
+        # Errors are logged with the logger of the appliance class
+        self.logger = logger or logging.getLogger(__name__)
+        if connect_timeout is None:
+            connect_timeout = _env_timeout('IBMSECLIB_CONNECT_TIMEOUT', default_connect_timeout)
+        if read_timeout is None:
+            read_timeout = _env_timeout('IBMSECLIB_READ_TIMEOUT', default_read_timeout)
+        if retries is None:
+            retries = int(environ.get('IBMSECLIB_RETRIES', default_retries))
+        self.max_retries = _retry(retries, backoff_factor)
+
+        self.session = _Session()
+        self.session.timeout = (connect_timeout, read_timeout)
+        self.session.verify = verify
+        if cert is not None:
+            self.session.cert = cert
+        if auth is not None:
+            self.session.auth = auth
+        adapter = self.new_adapter()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def new_adapter(self):
+        return requests.adapters.HTTPAdapter(pool_maxsize=connection_pool.pool_maxsize, max_retries=self.max_retries)
+
+    def mount_shared(self, protocol, hostname, port):
+        """
+        Use the connection pool shared by all appliances that send their requests to this endpoint
+        """
+        connection_pool.mount(self.session, protocol, hostname, port, factory=self.new_adapter)
+
+    @contextlib.contextmanager
+    def request_timeout(self, timeout):
+        """
+        Use timeout (secs, or a (connect, read) tuple) for the requests of the current thread within a with block
+        """
+        local = self.session.local
+        previous = getattr(local, 'timeout', None)
+        local.timeout = timeout
+        try:
+            yield
+        finally:
+            local.timeout = previous
+
+    def send(self, return_obj, method, url, ignore_error, process_response=None, changed=None, **kwargs):
+        """
+        Send a request and process its response into return_obj
+
+        :param process_response: hook of the appliance class, process_response(return_obj, response, ignore_error)
+        :param changed: value of 'changed' in return_obj when the request was sent (None to leave it)
+        :param kwargs: arguments of requests.Session.request
+        :return: the response, None when the appliance could not be reached and ignore_error is set (rc is 502)
+        """
+        try:
+            http_response = self.session.request(method, url, **kwargs)
+            if changed is not None:
+                return_obj['changed'] = changed
+            if process_response is not None:
+                process_response(return_obj, http_response, ignore_error)
+            return http_response
+        except connection_errors as e:
+            self.connection_error(return_obj, ignore_error, e)
+            return None
+
+    def send_json(self, return_obj, method, url, data, ignore_error, process_response, headers=None, **kwargs):
+        """
+        Send data as a JSON body (GET and DELETE only have a body when there is data), anything but a GET is a change
+        """
+        if headers is None:
+            headers = {
+                'Accept': 'application/json',
+                'Content-type': 'application/json'
+            }
+        if data is None:
+            data = {}
+        if method not in ('GET', 'DELETE') or data != {}:
+            kwargs['data'] = json.dumps(data)
+            self.logger.debug("Input Data: " + kwargs['data'])
+        changed = True if method != 'GET' else None
+        return self.send(return_obj, method, url, ignore_error, process_response, changed=changed, headers=headers,
+                         **kwargs)
+
+    def send_files(self, return_obj, method, url, fields, files, ignore_error, process_response, headers=None,
+                   **kwargs):
+        """
+        Send files as a streamed multipart/form-data body, it is a change
+
+        :param fields: dict or list of (name, value) form fields
+        :param files: list of (formfield, filename in the form, path, mimetype)
+        """
+        body = MultipartStream(fields, files)
+        headers = dict(headers or {})
+        headers['Content-Type'] = body.content_type
+        headers['Content-Length'] = str(len(body))
+        try:
+            return self.send(return_obj, method, url, ignore_error, process_response, changed=True, data=body,
+                             headers=headers, **kwargs)
+        finally:
+            body.close()
+
+    def get_file(self, return_obj, url, filename, ignore_error, method='GET', **kwargs):
+        """
+        Send a request and write the body of its response to filename (see save)
+        """
+        http_response = self.send(return_obj, method, url, ignore_error, stream=True, **kwargs)
+        if http_response is not None:
+            self.save(return_obj, http_response, filename, ignore_error)
+        return return_obj
+
+    def save(self, return_obj, http_response, filename, ignore_error):
+        """
+        Write the body of a streamed response to filename, rc and data of return_obj tell how it went
+        """
+        try:
+            if http_response.status_code not in (200, 201, 204):
+                self.logger.error("  Request failed: ")
+                self.logger.error("     status code: {0}".format(http_response.status_code))
+                if http_response.text != "":
+                    self.logger.error("     text: " + http_response.text)
+                if not ignore_error:
+                    raise IBMError("HTTP Return code: {0}".format(http_response.status_code), http_response.text)
+                return_obj['rc'] = http_response.status_code
+                return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
+            else:
+                self.download(http_response, filename)
+                return_obj['rc'] = 0
+                return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
+        except connection_errors as e:
+            # The connection broke off during the download
+            self.connection_error(return_obj, ignore_error, e)
+        except IOError:
+            if not ignore_error:
+                self.logger.critical("Failed to write to file: " + filename)
+                raise IBMError("HTTP Return code: 999", "Failed to write to file: " + filename)
+            self.logger.debug("Failed to write to file: " + filename)
+            return_obj['rc'] = 999
+        finally:
+            http_response.close()
+
+    def connection_error(self, return_obj, ignore_error, error=""):
+        """
+        The appliance could not be reached: raise an IBMError, or set rc to 502 with ignore_error
+        """
+        if not ignore_error:
+            self.logger.critical("Failed to connect to server: {0}".format(error))
+            raise IBMError("HTTP Return code: 502", "Failed to connect to server: {0}".format(error))
+        self.logger.debug("Failed to connect to server: {0}".format(error))
+        return_obj['rc'] = 502
+
+    @staticmethod
+    def download(response, filename):
+        """
+        Write the body of a streamed response to filename
+        """
+        with open(filename, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:  # filter out keep-alive new chunks
+                    f.write(chunk)
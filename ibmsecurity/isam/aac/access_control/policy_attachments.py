@@ -1,5 +1,6 @@
 import logging
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 
 logger = logging.getLogger(__name__)
 
@@ -7,12 +8,22 @@ logger = logging.getLogger(__name__)
 uri = "/iam/access/v8/policyattachments"
 
 
-def get_all(isamAppliance, filter=None, sortBy=None, check_mode=False, force=False):
+def get_all(isamAppliance, filter=None, sortBy=None, count=None, start=None, check_mode=False, force=False):
     """
     Retrieve a list of configured resources
     """
     return isamAppliance.invoke_get("Retrieve a list of configured resources",
-                                    "{0}{1}".format(uri, tools.create_query_string(filter=filter, sortBy=sortBy)))
+                                    "{0}{1}".format(uri, tools.create_query_string(filter=filter, sortBy=sortBy,
+                                                                                   count=count, start=start)))
+
+
+def iter_all(isamAppliance, filter=None, sortBy=None, page_size=100, prefetch=2, start=None):
+    """
+    Generator with all configured resources, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    return iter_pages(lambda _start, _count: page_items(get_all(isamAppliance, filter=filter, sortBy=sortBy,
+                                                                count=_count, start=_start)),
+                      page_size=page_size, prefetch=prefetch, start=start)
 
 
 def get(isamAppliance, server, resourceUri, check_mode=False, force=False):
@@ -72,7 +83,7 @@ def authenticate(isamAppliance, username, password, domain='Default', check_mode
             "username": username,
             "password": password,
             "domain": domain
-        })
+        }, pending_change=False)
 
     ret_obj['changed'] = False  # Authentication call changes nothing on the appliance (HTTP POST defaults to change)
 
@@ -88,7 +99,7 @@ def get_resources(isamAppliance, object='/WebSEAL', check_mode=False, force=Fals
         "{0}/pdadmin".format(uri), {
             "command": "object list",
             "object": object
-        })
+        }, pending_change=False)
 
     ret_obj['changed'] = False  # Resource get call changes nothing on the appliance (HTTP POST defaults to change)
 
@@ -1,6 +1,7 @@
 import logging
 from typing import List
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +43,15 @@ def get_all(isamAppliance, start=None, count=None, filter=None, sortBy=None, for
                                     requires_modules=requires_modules, requires_version=requires_version,warnings=warnings)
 
 
+def iter_all(isamAppliance, filter=None, sortBy=None, formatting='xml', page_size=100, prefetch=2, start=None):
+    """
+    Generator with all authentication policies, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    return iter_pages(lambda _start, _count: page_items(get_all(isamAppliance, start=_start, count=_count,
+                                                                filter=filter, sortBy=sortBy, formatting=formatting)),
+                      page_size=page_size, prefetch=prefetch, start=start)
+
+
 def get(isamAppliance, name, formatting='xml', check_mode=False, force=False):
     """
     Retrieve a specific authentication policy
@@ -1,5 +1,6 @@
 import logging
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 
 logger = logging.getLogger(__name__)
 
@@ -9,15 +10,25 @@ requires_modules = ["mga"]
 requires_version = None
 
 
-def get_all(isamAppliance, filter=None, sortBy=None, check_mode=False, force=False):
+def get_all(isamAppliance, filter=None, sortBy=None, count=None, start=None, check_mode=False, force=False):
     """
     Retrieve a list of devices fingerprints
     """
     return isamAppliance.invoke_get("Retrieve a list of Device Fingerprints",
-                                    "{0}/{1}".format(uri, tools.create_query_string(filter=filter, sortBy=sortBy)),
+                                    "{0}/{1}".format(uri, tools.create_query_string(filter=filter, sortBy=sortBy,
+                                                                                    count=count, start=start)),
                                     requires_modules=requires_modules, requires_version=requires_version)
 
 
+def iter_all(isamAppliance, filter=None, sortBy=None, page_size=100, prefetch=2, start=None):
+    """
+    Generator with all devices fingerprints, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    return iter_pages(lambda _start, _count: page_items(get_all(isamAppliance, filter=filter, sortBy=sortBy,
+                                                                count=_count, start=_start)),
+                      page_size=page_size, prefetch=prefetch, start=start)
+
+
 def get(isamAppliance, name, check_mode=False, force=False):
     """
     Retrieve a device fingerprint for a specific device
@@ -32,7 +32,8 @@ def test(isamAppliance, connectionType, hostName, port, userName, password, isSS
     if authKeyLabel is not None:
         json_data['authKeyLabel'] = authKeyLabel
 
-    ret_obj = isamAppliance.invoke_post("Test Connection", "/iam/access/v8/testconnection", json_data)
+    ret_obj = isamAppliance.invoke_post("Test Connection", "/iam/access/v8/testconnection", json_data,
+                                        pending_change=False)
 
     # Assumed POST is for changes, this is just a test so indicate no change
     ret_obj['changed'] = False
@@ -1,6 +1,7 @@
 import logging
 
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,14 @@ def get_all(isamAppliance, count=None, start=None, check_mode=False, force=False
                                     requires_modules=requires_modules, requires_version=requires_version)
 
 
+def iter_all(isamAppliance, page_size=100, prefetch=2, start=None):
+    """
+    Generator with the attributes of all users, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    return iter_pages(lambda _start, _count: page_items(get_all(isamAppliance, count=_count, start=_start)),
+                      page_size=page_size, prefetch=prefetch, start=start)
+
+
 def get(isamAppliance, userid, check_mode=False, force=False):
     """
     Retrieve the attributes of a user
@@ -1,7 +1,9 @@
 import json
 import logging
-import time
+from functools import partial
 import ibmsecurity.isam.base.lmi
+import ibmsecurity.isam.base.firmware
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 requires_model="Appliance"
@@ -56,17 +58,20 @@ def _changes_available(isamAppliance):
         return False
 
 
-def commit(isamAppliance, check_mode=False, force=False):
+def commit(isamAppliance, check_mode=False, force=False, ignore_error=False):
     """
     Commit the current pending changes.
+    Within a ChangeSet (ibmsecurity.isam.changeset) the commit is done at the end of the change set.
     """
+    if isamAppliance.changeset is not None:
+        return isamAppliance.changeset.commit()
     if force is True or _changes_available(isamAppliance) is True:
         if check_mode is True:
             return isamAppliance.create_return_object(changed=True)
         else:
             return isamAppliance.invoke_put("Committing the changes",
                                             "/isam/pending_changes",
-                                            {})
+                                            {}, ignore_error=ignore_error)
 
     return isamAppliance.create_return_object()
 
@@ -79,6 +84,8 @@ def commit_and_restart(isamAppliance, check_mode=False, force=False):
     :param force:
     :return:
     """
+    if isamAppliance.changeset is not None:
+        return isamAppliance.changeset.commit_and_restart()
     if force is True or _changes_available(isamAppliance) is True:
         if check_mode is True:
             return isamAppliance.create_return_object(changed=True)
@@ -94,7 +101,7 @@ def reboot_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=False
     Reboot and wait
     :param isamAppliance:
     :param wait_time:
-    :param check_freq:
+    :param check_freq: maximum seconds between checks
     :param check_mode:
     :param force:
     :return:
@@ -108,31 +115,15 @@ def reboot_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=False
         ret_obj = reboot(isamAppliance)
 
         if ret_obj['rc'] == 0:
-            sec = 0
-
             # Now check if it is up and running
-            while 1:
-                ret_obj = ibmsecurity.isam.base.firmware.get(isamAppliance, check_mode=check_mode, force=force,
-                                                             ignore_error=True)
-
-                # check partition last_boot time
-                if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and \
-                        (('last_boot' in ret_obj['data'][0] and ret_obj['data'][0]['last_boot'] != firmware['data'][0][
-                            'last_boot'] and ret_obj['data'][0]['active'] == True) or (
-                                 'last_boot' in ret_obj['data'][1] and ret_obj['data'][1]['last_boot'] !=
-                                 firmware['data'][1]['last_boot'] and ret_obj['data'][1]['active'] == True)):
-                    logger.info("Server is responding and has a different boot time!")
-                    return isamAppliance.create_return_object(warnings=warnings)
-                else:
-                    time.sleep(check_freq)
-                    sec += check_freq
-                    logger.debug(
-                        "Server is not responding yet. Waited for {0} secs, next check in {1} secs.".format(sec,
-                                                                                                            check_freq))
-
-                if sec >= wait_time:
-                    warnings.append("Server reboot not detected or completed, exiting... after {0} seconds".format(sec))
-                    break
+            waiter = Waiter(wait_time=wait_time, max_delay=check_freq)
+            waiter.add_appliance(isamAppliance, partial(ibmsecurity.isam.base.firmware.rebooted, isamAppliance,
+                                                        firmware))
+            sec = waiter.wait()[isamAppliance.hostname]
+            if sec is not None:
+                logger.info("Server is responding and has a different boot time!")
+                return isamAppliance.create_return_object(warnings=warnings)
+            warnings.append("Server reboot not detected or completed, exiting... after {0} seconds".format(wait_time))
 
     return isamAppliance.create_return_object(warnings=warnings)
 
@@ -142,7 +133,7 @@ def commit_and_restart_and_wait(isamAppliance, wait_time=300, check_freq=5, chec
     Restart LMI after commit
     :param isamAppliance:
     :param wait_time:
-    :param check_freq:
+    :param check_freq: maximum seconds between checks
     :param check_mode:
     :param force:
     :return:
@@ -156,28 +147,11 @@ def commit_and_restart_and_wait(isamAppliance, wait_time=300, check_freq=5, chec
         ret_obj = commit_and_restart(isamAppliance)
 
         if ret_obj['rc'] == 0:
-            sec = 0
-
             # Now check if it is up and running
-            while 1:
-                ret_obj = ibmsecurity.isam.base.lmi.get(isamAppliance, check_mode=check_mode, force=force)
-
-                # check partition last_boot time
-                if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and \
-                        ('start_time' in ret_obj['data'][0] and ret_obj['data'][0]['start_time'] != lmi['data'][0][
-                            'start_time']):
-                    logger.info("LMI is responding and has a different start time!")
-                    return isamAppliance.create_return_object(warnings=warnings)
-                else:
-                    time.sleep(check_freq)
-                    sec += check_freq
-                    logger.debug("LMI is not responding yet. Waited for {0} secs, next check in {1} secs.".format(sec,
-                                                                                                                  check_freq))
-
-                if sec >= wait_time:
-                    warnings.append(
-                        "The LMI restart not detected or completed, exiting... after {0} seconds".format(sec))
-                    break
+            ret_obj = ibmsecurity.isam.base.lmi.await_startup(isamAppliance, wait_time=wait_time,
+                                                              check_freq=check_freq,
+                                                              start_time=lmi['data'][0]['start_time'])
+            warnings.extend(ret_obj['warnings'])
 
     return isamAppliance.create_return_object(warnings=warnings)
 
@@ -2,6 +2,7 @@ import json
 import logging
 import ibmsecurity.utilities.tools
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.artifacts import get_registry
 from io import open
 
 logger = logging.getLogger(__name__)
@@ -49,17 +50,43 @@ def add(isamAppliance, extension, config_data=None, third_party_package=None, ch
     :param check_mode:
     :param force:
     :return:
+
+    An extension that is already installed is not activated again (use force for that): with config_data or
+    third_party_package it is updated with them (see update), without them nothing is done.
     """
 
     if extension is None:
         warning_str = "extension is required for add"
         return isamAppliance.create_return_object(warnings=[warning_str])
+
+    def _installed(extId):
+        if config_data is not None or third_party_package:
+            return update(isamAppliance, extId, config_data=config_data, third_party_package=third_party_package,
+                          check_mode=check_mode, force=True)
+        logger.info("Extension {0} is already installed.".format(extId))
+        return isamAppliance.create_return_object()
+
+    # The id of an extension file that was inspected before is in the artifact cache
+    registry = get_registry()
+    extId = registry.metadata(extension, 'extension_id')
+    if force is False and extId is not None and search(isamAppliance, extId=extId):
+        bytes_avoided = registry.skip(extension, reason="extension {0} is already installed".format(extId))
+        ret_obj = _installed(extId)
+        if ret_obj['changed'] is False:
+            ret_obj['data'] = {'bytes_avoided': bytes_avoided}
+        return ret_obj
+
+    cached_extId = extId
     try:
         extId = inspect(isamAppliance, extension)
     except Exception as e:
         warning_str = "Exception occurred: {0}".format(e)
         return isamAppliance.create_return_object(warnings=[warning_str])
 
+    # Not in the cache: the same check with the id from the inspect, nothing is avoided as the file was inspected
+    if force is False and extId != cached_extId and search(isamAppliance, extId=extId):
+        return _installed(extId)
+
     config_str = _get_config_data(extId, config_data)
 
     files = {}
@@ -195,6 +222,7 @@ def inspect(isamAppliance, extension, check_mode=False, force=False):
     m_obj = m_obj.replace('</textarea>', '')
 
     json_obj = json.loads(m_obj)
+    get_registry().set_metadata(extension, 'extension_id', json_obj['id'])
     return json_obj['id']
 
 
@@ -1,6 +1,8 @@
 import logging
+from functools import partial
 import ibmsecurity.utilities.tools
-import time
+import ibmsecurity.isam.base.firmware
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 
@@ -82,32 +84,15 @@ def restart_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=Fals
         ret_obj = restart(isamAppliance)
 
         if ret_obj['rc'] == 0:
-            sec = 0
-
             # Now check if it is up and running
-            while 1:
-                ret_obj = ibmsecurity.isam.base.firmware.get(isamAppliance, check_mode=check_mode, force=force,
-                                                             ignore_error=True)
-
-                # check partition last_boot time
-                if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and \
-                        (('last_boot' in ret_obj['data'][0] and ret_obj['data'][0]['last_boot'] != firmware['data'][0][
-                            'last_boot'] and ret_obj['data'][0]['active'] == True) or (
-                                 'last_boot' in ret_obj['data'][1] and ret_obj['data'][1]['last_boot'] !=
-                                 firmware['data'][1]['last_boot'] and ret_obj['data'][1]['active'] == True)):
-                    logger.info("Server is responding and has a different boot time!")
-                    return isamAppliance.create_return_object(warnings=warnings)
-                else:
-                    time.sleep(check_freq)
-                    sec += check_freq
-                    logger.debug(
-                        "Server is not responding yet. Waited for {0} secs, next check in {1} secs.".format(sec,
-                                                                                                            check_freq))
-
-                if sec >= wait_time:
-                    warnings.append(
-                        "The FIPS restart not detected or completed, exiting... after {0} seconds".format(sec))
-                    break
+            waiter = Waiter(wait_time=wait_time, max_delay=check_freq)
+            waiter.add_appliance(isamAppliance, partial(ibmsecurity.isam.base.firmware.rebooted, isamAppliance,
+                                                        firmware))
+            if waiter.wait()[isamAppliance.hostname] is not None:
+                logger.info("Server is responding and has a different boot time!")
+                return isamAppliance.create_return_object(warnings=warnings)
+            warnings.append(
+                "The FIPS restart not detected or completed, exiting... after {0} seconds".format(wait_time))
 
     return isamAppliance.create_return_object(warnings=warnings)
 
@@ -14,6 +14,21 @@ def get(isamAppliance, check_mode=False, force=False, ignore_error=False):
                                     "/firmware_settings", ignore_error=ignore_error, requires_model=requires_model)
 
 
+def rebooted(isamAppliance, firmware):
+    """
+    Check if the appliance responds and the active partition has a different boot time than in firmware
+    (the output of get before the reboot)
+    """
+    ret_obj = get(isamAppliance, ignore_error=True)
+    if ret_obj['rc'] != 0 or not isinstance(ret_obj['data'], list):
+        return False
+    for partition, old_partition in zip(ret_obj['data'], firmware['data']):
+        if 'last_boot' in partition and partition['last_boot'] != old_partition['last_boot'] and \
+                partition['active'] == True:
+            return True
+    return False
+
+
 def backup(isamAppliance, check_mode=False, force=False):
     """
     Creating a backup of the active partition
@@ -1,6 +1,8 @@
 import logging
 import os.path
+import re
 import ibmsecurity.utilities.tools
+from ibmsecurity.utilities.artifacts import get_registry, chunk_size
 
 logger = logging.getLogger(__name__)
 requires_model = "Appliance"
@@ -32,7 +34,8 @@ def install(isamAppliance, file, check_mode=False, force=False):
                 }],
                 {}, requires_model=requires_model)
 
-    return isamAppliance.create_return_object()
+    bytes_avoided = get_registry().skip(file, reason="fixpack is already installed")
+    return isamAppliance.create_return_object(data={'bytes_avoided': bytes_avoided})
 
 
 def rollback(isamAppliance, file, check_mode=False, force=False):
@@ -107,19 +110,36 @@ def _check(isamAppliance, fixpack):
         return False
 
 
+_fixpack_name_re = re.compile(rb'FIXPACK_NAME="(?P<fp_name>\w+)"')
+
+
+def _scan_fixpack_name(fixpack):
+    """
+    Look for FIXPACK_NAME="..." inside the fixpack file, None if not found
+    """
+    tail = b''
+    with open(fixpack, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            buf = tail + chunk
+            match_obj = _fixpack_name_re.search(buf)
+            if match_obj:
+                return match_obj.group('fp_name').decode('ascii')
+            # Keep the end of the chunk, the name may continue in the next one
+            tail = buf[-256:]
+    return None
+
+
 def _extract_fixpack_name(fixpack):
     """
     Extract fixpack name from the given fixpack
+    The name found in the binary is kept in the artifact cache, the file is only scanned again when it changes.
     """
-    import re
-
     # Look for the follwing string inside the fixpack file
     # FIXPACK_NAME="9021_IPv6_Routes_fix"
-    for s in ibmsecurity.utilities.tools.strings(fixpack):
-        match_obj = re.search(r"FIXPACK_NAME=\"(?P<fp_name>\w+)\"", s)
-        if match_obj:
-            logger.info("Fixpack name extracted from file using strings method: {0}".format(match_obj.group('fp_name')))
-            return match_obj.group('fp_name')
+    fixpack_name = get_registry().metadata(fixpack, 'fixpack_name', _scan_fixpack_name)
+    if fixpack_name:
+        logger.info("Fixpack name extracted from file: {0}".format(fixpack_name))
+        return fixpack_name
 
     # Unable to extract fixpack name from binary
     # Return fixpack name derived from the filename
@@ -1,5 +1,7 @@
 import logging
 
+from ibmsecurity.utilities.artifacts import get_registry
+
 logger = logging.getLogger(__name__)
 # URI for this module
 uri = "/iam/access/v8/geolocation-db"
@@ -33,13 +35,19 @@ def cancel(isamAppliance, check_mode=False, force=False):
 def upload(isamAppliance, file=None, check_mode=False, force=False):
     """
     Load new geolocation database
+    The appliance does not report which database it loaded, so the upload is always done. A file with the same
+    contents as a database loaded from this host before only gets a warning.
     """
     warnings = ["No idempotency check for this function."]
+    registry = get_registry()
+    target = "{0}:geolocation-db".format(isamAppliance.hostname)
+    if registry.uploaded(file, target) is not None:
+        warnings.append("The same geolocation database was loaded from this host before.")
 
     if check_mode is True:
         return isamAppliance.create_return_object(changed=True, warnings=warnings)
     else:
-        return isamAppliance.invoke_post_files(
+        ret_obj = isamAppliance.invoke_post_files(
             "Load new geolocation database", uri,
             [
                 {
@@ -49,3 +57,6 @@ def upload(isamAppliance, file=None, check_mode=False, force=False):
                 }
             ],
             {}, warnings=warnings, requires_modules=requires_modules, requires_version=requires_version)
+        if ret_obj['rc'] == 0:
+            registry.record_upload(file, target)
+        return ret_obj
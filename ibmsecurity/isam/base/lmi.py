@@ -1,6 +1,6 @@
 import logging
-import time
-from ibmsecurity.appliance.ibmappliance import IBMError
+from functools import partial
+from ibmsecurity.appliance.ibmappliance import IBMError, IBMResponse
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +9,8 @@ def restart(isamAppliance, check_mode=False, force=False):
     """
     Restart LMI
     """
+    if isamAppliance.changeset is not None:
+        return isamAppliance.changeset.restart_lmi()
     if check_mode is True:
         return isamAppliance.create_return_object(changed=True)
     else:
@@ -28,7 +30,7 @@ def await_startup(isamAppliance, wait_time=300, check_freq=5, start_time=None, c
     Wait for appliance to bootup or LMI to restart
     Checking lmi responding is best option from REST API perspective
 
-    # Frequency (in seconds) when routine will check if server is up
+    # Maximum time (in seconds) between checks if server is up, checks start more frequent and back off
     # check_freq (seconds)
 
     # Ideally start_time should be taken before restart request is send to LMI
@@ -44,31 +46,54 @@ def await_startup(isamAppliance, wait_time=300, check_freq=5, start_time=None, c
         ret_obj = get(isamAppliance)
         start_time = ret_obj['data'][0]['start_time']
 
-    sec = 0
-    warnings = []
+    ret_obj = await_startup_all([isamAppliance], wait_time=wait_time, check_freq=check_freq,
+                                start_times={isamAppliance.hostname: start_time})
+    return isamAppliance.create_return_object(warnings=ret_obj['warnings'])
 
-    # Now check if it is up and running
-    while 1:
-        ret_obj = get(isamAppliance)
 
-        if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and 'start_time' in \
-                ret_obj['data'][0] and ret_obj['data'][0]['start_time'] != start_time:
-            logger.info("Server is responding and has a different start time!")
-            return isamAppliance.create_return_object(warnings=warnings)
-        else:
-            time.sleep(check_freq)
-            sec += check_freq
-            logger.debug(
-                "Server is not responding yet. Waited for {0} secs, next check in {1} secs.".format(sec, check_freq))
+def await_startup_all(isamAppliances, wait_time=300, check_freq=5, start_times=None, check_mode=False,
+                      force=False):
+    """
+    Wait for the LMI of multiple appliances to restart, from a single thread
+
+    :param start_times: dict of hostname: start_time of the LMI before the restart (current start time if missing)
+    :return: data contains the seconds until each appliance was ready (None if not ready within wait_time)
+    """
+    from ibmsecurity.utilities.waiter import Waiter
+
+    if start_times is None:
+        start_times = {}
+    waiter = Waiter(wait_time=wait_time, max_delay=check_freq)
+    for isamAppliance in isamAppliances:
+        start_time = start_times.get(isamAppliance.hostname, None)
+        if start_time is None:
+            start_time = get(isamAppliance)['data'][0]['start_time']
+        waiter.add_appliance(isamAppliance, partial(_started_since, isamAppliance, start_time))
+
+    results = waiter.wait()
+    warnings = []
+    for hostname, elapsed in results.items():
+        if elapsed is None:
+            warnings.append("The LMI restart of {0} not detected or completed, exiting... after {1} seconds".format(
+                hostname, wait_time))
+    return IBMResponse({'rc': 0, 'data': results, 'changed': False, 'warnings': warnings, 'status_code': 0})
 
-        if sec >= wait_time:
-            warnings.append("The LMI restart not detected or completed, exiting... after {0} seconds".format(sec))
-            break
 
-    return isamAppliance.create_return_object(warnings=warnings)
+def _started_since(isamAppliance, start_time):
+    """
+    Check if the LMI responds and has a different start time
+    """
+    ret_obj = get(isamAppliance)
+    if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and 'start_time' in \
+            ret_obj['data'][0] and ret_obj['data'][0]['start_time'] != start_time:
+        logger.info("Server is responding and has a different start time!")
+        return True
+    return False
 
 
 def restart_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=False, force=False):
+    if isamAppliance.changeset is not None:
+        return isamAppliance.changeset.restart_lmi()
     ret_obj = get(isamAppliance)
     _start_time = ret_obj['data'][0]['start_time']
 
@@ -76,3 +101,19 @@ def restart_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=Fals
 
     return await_startup(isamAppliance, wait_time=wait_time, check_freq=check_freq, start_time=_start_time,
                          check_mode=False, force=False)
+
+
+def restart_and_wait_all(isamAppliances, wait_time=300, check_freq=5, check_mode=False, force=False):
+    """
+    Restart the LMI of multiple appliances, and wait until they all responded with a new start time
+    """
+    if check_mode is True:
+        return IBMResponse({'rc': 0, 'data': {}, 'changed': True, 'warnings': [], 'status_code': 0})
+    start_times = {}
+    for isamAppliance in isamAppliances:
+        start_times[isamAppliance.hostname] = get(isamAppliance)['data'][0]['start_time']
+        restart(isamAppliance, check_mode, force)
+
+    ret_obj = await_startup_all(isamAppliances, wait_time=wait_time, check_freq=check_freq, start_times=start_times)
+    ret_obj['changed'] = True
+    return ret_obj
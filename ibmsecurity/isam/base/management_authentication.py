@@ -124,7 +124,7 @@ def test(isamAppliance, userid, password, check_mode=False, force=False):
                                            {
                                             'user': userid,
                                             'password': password
-                                           }
+                                           }, pending_change=False
                                        )
     ret_obj['changed'] = False
 
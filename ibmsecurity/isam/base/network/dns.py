@@ -72,7 +72,7 @@ def test(isamAppliance, host, server=None, force=False, check_mode=False):
                                         {
                                             'host': host,
                                             'server': server
-                                        }, requires_model=requires_model)
+                                        }, requires_model=requires_model, pending_change=False)
     # HTTP POST calls get flagged as changes - but DNS lookup changes nothing so override
     if ret_obj['changed'] is True:
         ret_obj['changed'] = False
@@ -58,7 +58,7 @@ def connect(isamAppliance, server, port, ssl=True, timeout=60, key=None, showcer
 
     ret_obj = isamAppliance.invoke_post("Run Connect Test", uri, json_data, requires_modules=requires_modules,
                                         requires_version=requires_version, requires_model=requires_model,
-                                        ignore_error=True)
+                                        ignore_error=True, pending_change=False)
     # HTTP POST calls get flagged as changes - but test connection changes nothing so override
     if ret_obj['changed'] is True:
         ret_obj['changed'] = False
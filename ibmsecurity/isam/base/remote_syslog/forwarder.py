@@ -152,7 +152,7 @@ def set(isamAppliance, server, port, protocol='udp', debug=False, keyfile=None,
     return isamAppliance.create_return_object(warnings=warnings)
 
 
-def _update_forwarder_policy(isamAppliance, json_to_post, warnings=[]):
+def _update_forwarder_policy(isamAppliance, json_to_post, warnings=None):
     return isamAppliance.invoke_put(
         "Update the current remote syslog forwarding policy", uri,
         json_to_post, requires_modules=requires_modules,
@@ -21,6 +21,9 @@ def execute(isamAppliance, operation="restart", check_mode=False, force=False):
     """
     Execute an operation (start, stop or restart) on runtime
     """
+    if operation == "restart" and force is False and isamAppliance.changeset is not None:
+        return isamAppliance.changeset.restart_runtime()
+
     check_value, warnings = _check(isamAppliance,operation)
 
     # Reload function is new to ISAM v9.0.2.0
@@ -1,6 +1,8 @@
 import logging
 import ibmsecurity.utilities.tools
 import os.path
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +86,13 @@ def _check(isamAppliance, comment='', id=None):
     return False
 
 
+def _existing_ids(isamAppliance):
+    """
+    Ids of all snapshots, from a single listing
+    """
+    return set(snaps['id'] for snaps in get(isamAppliance)['data'])
+
+
 def delete(isamAppliance, id=None, comment=None, check_mode=False, force=False):
     """
     Delete snapshot(s) - check id before processing comment. id can be a list
@@ -91,8 +100,9 @@ def delete(isamAppliance, id=None, comment=None, check_mode=False, force=False):
     ids = []
     delete_flag = False
     if (isinstance(id, list)):
+        existing_ids = _existing_ids(isamAppliance)
         for i in id:
-            if _check(isamAppliance, id=i) is True:
+            if i in existing_ids:
                 delete_flag = True
                 ids.append(i)
     elif (_check(isamAppliance, id=id) is True):
@@ -113,10 +123,11 @@ def delete(isamAppliance, id=None, comment=None, check_mode=False, force=False):
 
     return isamAppliance.create_return_object()
 
-def multi_delete(isamAppliance, ids=[], comment=None, check_mode=False, force=False):
+def multi_delete(isamAppliance, ids=None, comment=None, check_mode=False, force=False):
     """
     Delete multiple snapshots based on id or comment
     """
+    ids = [] if ids is None else list(ids)
     if comment != None:
       ret_obj = search(isamAppliance, comment=comment)
       if ret_obj['data'] == {}:
@@ -189,8 +200,9 @@ def download(isamAppliance, filename, id=None, comment=None, check_mode=False, f
     ids = []
     download_flag = False
     if (isinstance(id, list)):
+        existing_ids = _existing_ids(isamAppliance)
         for i in id:
-            if _check(isamAppliance, id=i) is True:
+            if i in existing_ids:
                 download_flag = True
                 ids.append(i)
     elif (_check(isamAppliance, id=id) is True):
@@ -272,6 +284,164 @@ def upload(isamAppliance, file, comment=None, check_mode=False, force=False):
     return isamAppliance.create_return_object()
 
 
+def _created(snapshot):
+    """
+    Creation time (epoch seconds) of a snapshot, None if not known
+    """
+    created = snapshot.get('created_on', snapshot.get('created', None))
+    try:
+        created = float(created)
+    except (TypeError, ValueError):
+        return None
+    if created > 1e11:  # milliseconds
+        created = created / 1000
+    return created
+
+
+def retention_plan(snapshots, keep=None, max_age=None, comment_pattern=None, now=None):
+    """
+    Split a snapshot listing in the snapshots to keep and the snapshots to delete
+
+    Only snapshots with a comment matching comment_pattern (a regular expression, None for all) are subject to
+    the policy. The newest keep snapshots are always kept. Of the others, the ones older than max_age days are
+    deleted (all of them if max_age is None). If neither keep nor max_age is set, nothing is deleted.
+
+    :param snapshots: the data of get()
+    :return: tuple of the lists of snapshots to keep and to delete
+    """
+    if keep is None and max_age is None:
+        return list(snapshots), []
+    if now is None:
+        now = time.time()
+    pattern = re.compile(comment_pattern) if comment_pattern is not None else None
+
+    to_keep = []
+    to_delete = []
+    kept = 0
+    # lowest index is the latest snapshot
+    for snaps in sorted(snapshots, key=lambda snap: snap['index']):
+        if pattern is not None and pattern.search(snaps.get('comment', '') or '') is None:
+            to_keep.append(snaps)
+            continue
+        if keep is not None and kept < keep:
+            kept += 1
+            to_keep.append(snaps)
+            continue
+        created = _created(snaps)
+        if max_age is None or (created is not None and now - created > max_age * 86400):
+            to_delete.append(snaps)
+        else:
+            to_keep.append(snaps)
+    return to_keep, to_delete
+
+
+def apply_retention(isamAppliance, keep=None, max_age=None, comment_pattern=None, offload_dir=None, max_workers=4,
+                    check_mode=False, force=False):
+    """
+    Delete the snapshots that are not retained by the policy (see retention_plan), in one request
+
+    The plan is made from a single listing. With offload_dir, the snapshots are downloaded there first (see offload)
+    and only the ones that were downloaded are deleted.
+
+    :return: data contains the ids of the kept and deleted snapshots
+    """
+    ret_obj = get(isamAppliance)
+    to_keep, to_delete = retention_plan(ret_obj['data'], keep=keep, max_age=max_age,
+                                        comment_pattern=comment_pattern)
+    warnings = []
+    ids = [snaps['id'] for snaps in to_delete]
+    data = {'kept': [snaps['id'] for snaps in to_keep], 'deleted': ids}
+
+    if not ids:
+        return isamAppliance.create_return_object(data=data)
+    if check_mode is True:
+        return isamAppliance.create_return_object(changed=True, data=data)
+
+    if offload_dir is not None:
+        ret_obj = offload(isamAppliance, offload_dir, ids=ids, max_workers=max_workers, snapshots=ret_obj['data'])
+        warnings.extend(ret_obj['warnings'])
+        stored = set(ret_obj['data']['downloaded']) | set(ret_obj['data']['skipped'])
+        ids = [i for i in ids if i in stored]
+        data['deleted'] = ids
+        if not ids:
+            return isamAppliance.create_return_object(data=data, warnings=warnings)
+
+    logger.info("Deleting the following list of IDs: {}".format(ids))
+    ret_obj = isamAppliance.invoke_delete("Deleting snapshots not retained by the policy",
+                                          "/snapshots/multi_destroy?record_ids=" + ",".join(ids))
+    warnings.extend(ret_obj['warnings'])
+    return isamAppliance.create_return_object(changed=True, data=data, warnings=warnings)
+
+
+def offload(isamAppliances, target_dir, ids=None, comment=None, max_workers=4, snapshots=None, check_mode=False,
+            force=False):
+    """
+    Download snapshots of one or more appliances to target_dir/<hostname>/<snapshot filename>
+
+    Every appliance is listed once. Snapshots that are already in target_dir are skipped (unless force is True),
+    the others are downloaded concurrently, streamed to a temporary file that is renamed when complete.
+
+    :param ids: only these snapshot ids (None for all)
+    :param comment: only snapshots with this string in the comment
+    :param snapshots: listing of the appliance, when already retrieved (single appliance only)
+    :return: data contains the ids (for a single appliance) or hostname/id of the downloaded and skipped snapshots
+    """
+    from ibmsecurity.utilities.parallel import bounded_map
+
+    single = not isinstance(isamAppliances, list)
+    if single:
+        isamAppliances = [isamAppliances]
+
+    if snapshots is not None and single:
+        listings = [(isamAppliances[0], snapshots)]
+    else:
+        listings = [(isamAppliance, ret_obj['data']) for isamAppliance, ret_obj in
+                    bounded_map(get, isamAppliances, max_workers=max_workers)]
+
+    to_download = []
+    skipped = []
+    for isamAppliance, listing in listings:
+        for snaps in listing:
+            if ids is not None and snaps['id'] not in ids:
+                continue
+            if comment is not None and comment not in (snaps.get('comment', '') or ''):
+                continue
+            filename = os.path.join(target_dir, isamAppliance.hostname, snaps['filename'])
+            key = snaps['id'] if single else "{0}/{1}".format(isamAppliance.hostname, snaps['id'])
+            if force is False and os.path.exists(filename):
+                skipped.append(key)
+            else:
+                to_download.append((isamAppliance, snaps['id'], filename, key))
+
+    if check_mode is True:
+        return isamAppliances[0].create_return_object(changed=to_download != [], data={
+            'downloaded': [key for _a, _i, _f, key in to_download], 'skipped': skipped})
+
+    def _download(item):
+        isamAppliance, id, filename, _key = item
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Download to a temporary name, an interrupted download is never taken for an offloaded snapshot
+        tmp_filename = filename + ".part"
+        ret_obj = isamAppliance.invoke_get_file("Downloading snapshot", "/snapshots/download?record_ids=" + id,
+                                                tmp_filename, ignore_error=True)
+        if ret_obj['rc'] != 0 or not os.path.exists(tmp_filename):
+            return False
+        os.replace(tmp_filename, filename)
+        return True
+
+    warnings = []
+    downloaded = []
+    for (_isamAppliance, _id, _filename, key), ok in bounded_map(_download, to_download, max_workers=max_workers,
+                                                                 ordered=False):
+        if ok:
+            downloaded.append(key)
+        else:
+            warnings.append("Downloading snapshot {0} failed.".format(key))
+
+    return isamAppliances[0].create_return_object(changed=downloaded != [], warnings=warnings,
+                                                  data={'downloaded': downloaded, 'skipped': skipped})
+
+
 def compare(isamAppliance1, isamAppliance2):
     """
     Compare list of snapshots between 2 appliances
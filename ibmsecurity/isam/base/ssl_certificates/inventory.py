@@ -0,0 +1,199 @@
+"""
+Inventory of the personal and signer certificates in all certificate databases of a fleet of appliances
+
+    inventory = CertificateInventory('cert_inventory.json')
+    inventory.scan([isamAppliance1, isamAppliance2])
+    for cert in inventory.expiring(days=30):
+        print(cert['hostname'], cert['kdb_id'], cert['label'], cert['notafter'])
+    inventory.save()
+
+Certificate databases of all appliances are listed concurrently. A digest of every certificate listing is kept, so a
+re-scan only retrieves the certificates (for the fingerprint) of databases whose listing changed.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import time
+
+import ibmsecurity.isam.base.ssl_certificates.certificate_databases
+import ibmsecurity.isam.base.ssl_certificates.personal_certificate
+import ibmsecurity.isam.base.ssl_certificates.signer_certificate
+from ibmsecurity.utilities.parallel import bounded_map
+from ibmsecurity.utilities.tools import cert_fingerprints
+
+logger = logging.getLogger(__name__)
+
+cert_modules = {
+    'personal': ibmsecurity.isam.base.ssl_certificates.personal_certificate,
+    'signer': ibmsecurity.isam.base.ssl_certificates.signer_certificate
+}
+metadata_fields = ('subject', 'issuer', 'notbefore', 'notafter', 'notafter_epoch')
+
+
+def _listing_digest(listing):
+    return hashlib.sha256(json.dumps(listing, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CertificateInventory(object):
+    """
+    Certificate metadata (label, subject, issuer, notafter, fingerprint) per appliance, database and type, with an
+    index sorted on expiry
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        # "hostname/kdb_id/type": {'digest': ..., 'certs': {label: metadata}}
+        self.databases = {}
+        self.updated = None
+        self._expiry = None
+        if filename is not None and os.path.exists(filename):
+            with open(filename, 'r') as f:
+                data = json.load(f)
+            self.databases = data.get('databases', {})
+            self.updated = data.get('updated', None)
+
+    def scan(self, isamAppliances, fingerprints=True, max_workers=8):
+        """
+        Scan the certificate databases of the appliances, and update the inventory
+
+        :param fingerprints: retrieve every new or changed certificate to calculate its fingerprint
+        :return: dict with the number of databases scanned, changed and removed, and certificates retrieved
+        """
+        summary = {'databases': 0, 'changed': 0, 'removed': 0, 'retrieved': 0}
+        scanned = set()
+
+        # All certificate databases of all appliances
+        kdbs = []
+        for isamAppliance, ret_obj in bounded_map(
+                ibmsecurity.isam.base.ssl_certificates.certificate_databases.get_all, isamAppliances,
+                max_workers=max_workers):
+            for kdb in ret_obj['data']:
+                for cert_type in cert_modules:
+                    kdbs.append((isamAppliance, kdb['id'], cert_type))
+            scanned.update(key for key in self.databases if key.split('/', 1)[0] == isamAppliance.hostname)
+
+        # Certificate listings, only databases with a different listing are updated
+        to_retrieve = []
+        for (isamAppliance, kdb_id, cert_type), ret_obj in bounded_map(
+                lambda _kdb: cert_modules[_kdb[2]].get_all(_kdb[0], _kdb[1]), kdbs, max_workers=max_workers):
+            key = "{0}/{1}/{2}".format(isamAppliance.hostname, kdb_id, cert_type)
+            scanned.discard(key)
+            summary['databases'] += 1
+            listing = ret_obj['data'] if isinstance(ret_obj['data'], list) else []
+            digest = _listing_digest(listing)
+            previous = self.databases.get(key, {'digest': None, 'certs': {}})
+            if previous['digest'] == digest:
+                continue
+            summary['changed'] += 1
+            certs = {}
+            for cert in listing:
+                label = cert['id']
+                metadata = {'label': label}
+                for field in metadata_fields:
+                    metadata[field] = cert.get(field, None)
+                old = previous['certs'].get(label, None)
+                if old is not None and all(old.get(field) == metadata[field] for field in metadata_fields):
+                    metadata['fingerprint'] = old.get('fingerprint', None)
+                else:
+                    metadata['fingerprint'] = None
+                if fingerprints and metadata['fingerprint'] is None:
+                    to_retrieve.append((isamAppliance, kdb_id, cert_type, key, label))
+                certs[label] = metadata
+            self.databases[key] = {'digest': digest, 'certs': certs}
+
+        # Databases that no longer exist
+        for key in scanned:
+            del self.databases[key]
+            summary['removed'] += 1
+
+        for (_isamAppliance, _kdb_id, _cert_type, key, label), ret_obj in bounded_map(
+                lambda _c: cert_modules[_c[2]].get(_c[0], _c[1], _c[4]), to_retrieve, max_workers=max_workers):
+            contents = ret_obj['data'].get('contents', None) if isinstance(ret_obj['data'], dict) else None
+            if contents:
+                self.databases[key]['certs'][label]['fingerprint'] = cert_fingerprints(contents)[0]
+            summary['retrieved'] += 1
+
+        self._expiry = None
+        self.updated = time.time()
+        logger.info("Scanned {databases} certificate listings: {changed} changed, {removed} removed, "
+                    "{retrieved} certificates retrieved".format(**summary))
+        return summary
+
+    def certificates(self):
+        """
+        Generator with the metadata of all certificates, with hostname, kdb_id and type added
+        """
+        for key, database in self.databases.items():
+            hostname, kdb_id, cert_type = key.rsplit('/', 2)
+            for metadata in database['certs'].values():
+                cert = dict(metadata)
+                cert.update({'hostname': hostname, 'kdb_id': kdb_id, 'type': cert_type})
+                yield cert
+
+    def _expiry_index(self):
+        if self._expiry is None:
+            index = []
+            for cert in self.certificates():
+                try:
+                    index.append((int(cert['notafter_epoch']), cert['hostname'], cert['kdb_id'], cert['type'],
+                                  cert['label']))
+                except (TypeError, ValueError):
+                    logger.debug("No expiry for {0} in {1}".format(cert['label'], cert['kdb_id']))
+            index.sort()
+            self._expiry = index
+        return self._expiry
+
+    def expiring(self, days=30, now=None):
+        """
+        Certificates that expire within days (including the ones that expired already), soonest first
+        """
+        if now is None:
+            now = time.time()
+        index = self._expiry_index()
+        end = bisect.bisect_right(index, (now + days * 86400, chr(0x10ffff)))
+        return [self.get(hostname, kdb_id, cert_type, label)
+                for _epoch, hostname, kdb_id, cert_type, label in index[:end]]
+
+    def expired(self, now=None):
+        return self.expiring(days=0, now=now)
+
+    def get(self, hostname, kdb_id, cert_type, label):
+        metadata = self.databases["{0}/{1}/{2}".format(hostname, kdb_id, cert_type)]['certs'][label]
+        cert = dict(metadata)
+        cert.update({'hostname': hostname, 'kdb_id': kdb_id, 'type': cert_type})
+        return cert
+
+    def find_fingerprint(self, fingerprint):
+        """
+        All places where a certificate is stored
+        """
+        return [cert for cert in self.certificates() if cert.get('fingerprint') == fingerprint]
+
+    def save(self, filename=None):
+        if filename is None:
+            filename = self.filename
+        # Write to a temporary file first, so a crash never leaves a truncated inventory
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump({'updated': self.updated, 'databases': self.databases}, f)
+        os.replace(tmp_filename, filename)
+
+
+def get_expiring(isamAppliances, days=30, filename=None, max_workers=8, check_mode=False, force=False):
+    """
+    Certificates in any certificate database of the appliances that expire within days
+    When filename is given, the inventory is kept in that file and a re-scan only retrieves what changed.
+    """
+    if not isinstance(isamAppliances, list):
+        isamAppliances = [isamAppliances]
+    inventory = CertificateInventory(filename)
+    summary = inventory.scan(isamAppliances, max_workers=max_workers)
+    if filename is not None:
+        inventory.save()
+    certs = inventory.expiring(days=days)
+    warnings = []
+    if certs:
+        warnings.append("{0} certificates expire within {1} days.".format(len(certs), days))
+    return isamAppliances[0].create_return_object(data={'certificates': certs, 'scan': summary}, warnings=warnings)
@@ -5,7 +5,6 @@ from io import open
 
 logger = logging.getLogger(__name__)
 
-
 def get_all(isamAppliance, kdb_id, check_mode=False, force=False):
     """
     Retrieving personal certificate names and details in a certificate database
@@ -22,6 +21,18 @@ def get(isamAppliance, kdb_id, cert_id, check_mode=False, force=False):
                                     "/isam/ssl_certificates/{0}/personal_cert/{1}".format(kdb_id, cert_id))
 
 
+def get_fingerprint(isamAppliance, kdb_id, cert):
+    """
+    SHA-256 fingerprint of a personal certificate, cert is its entry in get_all.
+    The certificate is only retrieved the first time, also by later processes (see get_cert_fingerprint_cache), as
+    long as its label, validity and serial number do not change.
+    """
+    return ibmsecurity.utilities.tools.get_cert_fingerprint_cache().get(
+        ibmsecurity.utilities.tools.cert_entry_key('personal', isamAppliance.hostname, kdb_id, cert),
+        lambda: ibmsecurity.utilities.tools.cert_fingerprints(
+            get(isamAppliance, kdb_id, cert['id'])['data']['contents'])[0])
+
+
 def generate(isamAppliance, kdb_id, label, dn, expire='365', default='no', size='1024', signature_algorithm='',
              check_mode=False, force=False):
     """
@@ -143,8 +154,11 @@ def export_cert(isamAppliance, kdb_id, cert_id, filename, check_mode=False, forc
 def import_cert(isamAppliance, kdb_id, label, cert, password=None, check_mode=False, force=False):
     """
     Importing a personal certificate into a certificate database
+    Nothing is imported if the label exists. When the cryptography package is installed, a warning is returned
+    if the certificate with the label is not the one in the PKCS#12 file (use force to import it anyway).
     """
-    if force is True or _check(isamAppliance, kdb_id, label) is False:
+    warnings = []
+    if force is True or _check_import(isamAppliance, kdb_id, label, cert, password, warnings) is False:
         if check_mode is True:
             return isamAppliance.create_return_object(changed=True)
         else:
@@ -163,7 +177,7 @@ def import_cert(isamAppliance, kdb_id, label, cert, password=None, check_mode=Fa
                     'operation': 'import'
                 })
 
-    return isamAppliance.create_return_object()
+    return isamAppliance.create_return_object(warnings=warnings)
 
 
 def extract_cert(isamAppliance, kdb_id, cert_id, password, filename, check_mode=False, force=False):
@@ -181,7 +195,7 @@ def extract_cert(isamAppliance, kdb_id, cert_id, password, filename, check_mode=
                     'operation': 'extract',
                     'type': 'pkcs12',
                     'password': password
-                })
+                }, pending_change=False)
             extracted_file = open(filename, 'wb')
             extracted_file.write(ret_obj['data'])
             extracted_file.close()
@@ -189,6 +203,23 @@ def extract_cert(isamAppliance, kdb_id, cert_id, password, filename, check_mode=
     return isamAppliance.create_return_object()
 
 
+def _check_import(isamAppliance, kdb_id, label, filename, password, warnings):
+    """
+    Check if the label already exists in the certificate database, and compare its certificate with the one in
+    filename (only that certificate is retrieved)
+    """
+    ret_obj = get_all(isamAppliance, kdb_id)
+    for cert in ret_obj['data']:
+        if cert['id'] == label:
+            fingerprints = ibmsecurity.utilities.tools.cert_file_fingerprints(filename, password)
+            if fingerprints and get_fingerprint(isamAppliance, kdb_id, cert) != fingerprints[0]:
+                warnings.append("Label {0} already exists in {1} with another certificate, nothing imported."
+                                .format(label, kdb_id))
+            return True
+
+    return False
+
+
 def _check(isamAppliance, kdb_id, cert_id):
     """
     Check if personal certificate already exists in certificate database
@@ -1,11 +1,10 @@
 import logging
 import os.path
-from ibmsecurity.utilities.tools import files_same, get_random_temp_dir, version_compare
-import shutil
+from ibmsecurity.utilities.tools import cert_entry_key, cert_fingerprints, cert_file_fingerprints, \
+    get_cert_fingerprint_cache, version_compare
 
 logger = logging.getLogger(__name__)
 
-
 def get_all(isamAppliance, kdb_id, check_mode=False, force=False):
     """
     Retrieving signer certificate names and details in a certificate database
@@ -22,6 +21,17 @@ def get(isamAppliance, kdb_id, cert_id, check_mode=False, force=False):
                                     "/isam/ssl_certificates/{0}/signer_cert/{1}".format(kdb_id, cert_id))
 
 
+def get_fingerprint(isamAppliance, kdb_id, cert):
+    """
+    SHA-256 fingerprint of a signer certificate, cert is its entry in get_all.
+    The certificate is only retrieved the first time, also by later processes (see get_cert_fingerprint_cache), as
+    long as its label, validity and serial number do not change.
+    """
+    return get_cert_fingerprint_cache().get(
+        cert_entry_key('signer', isamAppliance.hostname, kdb_id, cert),
+        lambda: cert_fingerprints(get(isamAppliance, kdb_id, cert['id'])['data']['contents'])[0])
+
+
 def load(isamAppliance, kdb_id, label, server, port, check_remote=False, check_mode=False, force=False):
     """
     Load a certificate from a server
@@ -78,33 +88,35 @@ def _check_load(isamAppliance, kdb_id, label, server, port):
     """
     import ssl
     remote_cert_pem = ssl.get_server_certificate((server, port))
+    remote_fingerprint = cert_fingerprints(remote_cert_pem)[0]
 
-    # Look for remote_cert_pem on in the signer certs on the appliance
+    # The certificate with the label first, the others are only retrieved when the label does not exist
     ret_obj = get_all(isamAppliance, kdb_id)
     for cert_data in ret_obj['data']:
-        cert_id = cert_data['id']
-        cert_pem = get(isamAppliance, kdb_id, cert_id)['data']['contents']
-        if cert_id == label:  # label exists on appliance already
-            logger.debug("Comparing certificates: appliance[{0}] remote[{1}].".format(cert_pem,remote_cert_pem))
-            if cert_pem == remote_cert_pem:  # certificate data is the same
+        if cert_data['id'] == label:  # label exists on appliance already
+            fingerprint = get_fingerprint(isamAppliance, kdb_id, cert_data)
+            logger.debug("Comparing certificates: appliance[{0}] remote[{1}].".format(fingerprint, remote_fingerprint))
+            if fingerprint == remote_fingerprint:  # certificate data is the same
                 logger.debug("The certificate already exits on the appliance with the same label name and same content.")
                 return True  # both the labels and certificates match
-            else:
-                # Labels match, but the certs are different, so we need to update it.
-                # However, you cannot load a cert with the same label name onto the appliance, since you get
-                #   CTGSK2021W A duplicate certificate already exists in the database.
-                # We delete the cert from the appliance and return False to the load() function,
-                # so that we can load the new one
-                ret_obj = delete(isamAppliance, kdb_id, cert_id)
-                logger.debug("Labels match, but the certs are different, so we need to update it.")
-                return False
-        else:
-            if cert_pem == remote_cert_pem:  # cert on the appliance, but with a different name
-                logger.info(
-                    "The certifcate is already on the appliance, but it has a different label name. "
-                    "The existing label name is {label} and requested label name is {cert_id}".format(
-                        label=label, cert_id=cert_id))
-                return True
+            # Labels match, but the certs are different, so we need to update it.
+            # However, you cannot load a cert with the same label name onto the appliance, since you get
+            #   CTGSK2021W A duplicate certificate already exists in the database.
+            # We delete the cert from the appliance and return False to the load() function,
+            # so that we can load the new one
+            delete(isamAppliance, kdb_id, label)
+            logger.debug("Labels match, but the certs are different, so we need to update it.")
+            return False
+
+    for cert_data in ret_obj['data']:
+        cert_id = cert_data['id']
+        if get_fingerprint(isamAppliance, kdb_id, cert_data) == remote_fingerprint:
+            # cert on the appliance, but with a different name
+            logger.info(
+                "The certifcate is already on the appliance, but it has a different label name. "
+                "The existing label name is {label} and requested label name is {cert_id}".format(
+                    label=label, cert_id=cert_id))
+            return True
     return False
 
 
@@ -201,27 +213,22 @@ def _check(isamAppliance, kdb_id, cert_id):
 def _check_import(isamAppliance, kdb_id, cert_id, filename, check_mode=False):
     """
     Checks if certificate on the Appliance  exists and if so, whether it is different from
-    the one stored in filename
-    """
-    tmpdir = get_random_temp_dir()
-    orig_filename = '%s.cer' % cert_id
-    tmp_original_file = os.path.join(tmpdir, os.path.basename(orig_filename))
-    if _check(isamAppliance, kdb_id, cert_id):
-        export_cert(isamAppliance, kdb_id, cert_id, tmp_original_file, check_mode=False, force=True)
-        logger.debug("file already exists on appliance")
-        if files_same(tmp_original_file, filename):
-            logger.debug("files are the same, so we don't want to do anything")
-            shutil.rmtree(tmpdir)
-            return False
-        else:
-            logger.debug("files are different, so we delete existing file in preparation for import")
-            delete(isamAppliance, kdb_id, cert_id, check_mode=check_mode, force=True)
-            shutil.rmtree(tmpdir)
-            return True
-    else:
-        logger.debug("file does not exist on appliance, so we'll want to import")
-        shutil.rmtree(tmpdir)
-        return True
+    the one stored in filename (by comparing the SHA-256 fingerprints of the certificates)
+    """
+    ret_obj = get_all(isamAppliance, kdb_id)
+    for cert in ret_obj['data']:
+        if cert['id'] == cert_id:
+            logger.debug("certificate already exists on appliance")
+            if get_fingerprint(isamAppliance, kdb_id, cert) == cert_file_fingerprints(filename)[0]:
+                logger.debug("certificates are the same, so we don't want to do anything")
+                return False
+            else:
+                logger.debug("certificates are different, so we delete existing certificate in preparation for import")
+                delete(isamAppliance, kdb_id, cert_id, check_mode=check_mode, force=True)
+                return True
+
+    logger.debug("certificate does not exist on appliance, so we'll want to import")
+    return True
 
 
 def compare(isamAppliance1, isamAppliance2, kdb_id):
@@ -0,0 +1,157 @@
+"""
+Run a list of steps (host, method, options) against many appliances
+
+    steps = ibmsecurity.isam.batch.load_steps('steps.yml')
+    results = ibmsecurity.isam.batch.run(steps, commit=True)
+
+A steps file is JSON or YAML (YAML needs PyYAML):
+
+    hosts:
+      isam1.example.com: {username: admin@local, password: secret, lmi_port: 443}
+    steps:
+      - host: isam1.example.com
+        method: ibmsecurity.isam.web.reverse_proxy.junctions.get_all
+        options: {reverseproxy_id: default}
+
+A plain list of steps is also accepted. There is one appliance object per host, so its session (and connections)
+and facts are reused by all steps of the host. Hosts run in parallel, the steps of a host run in order and the
+remaining steps of a host are skipped after a step fails. With commit, the steps of a host run in a ChangeSet:
+commits and restarts requested by the steps are done once at the end, and nothing is committed when a step fails.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from ibmsecurity.isam.changeset import ChangeSet
+from ibmsecurity.utilities.method_registry import MethodRegistry
+from ibmsecurity.utilities.parallel import bounded_map
+
+logger = logging.getLogger(__name__)
+
+
+def load_steps(filename):
+    """
+    Hosts and steps from a JSON or YAML file
+
+    :return: (dict of host settings, list of steps)
+    """
+    with open(filename, 'r') as f:
+        if filename.endswith(('.yml', '.yaml')):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, list):
+        return {}, data
+    return data.get('hosts', None) or {}, data.get('steps', None) or []
+
+
+def default_appliance(hostname, username='admin@local', password='admin', lmi_port=443, **kwargs):
+    from ibmsecurity.appliance.isamappliance import ISAMAppliance
+    from ibmsecurity.user.applianceuser import ApplianceUser
+
+    return ISAMAppliance(hostname=hostname, user=ApplianceUser(username=username, password=password),
+                         lmi_port=lmi_port, **kwargs)
+
+
+class _StepFailed(Exception):
+    pass
+
+
+def _run_host(hostname, steps, registry, appliance_factory, settings, commit, check_mode):
+    results = []
+    start = time.perf_counter()
+    try:
+        isamAppliance = appliance_factory(hostname, **settings)
+    except Exception as e:
+        logger.error("Unable to connect to {0}: {1}".format(hostname, e))
+        return {'host': hostname, 'steps': [], 'commit': None, 'error': str(e),
+                'elapsed': time.perf_counter() - start}
+
+    def _steps():
+        for step in steps:
+            result = {'host': hostname, 'method': step['method'], 'changed': False, 'rc': None, 'warnings': [],
+                      'error': None}
+            step_start = time.perf_counter()
+            try:
+                options = dict(step.get('options', None) or {})
+                if check_mode and 'check_mode' in [p['name'] for p in registry.get(step['method'])['params']]:
+                    options['check_mode'] = True
+                func, kwargs = registry.bind(step['method'], options, isamAppliance=isamAppliance)
+                ret_obj = func(**kwargs)
+                result.update({'changed': ret_obj['changed'], 'rc': ret_obj['rc'], 'warnings': ret_obj['warnings'],
+                               'data': ret_obj['data']})
+            except Exception as e:
+                result['error'] = str(e)
+            result['elapsed'] = time.perf_counter() - step_start
+            results.append(result)
+            logger.info("{0} {1}: {2:.3f} secs{3}".format(hostname, step['method'], result['elapsed'],
+                                                           " FAILED" if result['error'] else ""))
+            if result['error']:
+                raise _StepFailed(result['error'])
+
+    commit_result = None
+    error = None
+    try:
+        if commit:
+            with ChangeSet(isamAppliance, check_mode=check_mode) as changes:
+                _steps()
+            commit_result = changes.result
+        else:
+            _steps()
+    except _StepFailed as e:
+        error = str(e)
+        logger.error("Remaining steps for {0} skipped, nothing committed: {1}".format(hostname, e))
+    except Exception as e:
+        # Commit or restart at the end of the change set
+        error = str(e)
+        logger.error("Commit on {0} failed: {1}".format(hostname, e))
+    return {'host': hostname, 'steps': results, 'commit': commit_result, 'error': error,
+            'elapsed': time.perf_counter() - start}
+
+
+def run(steps, hosts=None, commit=False, check_mode=False, max_workers=8, appliance_factory=default_appliance,
+        registry=None, defaults=None):
+    """
+    Run the steps, the hosts in parallel
+
+    :param steps: list of {'host': ..., 'method': ..., 'options': {...}}
+    :param hosts: settings per host (username, password, lmi_port), passed to appliance_factory
+    :param commit: commit once per host at the end (the pending changes are left alone otherwise)
+    :param appliance_factory: function(hostname, **settings) that returns the appliance object
+    :param defaults: settings for hosts that are not in hosts
+    :return: list with per host the step results (with elapsed secs), the commit result and the error if any
+    """
+    if registry is None:
+        registry = MethodRegistry.load()
+    hosts = hosts or {}
+    defaults = defaults or {}
+
+    # Check all steps before any host is touched
+    by_host = OrderedDict()
+    for step in steps:
+        registry.bind(step['method'], step.get('options', None) or {}, isamAppliance=None)
+        by_host.setdefault(step['host'], []).append(step)
+
+    def _host(hostname):
+        settings = dict(defaults)
+        settings.update(hosts.get(hostname, None) or {})
+        return _run_host(hostname, by_host[hostname], registry, appliance_factory, settings, commit, check_mode)
+
+    return [result for _hostname, result in bounded_map(_host, list(by_host), max_workers=max_workers)]
+
+
+def report(results):
+    """
+    Lines with the time of every step, slowest steps first within a host
+    """
+    lines = []
+    for host in results:
+        lines.append("{0}: {1:.3f} secs{2}".format(host['host'], host['elapsed'],
+                                                    " ERROR: {0}".format(host['error']) if host['error'] else ""))
+        for step in sorted(host['steps'], key=lambda s: s['elapsed'], reverse=True):
+            lines.append("  {0:8.3f}  {1}{2}{3}".format(step['elapsed'], step['method'],
+                                                        " (changed)" if step['changed'] else "",
+                                                        " FAILED: {0}".format(step['error']) if step['error'] else ""))
+    return lines
@@ -0,0 +1,177 @@
+import logging
+import re
+import threading
+
+from ibmsecurity.appliance.ibmappliance import IBMResponse
+
+logger = logging.getLogger(__name__)
+
+# Writes to these URIs may require a restart of a reverse proxy instance or the runtime
+_reverse_proxy_uri = re.compile(r'^/wga/reverseproxy/([^/?]+)')
+_runtime_uri = re.compile(r'^/mga/')
+
+
+class ChangeSet(object):
+    """
+    Defer commits and restarts on an appliance until the end of a with block
+
+        with ChangeSet(isamAppliance) as changes:
+            ibmsecurity.isam.web.reverse_proxy.junctions.set(isamAppliance, ...)
+            ibmsecurity.isam.appliance.commit(isamAppliance)  # deferred
+        print(changes.result)
+
+    Within the block, appliance.commit/commit_and_restart, reverse proxy instance restarts, runtime and web runtime
+    restarts and LMI restarts are only recorded. At the end there is one commit, followed by the restarts that are needed:
+    reverse proxy instances and the runtime are only restarted when the appliance reports that they need it.
+    The appliance object reports every successful PUT, DELETE and POST (except the queries sent as POST, see
+    invoke_post pending_change); after such a write the commit is done without checking for pending changes first,
+    when only a commit was requested the appliance is checked.
+    When the block raises an exception, nothing is committed; the changes stay pending on the appliance.
+    The change set applies to all calls on the appliance object, also those made from other threads.
+    """
+
+    def __init__(self, isamAppliance, check_mode=False):
+        self.isamAppliance = isamAppliance
+        self.check_mode = check_mode
+        self.changed = False
+        self.commit_requested = False
+        self.commit_and_restart_requested = False
+        self.reverse_proxies = []
+        self.runtime = False
+        self.web_runtime = False
+        self.lmi = False
+        self.nested = False
+        self.result = None
+        # The appliance object may be used from several threads, they all record in this change set
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if getattr(self.isamAppliance, 'changeset', None) is not None:
+            # Already in a change set, the outer one does the commit
+            self.nested = True
+        else:
+            self.isamAppliance.changeset = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.nested:
+            return False
+        self.isamAppliance.changeset = None
+        if exc_type is not None:
+            logger.error("Change set aborted, changes are not committed: {0}".format(exc_value))
+            return False
+        self.result = self.apply()
+        return False
+
+    def record_change(self, uri):
+        """
+        Called by the appliance for every successful write
+        """
+        m = _reverse_proxy_uri.match(uri)
+        with self._lock:
+            self.changed = True
+            if m is None and _runtime_uri.match(uri) is not None:
+                self.runtime = True
+        if m is not None:
+            self.restart_reverse_proxy(m.group(1))
+
+    def restart_reverse_proxy(self, id):
+        with self._lock:
+            if id not in self.reverse_proxies:
+                self.reverse_proxies.append(id)
+        return self._deferred("Restart of reverse proxy {0}".format(id))
+
+    def restart_runtime(self):
+        with self._lock:
+            self.runtime = True
+        return self._deferred("Restart of the runtime")
+
+    def restart_web_runtime(self):
+        with self._lock:
+            self.web_runtime = True
+        return self._deferred("Restart of the web runtime")
+
+    def restart_lmi(self):
+        with self._lock:
+            self.lmi = True
+        return self._deferred("Restart of the LMI")
+
+    def commit(self):
+        with self._lock:
+            self.commit_requested = True
+        return self._deferred("Commit")
+
+    def commit_and_restart(self):
+        with self._lock:
+            self.commit_and_restart_requested = True
+        return self._deferred("Commit and restart")
+
+    def _deferred(self, action):
+        logger.debug("{0} deferred until the end of the change set.".format(action))
+        return self.isamAppliance.create_return_object()
+
+    def apply(self):
+        """
+        Commit once and do the restarts that were recorded
+        """
+        import ibmsecurity.isam.appliance
+        import ibmsecurity.isam.base.lmi
+        import ibmsecurity.isam.base.runtime.process
+        import ibmsecurity.isam.web.reverse_proxy.instance
+        import ibmsecurity.isam.web.runtime.process
+
+        isamAppliance = self.isamAppliance
+        changed = False
+        warnings = []
+        restarted = []
+
+        if self.changed or self.commit_requested or self.commit_and_restart_requested:
+            # A recorded write left changes to commit, without one the appliance is asked for pending changes.
+            # Errors of the commit are raised either way.
+            if self.commit_and_restart_requested:
+                ret_obj = ibmsecurity.isam.appliance.commit_and_restart(isamAppliance, check_mode=self.check_mode,
+                                                                        force=self.changed)
+            else:
+                ret_obj = ibmsecurity.isam.appliance.commit(isamAppliance, check_mode=self.check_mode,
+                                                            force=self.changed)
+            changed = changed or ret_obj['changed']
+            warnings.extend(ret_obj['warnings'])
+
+        if self.reverse_proxies:
+            # Only the instances that report they need a restart, in one request
+            ret_obj = ibmsecurity.isam.web.reverse_proxy.instance.execute_multiples(
+                isamAppliance, [{'instance_name': id} for id in self.reverse_proxies], 'restart',
+                check_mode=self.check_mode)
+            if ret_obj['changed']:
+                changed = True
+                restarted.append('reverse_proxy')
+            warnings.extend(ret_obj['warnings'])
+
+        if self.runtime and 'activations' in isamAppliance.facts and \
+                [m for m in isamAppliance.facts['activations'] if m in ['mga', 'federation']]:
+            ret_obj = ibmsecurity.isam.base.runtime.process.execute(isamAppliance, operation="restart",
+                                                                    check_mode=self.check_mode)
+            if ret_obj['changed']:
+                changed = True
+                restarted.append('runtime')
+            warnings.extend(ret_obj['warnings'])
+
+        if self.web_runtime:
+            ret_obj = ibmsecurity.isam.web.runtime.process.execute(isamAppliance, operation="restart",
+                                                                   check_mode=self.check_mode)
+            if ret_obj['changed']:
+                changed = True
+                restarted.append('web_runtime')
+            warnings.extend(ret_obj['warnings'])
+
+        if self.lmi:
+            if self.check_mode:
+                changed = True
+            else:
+                ret_obj = ibmsecurity.isam.base.lmi.restart_and_wait(isamAppliance)
+                warnings.extend(ret_obj['warnings'])
+                changed = True
+            restarted.append('lmi')
+
+        return IBMResponse({'rc': 0, 'data': {'restarted': restarted, 'reverse_proxies': self.reverse_proxies},
+                            'changed': changed, 'warnings': warnings, 'status_code': 0})
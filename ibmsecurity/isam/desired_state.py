@@ -0,0 +1,277 @@
+"""
+Desired state of resources on one or more appliances, applied in dependency order
+
+    state = DesiredState()
+    state.add('instance', isamAppliance, ibmsecurity.isam.web.reverse_proxy.instance.add,
+              {'inst_name': 'default', ...})
+    state.add('junction', isamAppliance, 'ibmsecurity.isam.web.reverse_proxy.junctions.set',
+              {'reverseproxy_id': 'default', 'junction_point': '/app', ...}, depends_on=['instance'])
+    plan = state.apply(check_mode=True)    # plan only, nothing is written
+    ret_obj = state.apply()
+
+Every resource is an idempotent module function (set, add, delete, ...) with its options. The resources and their
+dependencies form a graph, a cycle or an unknown dependency is reported before anything is done.
+
+The plan calls every function with check_mode=True, in dependency order, the resources without dependencies between
+them concurrently. GET requests are cached per appliance while planning, so the get_all of a module is done once
+for all its resources. A resource that can not be checked because a dependency still has to be changed (eg. a
+junction of an instance that does not exist yet) is planned as 'pending'.
+
+Apply runs the resources that are planned to change. A resource starts as soon as its dependencies are done, with
+at most max_per_host resources running on the same appliance. When a resource fails, the resources that depend on
+it are skipped.
+"""
+import copy
+import importlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ibmsecurity.appliance.ibmappliance import IBMResponse
+from ibmsecurity.utilities.parallel import bounded_map
+
+logger = logging.getLogger(__name__)
+
+
+class _Resource(object):
+    __slots__ = ('name', 'appliance', 'func', 'options', 'depends_on')
+
+    def __init__(self, name, appliance, func, options, depends_on):
+        self.name = name
+        self.appliance = appliance
+        self.func = func
+        self.options = options
+        self.depends_on = depends_on
+
+    @property
+    def method(self):
+        return "{0}.{1}".format(self.func.__module__, self.func.__name__)
+
+    def call(self, check_mode):
+        return self.func(self.appliance, check_mode=check_mode, **self.options)
+
+
+def _resolve(func):
+    if callable(func):
+        return func
+    module_name, func_name = func.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+class cached_reads(object):
+    """
+    Cache the GET requests of an appliance object within a with block
+
+    Every caller gets its own copy of the response, callers may modify it.
+    """
+
+    def __init__(self, appliance):
+        self.appliance = appliance
+        self.cache = {}
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        invoke_get = self.appliance.invoke_get
+
+        def _cached_get(description, uri, *args, **kwargs):
+            key = repr((uri, args, sorted(kwargs.items())))
+            with self._lock:
+                ret_obj = self.cache.get(key, None)
+                if ret_obj is not None:
+                    self.hits += 1
+            if ret_obj is None:
+                ret_obj = invoke_get(description, uri, *args, **kwargs)
+                with self._lock:
+                    self.cache[key] = ret_obj
+            return copy.deepcopy(ret_obj)
+
+        # The instance attribute hides the method until it is deleted again
+        self.appliance.invoke_get = _cached_get
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        del self.appliance.invoke_get
+        return False
+
+
+class DesiredState(object):
+    """
+    Resources with their dependencies, planned and applied as a graph
+    """
+
+    def __init__(self, max_workers=8, max_per_host=4):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.resources = OrderedDict()
+
+    def add(self, name, appliance, func, options=None, depends_on=None):
+        """
+        Add a resource
+
+        :param func: idempotent function (or its full name) called as func(appliance, check_mode=..., **options)
+        :param depends_on: names of the resources that have to be applied first
+        """
+        if name in self.resources:
+            raise ValueError("Duplicate resource {0}".format(name))
+        self.resources[name] = _Resource(name, appliance, _resolve(func), dict(options or {}), list(depends_on or []))
+        return self
+
+    def levels(self):
+        """
+        Resource names in dependency order, grouped in levels: a resource only depends on resources of earlier levels
+        """
+        for resource in self.resources.values():
+            for dep in resource.depends_on:
+                if dep not in self.resources:
+                    raise ValueError("{0} depends on unknown resource {1}".format(resource.name, dep))
+        remaining = {name: set(resource.depends_on) for name, resource in self.resources.items()}
+        levels = []
+        done = set()
+        while remaining:
+            level = [name for name, deps in remaining.items() if deps <= done]
+            if not level:
+                raise ValueError("Dependency cycle between {0}".format(", ".join(sorted(remaining))))
+            for name in level:
+                del remaining[name]
+            done.update(level)
+            levels.append(level)
+        return levels
+
+    def plan(self):
+        """
+        Check every resource with check_mode=True
+
+        :return: list of dicts (name, host, method, action, warnings, level) in dependency order, action is 'change',
+                 'ok', 'pending' (depends on a change, could not be checked) or 'error'
+        """
+        levels = self.levels()
+        plan = OrderedDict()
+        appliances = {}
+        for resource in self.resources.values():
+            appliances[id(resource.appliance)] = resource.appliance
+        caches = [cached_reads(appliance) for appliance in appliances.values()]
+        for cache in caches:
+            cache.__enter__()
+        try:
+            for number, level in enumerate(levels):
+                for name, entry in bounded_map(self._check, level, max_workers=self.max_workers):
+                    entry['level'] = number
+                    plan[name] = entry
+                # A resource is pending when it could not be checked and a dependency will change
+                for name in level:
+                    entry = plan[name]
+                    if entry['action'] == 'error' and [dep for dep in self.resources[name].depends_on
+                                                       if plan[dep]['action'] in ('change', 'pending')]:
+                        entry['action'] = 'pending'
+        finally:
+            for cache in caches:
+                cache.__exit__(None, None, None)
+        logger.debug("Planned {0} resources, {1} cached reads".format(len(plan), sum(c.hits for c in caches)))
+        return list(plan.values())
+
+    def _check(self, name):
+        resource = self.resources[name]
+        entry = {'name': name, 'host': resource.appliance.hostname, 'method': resource.method, 'action': 'ok',
+                 'warnings': [], 'error': None}
+        try:
+            ret_obj = resource.call(check_mode=True)
+            entry['warnings'] = ret_obj['warnings']
+            if ret_obj['changed']:
+                entry['action'] = 'change'
+        except Exception as e:
+            entry['action'] = 'error'
+            entry['error'] = str(e)
+        return entry
+
+    def apply(self, check_mode=False):
+        """
+        Plan, and unless check_mode apply the resources that change
+
+        :return: return object, data has the plan and (when applied) per resource the result and elapsed secs
+        """
+        plan = self.plan()
+        errors = [entry for entry in plan if entry['action'] == 'error']
+        changes = [entry['name'] for entry in plan if entry['action'] in ('change', 'pending')]
+        warnings = ["{0}: {1}".format(entry['name'], entry['error']) for entry in errors]
+        data = {'plan': plan, 'applied': []}
+
+        if check_mode or errors or not changes:
+            if errors:
+                warnings.append("Nothing applied, {0} resources could not be checked.".format(len(errors)))
+            return self._return_object(data=data, warnings=warnings, changed=bool(changes) and not errors)
+
+        data['applied'] = self._apply(changes)
+        changed = False
+        for result in data['applied']:
+            changed = changed or result['changed']
+            if result['error'] is not None:
+                warnings.append("{0}: {1}".format(result['name'], result['error']))
+        return self._return_object(data=data, warnings=warnings, changed=changed)
+
+    def _apply(self, names):
+        selected = set(names)
+        waiting = {name: set(dep for dep in self.resources[name].depends_on if dep in selected) for name in names}
+        results = OrderedDict()
+        running = {}
+        per_host = {}
+
+        def _run(name):
+            resource = self.resources[name]
+            result = {'name': name, 'host': resource.appliance.hostname, 'method': resource.method, 'changed': False,
+                      'error': None}
+            start = time.perf_counter()
+            try:
+                ret_obj = resource.call(check_mode=False)
+                result['changed'] = ret_obj['changed']
+                result['warnings'] = ret_obj['warnings']
+            except Exception as e:
+                result['error'] = str(e)
+            result['elapsed'] = time.perf_counter() - start
+            return result
+
+        def _skip(name, reason):
+            results[name] = {'name': name, 'host': self.resources[name].appliance.hostname,
+                             'method': self.resources[name].method, 'changed': False, 'error': reason, 'elapsed': 0}
+            del waiting[name]
+            for other in list(waiting):
+                if other in waiting and name in self.resources[other].depends_on:
+                    _skip(other, "skipped, {0} failed".format(name))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while waiting or running:
+                # Start what is ready, within the limits
+                for name in list(waiting):
+                    if waiting.get(name) or len(running) >= self.max_workers:
+                        continue
+                    host = id(self.resources[name].appliance)
+                    if per_host.get(host, 0) >= self.max_per_host:
+                        continue
+                    per_host[host] = per_host.get(host, 0) + 1
+                    del waiting[name]
+                    running[executor.submit(_run, name)] = name
+                if not running:
+                    break
+                done, _not_done = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    per_host[id(self.resources[name].appliance)] -= 1
+                    result = future.result()
+                    results[name] = result
+                    logger.info("{0} on {1}: {2:.3f} secs{3}".format(name, result['host'], result['elapsed'],
+                                                                      " FAILED" if result['error'] else ""))
+                    for other in list(waiting):
+                        if other not in waiting:
+                            continue
+                        if result['error'] is not None and name in waiting[other]:
+                            _skip(other, "skipped, {0} failed".format(name))
+                        else:
+                            waiting[other].discard(name)
+        return list(results.values())
+
+    def _return_object(self, data, warnings, changed):
+        for resource in self.resources.values():
+            return resource.appliance.create_return_object(data=data, warnings=warnings, changed=changed)
+        return IBMResponse({'rc': 0, 'data': data, 'changed': changed, 'warnings': warnings, 'status_code': 0})
@@ -1,6 +1,7 @@
 import logging
 import json
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 from io import open
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,15 @@ def get_all(isamAppliance, count=None, start=None, filter=None, check_mode=False
                                     requires_version=requires_version)
 
 
+def iter_all(isamAppliance, filter=None, page_size=100, prefetch=2, start=None):
+    """
+    Generator with all federations, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    return iter_pages(lambda _start, _count: page_items(get_all(isamAppliance, count=_count, start=_start,
+                                                                filter=filter)),
+                      page_size=page_size, prefetch=prefetch, start=start)
+
+
 def get(isamAppliance, name, check_mode=False, force=False):
     """
     Retrieve a federation
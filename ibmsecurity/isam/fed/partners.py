@@ -1,6 +1,7 @@
 import logging
 import ibmsecurity.isam.fed.federations
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.paging import iter_pages, page_items
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,22 @@ def get_all(isamAppliance, federation_name, count=None, start=None, check_mode=F
         return _get_all(isamAppliance, fed_id, tools.create_query_string(count=count, start=start))
 
 
+def iter_all(isamAppliance, federation_name, page_size=100, prefetch=2, start=None):
+    """
+    Generator with all partners of a federation, retrieved page by page (see utilities.paging.iter_pages)
+    """
+    ret_obj = ibmsecurity.isam.fed.federations.search(isamAppliance, name=federation_name)
+    fed_id = ret_obj['data']
+
+    if fed_id == {}:
+        logger.info("Federation {0}, not found. Skipping get.".format(federation_name))
+        return iter([])
+    return iter_pages(
+        lambda _start, _count: page_items(_get_all(isamAppliance, fed_id,
+                                                   tools.create_query_string(count=_count, start=_start))),
+        page_size=page_size, prefetch=prefetch, start=start)
+
+
 def _get_all(isamAppliance, fed_id, query_str=''):
     return isamAppliance.invoke_get("Retrieve a list of partners",
                                     "{0}/{1}/partners{2}".format(uri, fed_id, query_str),
@@ -0,0 +1,3 @@
+from ibmsecurity.utilities.lazy import lazy_submodules
+
+__getattr__, __dir__ = lazy_submodules(globals())
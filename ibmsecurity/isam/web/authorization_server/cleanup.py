@@ -19,7 +19,8 @@ def get_all(isamAppliance, admin_id, admin_pwd, domain="Default", check_mode=Fal
                                          "password": admin_pwd,
                                          "domain": domain
                                      },
-                                     requires_modules=requires_modules, requires_version=requires_version)
+                                     requires_modules=requires_modules, requires_version=requires_version,
+                                     pending_change=False)
 
 
 def get(isamAppliance, isamUser, domain="Default", check_mode=False, force=False):
@@ -33,7 +34,8 @@ def get(isamAppliance, isamUser, domain="Default", check_mode=False, force=False
                                          "password": isamUser.password,
                                          "domain": domain
                                      },
-                                     requires_modules=requires_modules, requires_version=requires_version)
+                                     requires_modules=requires_modules, requires_version=requires_version,
+                                     pending_change=False)
 
 
 def delete(isamAppliance, id, isamUser, domain="Default", check_mode=False, force=False):
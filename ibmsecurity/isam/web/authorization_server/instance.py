@@ -119,7 +119,7 @@ def delete(isamAppliance, id, admin_pwd, admin_id='sec_master', check_mode=False
 
 
 def execute(isamAppliance, id, operation="restart", admin_id="sec_master", admin_pwd=None, check_mode=False,
-            force=False, warnings=[]):
+            force=False, warnings=None):
     """
     Execute an operation on runtime component
 
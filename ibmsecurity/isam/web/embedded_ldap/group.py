@@ -16,16 +16,16 @@ def get_all(isamAppliance, check_mode=False, force=False):
                                     requires_modules=requires_modules, requires_version=requires_version)
 
 
-def get(isamAppliance, id, check_mode=False, force=False):
+def get(isamAppliance, id, check_mode=False, force=False, ignore_error=False):
     """
     Retrieving details for a particular group in the registry
     """
     return isamAppliance.invoke_get("Retrieving details for a particular group in the registry",
-                                    "{0}/{1}/v1".format(uri, id),
+                                    "{0}/{1}/v1".format(uri, id), ignore_error=ignore_error,
                                     requires_modules=requires_modules, requires_version=requires_version)
 
 
-def add_user(isamAppliance, user_name, id, check_mode=False, force=False):
+def add_user(isamAppliance, user_name, id, check_mode=False, force=False, ignore_error=False):
     """
     Adding a user to a group in the registry
     """
@@ -38,7 +38,7 @@ def add_user(isamAppliance, user_name, id, check_mode=False, force=False):
                 "/mga/user_registry/users/{0}/groups/v1".format(user_name),
                 {
                     'id': id
-                },
+                }, ignore_error=ignore_error,
                 requires_modules=requires_modules, requires_version=requires_version)
 
     return isamAppliance.create_return_object()
@@ -1,4 +1,10 @@
+import csv
+import json
 import logging
+import time
+
+import ibmsecurity.isam.web.embedded_ldap.group
+from ibmsecurity.utilities.parallel import bounded_map
 
 try:
     basestring
@@ -55,6 +61,114 @@ def add(isamAppliance, id, password, groups=None, check_mode=False, force=False)
     return isamAppliance.create_return_object()
 
 
+def read_users(filename):
+    """
+    Generator with the users in a CSV file (with a header line: id,password,groups) or a JSONL file (one JSON
+    object per line). Groups in a CSV file are separated by ';'.
+    """
+    with open(filename, 'r', newline='') as f:
+        if filename.endswith('.jsonl') or filename.endswith('.json'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield row
+
+
+def add_bulk(isamAppliance, users, groups=None, max_workers=8, check_mode=False, force=False):
+    """
+    Create many users in the registry, and add them to their groups
+
+    The existing users are retrieved once. Users that do not exist are created with their groups in one request,
+    for existing users only the missing group memberships are added (all their groups with force, existing users
+    are never created again). The requests run with at most max_workers
+    at the same time, and the users are read from the iterator as requests complete, so a large input (eg.
+    read_users) is never loaded in memory.
+
+    :param users: iterable of dicts with id, password and optionally groups (a list, or a string separated by ';')
+    :param groups: groups for all users, in addition to their own groups
+    :return: return object with a summary: created, existing, memberships, failed, failures (first 100) and
+             users_per_second; a user that failed is only counted in failed
+    """
+    start = time.monotonic()
+    existing = set(obj['id'] for obj in get_all(isamAppliance)['data'])
+    members = {}
+    summary = {'created': 0, 'existing': 0, 'memberships': 0, 'failed': 0, 'failures': []}
+
+    def _members(group_id):
+        # Members of a group, retrieved once when the first existing user of that group is seen
+        if group_id not in members:
+            ret_obj = ibmsecurity.isam.web.embedded_ldap.group.get(isamAppliance, group_id, ignore_error=True)
+            if ret_obj['rc'] == 0:
+                members[group_id] = set(usr['id'] for usr in ret_obj['data'].get('users', []))
+            else:
+                members[group_id] = set()
+        return members[group_id]
+
+    def _requests():
+        # Runs in the calling thread, as bounded_map needs the next user
+        for user in users:
+            user_groups = user.get('groups', None) or []
+            if isinstance(user_groups, basestring):
+                user_groups = [grp for grp in user_groups.split(';') if grp]
+            if groups is not None:
+                user_groups = list(user_groups) + [grp for grp in groups if grp not in user_groups]
+            if user['id'] not in existing:
+                yield user['id'], False, user.get('password', None), user_groups
+            else:
+                # With force all groups are added again, without checking the members
+                if force is True:
+                    missing = user_groups
+                else:
+                    missing = [grp for grp in user_groups if user['id'] not in _members(grp)]
+                if missing:
+                    yield user['id'], True, None, missing
+                else:
+                    summary['existing'] += 1
+
+    def _send(request):
+        user_id, is_existing, password, user_groups = request
+        if check_mode is True:
+            return [0]
+        if not is_existing:
+            json_data = {"id": user_id, "password": password}
+            if user_groups:
+                json_data['groups'] = user_groups
+            return [isamAppliance.invoke_post("Creating a new user in the registry", "{0}/v1".format(uri),
+                                              json_data, ignore_error=True, requires_modules=requires_modules,
+                                              requires_version=requires_version)['rc']]
+        return [ibmsecurity.isam.web.embedded_ldap.group.add_user(isamAppliance, user_id, grp, force=True,
+                                                                  ignore_error=True)['rc']
+                for grp in user_groups]
+
+    # Every user is counted once: created, existing (also when memberships were added) or failed
+    for (user_id, is_existing, password, user_groups), rcs in bounded_map(_send, _requests(),
+                                                                          max_workers=max_workers, ordered=False):
+        if any(rc != 0 for rc in rcs):
+            summary['failed'] += 1
+            if len(summary['failures']) < 100:
+                summary['failures'].append(user_id)
+        elif is_existing:
+            summary['existing'] += 1
+            summary['memberships'] += len(user_groups)
+        else:
+            summary['created'] += 1
+
+    elapsed = time.monotonic() - start
+    total = summary['created'] + summary['existing'] + summary['failed']
+    summary['seconds'] = round(elapsed, 3)
+    summary['users_per_second'] = round(total / elapsed, 1) if elapsed > 0 else None
+    logger.info("Processed {0} users in {1:.1f} secs: {2} created, {3} existing, {4} failed".format(
+        total, elapsed, summary['created'], summary['existing'], summary['failed']))
+
+    warnings = []
+    if summary['failed']:
+        warnings.append("{0} users could not be created or added to their groups.".format(summary['failed']))
+    return isamAppliance.create_return_object(data=summary, warnings=warnings,
+                                              changed=summary['created'] + summary['memberships'] > 0)
+
+
 def delete(isamAppliance, id, check_mode=False, force=False):
     """
     Deleting a user in the registry
@@ -19,7 +19,7 @@ def test(isamAppliance, name, password, check_mode=False, force=False):
         {
             "name": name,
             "password": password
-        }, requires_modules=requires_modules, requires_version=requires_version)
+        }, requires_modules=requires_modules, requires_version=requires_version, pending_change=False)
 
     # Test will not cause a change
     if ret_obj['changed'] == True:
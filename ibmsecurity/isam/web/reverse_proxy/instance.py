@@ -1,5 +1,6 @@
 import logging
 import ibmsecurity.utilities.tools
+from ibmsecurity.appliance.ibmappliance import IBMResponse
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +142,9 @@ def execute(isamAppliance, id, operation="restart", check_mode=False, force=Fals
     :param operation:
     :return:
     """
+    if operation == "restart" and force is False and isamAppliance.changeset is not None:
+        return isamAppliance.changeset.restart_reverse_proxy(id)
+
     ret_obj = get(isamAppliance)
 
     for rp in ret_obj['data']:
@@ -172,6 +176,11 @@ def execute_multiples(isamAppliance, instances, operation, check_mode=False, for
     :param operation:
     :return:
     """
+    if operation == "restart" and force is False and isamAppliance.changeset is not None:
+        for instance in instances:
+            isamAppliance.changeset.restart_reverse_proxy(instance['instance_name'])
+        return isamAppliance.create_return_object()
+
     ret_obj = get(isamAppliance)
     new_instances = []
 
@@ -197,12 +206,103 @@ def execute_multiples(isamAppliance, instances, operation, check_mode=False, for
                                             requires_modules=requires_modules,
                                             requires_version=requires_version)
         elif len(new_instances) == 1:
-            execute(isamAppliance, new_instances[0]['instance_name'], operation=operation, check_mode=check_mode,
-                    force=force)
+            return execute(isamAppliance, new_instances[0]['instance_name'], operation=operation, check_mode=check_mode,
+                           force=force)
 
     return isamAppliance.create_return_object()
 
 
+def rolling_restart(isamAppliances, id, batch_size=1, max_unavailable=1, wait_time=300, check_freq=5,
+                    check_mode=False, force=False):
+    """
+    Restart a reverse proxy instance on a list of appliances, a batch at a time
+
+    The appliances in a batch are restarted in parallel, the next batch only starts when all instances of the
+    current batch are started again. After a failure no more appliances are restarted, also not the remaining
+    appliances of the batch (they are reported as 'cancelled').
+
+    :param isamAppliances: list of appliances
+    :param id: reverse proxy instance
+    :param batch_size: number of appliances per batch
+    :param max_unavailable: maximum number of instances that are restarting at the same time
+    :param wait_time: maximum number of seconds to wait for an instance to be started
+    :param check_freq: seconds between checks of the instance state
+    :return: data contains the result and restart duration per appliance
+    """
+    import threading
+    import time
+    from ibmsecurity.utilities.parallel import bounded_map
+
+    batch_size = max(1, batch_size)
+    concurrent = max(1, min(batch_size, max_unavailable))
+    # Set by the first failure, so no other appliance goes down
+    failed = threading.Event()
+
+    def _restart(isamAppliance):
+        _start = time.time()
+        result = {'hostname': isamAppliance.hostname, 'status': 'restarted', 'duration': 0.0}
+        if failed.is_set():
+            result['status'] = 'cancelled'
+            return result
+        try:
+            ret_obj = execute(isamAppliance, id, operation="restart", check_mode=check_mode, force=force)
+            if ret_obj['changed'] is False or check_mode is True:
+                result['status'] = 'skipped' if ret_obj['changed'] is False else 'changed'
+                return result
+            while _started(isamAppliance, id) is False:
+                if time.time() - _start >= wait_time:
+                    result['status'] = 'timeout'
+                    failed.set()
+                    break
+                time.sleep(check_freq)
+        except Exception as e:
+            logger.error("Restarting {0} on {1} failed: {2}".format(id, isamAppliance.hostname, e))
+            result['status'] = 'failed'
+            result['error'] = str(e)
+            failed.set()
+        result['duration'] = time.time() - _start
+        return result
+
+    results = []
+    stopped = False
+    changed = False
+    for i in range(0, len(isamAppliances), batch_size):
+        batch = isamAppliances[i:i + batch_size]
+        for isamAppliance, result in bounded_map(_restart, batch, max_workers=concurrent, ordered=True):
+            logger.info("Instance {0} on {1}: {2} ({3:.1f}s)".format(id, result['hostname'], result['status'],
+                                                                     result['duration']))
+            results.append(result)
+            if result['status'] in ('restarted', 'changed'):
+                changed = True
+            elif result['status'] in ('failed', 'timeout'):
+                stopped = True
+        if stopped:
+            logger.error("Rolling restart of {0} stopped after a failure.".format(id))
+            break
+
+    ret_obj = IBMResponse({'rc': 0, 'data': {'nodes': results, 'stopped': stopped}, 'changed': changed,
+                           'warnings': [], 'status_code': 0})
+    if stopped:
+        ret_obj['rc'] = 1
+        ret_obj['warnings'] = ["Rolling restart of {0} stopped after a failure.".format(id)]
+    return ret_obj
+
+
+def _started(isamAppliance, id):
+    """
+    Check if the reverse proxy instance is started
+    """
+    ret_obj = isamAppliance.invoke_get(description="Retrieving all reverse proxies", uri=uri,
+                                       requires_modules=requires_modules, requires_version=requires_version,
+                                       ignore_error=True)
+    if ret_obj['rc'] != 0 or not isinstance(ret_obj['data'], list):
+        return False
+    for rp in ret_obj['data']:
+        if rp['id'] == id:
+            return rp['started'] == 'yes'
+    return False
+
+
 def obfuscating(isamAppliance, id, pwd, check_mode=False, force=False):
     """
     Obfuscating a GSO password
@@ -214,7 +314,7 @@ def obfuscating(isamAppliance, id, pwd, check_mode=False, force=False):
                                      {
                                          "pwd": pwd
                                      },
-                                     requires_modules=requires_modules, requires_version=requires_version)
+                                     requires_modules=requires_modules, requires_version=requires_version, pending_change=False)
 
 
 def renew_cert(isamAppliance, id, isamUser, check_mode=False, force=False):
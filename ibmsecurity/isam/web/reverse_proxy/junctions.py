@@ -1,9 +1,10 @@
 import logging
 from ibmsecurity.utilities import tools
 import ibmsecurity.isam.web.reverse_proxy.junctions_server as junctions_server
-import json
 from ibmsecurity.isam.web.reverse_proxy.junctions_config import server_fields
-from ibmsecurity.utilities.tools import jsonSortedListEncoder
+from ibmsecurity.isam.web.reverse_proxy.junctions_model import Junction, parse_servers, server_separator, \
+    index_junctions
+from ibmsecurity.utilities.parallel import bounded_map
 
 try:
     basestring
@@ -21,7 +22,7 @@ requires_version = None
 
 
 
-def get_all(isamAppliance, reverseproxy_id, detailed=None, check_mode=False, force=False, warnings=[]):
+def get_all(isamAppliance, reverseproxy_id, detailed=None, check_mode=False, force=False, warnings=None):
     """
     Retrieving a list of standard and virtual junctions
 
@@ -32,6 +33,8 @@ def get_all(isamAppliance, reverseproxy_id, detailed=None, check_mode=False, for
     :param force:
     :return:
     """
+    if warnings is None:
+        warnings = []
     if detailed and tools.version_compare(isamAppliance.facts["version"], "10.0.4") >= 0:
         try:
             returnValue = isamAppliance.invoke_get("Retrieving a list of standard and virtual junctions",
@@ -56,7 +59,19 @@ def get_all(isamAppliance, reverseproxy_id, detailed=None, check_mode=False, for
                                     requires_version=requires_version)
 
 
-def get(isamAppliance, reverseproxy_id, junctionname, check_mode=False, force=False, warnings=[]):
+def _get_raw(isamAppliance, reverseproxy_id, junctionname, warnings=None):
+    """
+    Retrieving the parameters for a single junction, servers are returned as the LMI provides them (string)
+    """
+    return isamAppliance.invoke_get("Retrieving the parameters for a single standard or virtual junction",
+                                    "{0}/{1}/junctions?junctions_id={2}".format(uri, reverseproxy_id,
+                                                                                junctionname),
+                                    requires_modules=requires_modules,
+                                    requires_version=requires_version,
+                                    warnings=warnings)
+
+
+def get(isamAppliance, reverseproxy_id, junctionname, check_mode=False, force=False, warnings=None):
     """
     Retrieving the parameters for a single standard or virtual junction
 
@@ -68,35 +83,51 @@ def get(isamAppliance, reverseproxy_id, junctionname, check_mode=False, force=Fa
     :param warnings
     :return:
     """
-    logger = isamAppliance.logger
-    ret_obj = isamAppliance.invoke_get("Retrieving the parameters for a single standard or virtual junction",
-                                       "{0}/{1}/junctions?junctions_id={2}".format(uri, reverseproxy_id,
-                                                                                   junctionname),
-                                       requires_modules=requires_modules,
-                                       requires_version=requires_version,
-                                       warnings=warnings)
+    ret_obj = _get_raw(isamAppliance, reverseproxy_id, junctionname, warnings=warnings)
     # servers are provided as a single string, here we parse it out into a list + dict
-    servers = []
-    if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
-        srv_separator = '#'
-    else:
-        srv_separator = '&'
-    srvs = ret_obj['data']['servers'].split(srv_separator)
-    logger.debug("Servers in raw string: {0}".format(ret_obj['data']['servers']))
-    logger.debug("Number of servers in junction: {0}".format(len(srvs)))
-    for srv in srvs:
-        logger.debug("Parsing Server: {0}".format(srv))
-        server = {}
-        for s in srv.split(';'):
-            if s != '':
-                kv = s.split('!')
-                server[kv[0]] = kv[1]
-        servers.append(server)
-
-    ret_obj['data']['servers'] = servers
+    servers = parse_servers(ret_obj['data']['servers'], server_separator(isamAppliance))
+    ret_obj['data']['servers'] = [srv.as_dict() for srv in servers]
     return ret_obj
 
 
+def get_all_detailed(isamAppliance, reverseproxy_id, junction_ids=None, currentJunctions=None, max_workers=8):
+    """
+    Generator with the details of the junctions, in the format of the detailed junction list (v10.0.4).
+
+    On 10.0.4 or higher, this uses the detailed get_all.
+    On older firmware the details are retrieved per junction, with at most max_workers requests at the same time.
+
+    :param isamAppliance:
+    :param reverseproxy_id:
+    :param junction_ids: Only return these junctions (None for all junctions)
+    :param currentJunctions: Output of get_all, to avoid retrieving the list again
+    :param max_workers: Maximum number of concurrent requests (pre 10.0.4)
+    :return: generator of junction dicts
+    """
+    detailed = tools.version_compare(isamAppliance.facts["version"], "10.0.4") >= 0
+    if currentJunctions is None:
+        currentJunctions = get_all(isamAppliance, reverseproxy_id, detailed=detailed)
+    if junction_ids is not None:
+        junction_ids = frozenset(junction_ids)
+
+    to_fetch = []
+    for jct in currentJunctions['data']:
+        if jct.get('junction_point', None) is not None:
+            # already the detailed version
+            if junction_ids is None or jct['junction_point'] in junction_ids:
+                yield jct
+        elif junction_ids is None or jct['id'] in junction_ids:
+            to_fetch.append(jct['id'])
+
+    if to_fetch:
+        logger.debug("Retrieving details for {0} junctions ({1} at a time)".format(len(to_fetch), max_workers))
+        for junctionname, ret_obj in bounded_map(
+                lambda _jct: _get_raw(isamAppliance, reverseproxy_id, _jct, warnings=None),
+                to_fetch, max_workers=max_workers, ordered=False):
+            ret_obj['data'].setdefault('junction_point', junctionname)
+            yield ret_obj['data']
+
+
 def _check(isamAppliance, reverseproxy_id, junctionname, currentJunctions=None):
     """ CurrentJunctions is the output of get_all.
         This avoids constantly having to call the get_all function.
@@ -127,7 +158,7 @@ def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
         priority=None, server_cn=None, silent=None,
         case_insensitive_url=None,
         servers=None,
-        warnings=[]):
+        warnings=None):
     """
     Creating a standard or virtual junction
 
@@ -189,6 +220,8 @@ def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
     :param silent:
     :return:
     """
+    if warnings is None:
+        warnings = []
     # See if it's a virtual or standard junction
     isVirtualJunction = True
     logger = isamAppliance.logger
@@ -387,10 +420,12 @@ def set(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
         username=None, password=None, server_uuid=None, local_ip=None, ltpa_keyfile_password=None,
         delegation_support=None, scripting_support=None, insert_ltpa_cookies=None, check_mode=False, force=False,
         http2_junction=None, http2_proxy=None, sni_name=None, description=None,
-        priority=None, server_cn=None, silent=None, case_insensitive_url=None, servers=None, warnings=[]):
+        priority=None, server_cn=None, silent=None, case_insensitive_url=None, servers=None, warnings=None):
     """
     Setting a standard or virtual junction - compares with existing junction and replaces if changes are detected
     """
+    if warnings is None:
+        warnings = []
     add_required = False
     logger = isamAppliance.logger
     # See if it's a virtual or standard junction
@@ -652,7 +687,7 @@ def compare(isamAppliance1, isamAppliance2, reverseproxy_id, reverseproxy_id2=No
                                                                 'servers/operation_state', 'servers/server_state',
                                                                 'servers/server_uuid', 'servers/total_requests'])
 
-def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=False, force=False, warnings=[]):
+def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=False, force=False, warnings=None):
     """
     Set junctions with all the servers
     The input is a list of junction objects, that can be passed to the `set` function
@@ -665,9 +700,17 @@ def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=
     :param force:
     :return:
     """
+    if warnings is None:
+        warnings = []
     logger = isamAppliance.logger
 
     currentJunctions = get_all(isamAppliance, reverseproxy_id=reverseproxy_id, detailed=True)
+    if currentJunctions['rc'] == 0:
+        # Before 10.0.4 (or if the detailed list failed), retrieve the details of the junctions we need in parallel
+        # so the result looks like the detailed list
+        currentJunctions['data'] = list(get_all_detailed(isamAppliance, reverseproxy_id,
+                                                         junction_ids=[j['junction_point'] for j in junctions],
+                                                         currentJunctions=currentJunctions))
 
     __markChanged = False # use this bool to indicate if there's been a change or not.
 
@@ -701,11 +744,14 @@ def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=
                         if s.get(_field, None) is not None:
                             j[_field] = s.get(_field, None)
                     junctions_server.set(isamAppliance, reverseproxy_id, **j)
+    # Parse the current junctions once, instead of for every junction in the input
+    srv_separator = server_separator(isamAppliance)
+    currentByPoint, currentById = index_junctions(isamAppliance, currentJunctions['data'])
     # Compare the junctions and the currentJunctions.
     for j in junctions:
         logger.debug(f"Processing junction: {j['junction_point']}")
 
-        _checkUpdate = False
+        _checkUpdate = None
         j['isVirtualJunction'] = True
         if j['junction_point'][:1] == '/':
             j['isVirtualJunction'] = False
@@ -742,58 +788,16 @@ def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=
         if len(j.get('servers', [''])) > 1:
             __servers = j.get('servers', [''])[1:]
 
-        for c in currentJunctions['data']:
-            servers = []
-            if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
-                srv_separator = '#'
-            else:
-                srv_separator = '&'
-
-            if c.get('junction_point', None) == j['junction_point']:
-                if c.get('servers', None) is not None:
-                    if type(c.get('servers', [])) is str:
-                        srvs = c['servers'].split(srv_separator)
-                        logger.debug("Servers in raw string: {0}".format(c['servers']))
-                        logger.debug("Number of servers in junction: {0}".format(len(srvs)))
-                        for srv in srvs:
-                            logger.debug("Parsing Server: {0}".format(srv))
-                            server = {}
-                            for s in srv.split(';'):
-                                if s != '':
-                                    kv = s.split('!')
-                                    server[kv[0]] = kv[1]
-                            servers.append(server)
-                        c['servers'] = servers
-                else:
-                    c['servers'] = []
+        if j['junction_point'] in currentByPoint:
+            logger.debug(f"The junction at {j['junction_point']} already exists.")
+            _checkUpdate = currentByPoint[j['junction_point']]
+        elif j['junction_point'] in currentById:
+            logger.debug(f"The junction at {j['junction_point']} already exists (simple syntax)")
+            warnings.append(f"Had to use simple get syntax unexpectedly for {j['junction_point']}")
+            _checkUpdate = get(isamAppliance, reverseproxy_id, j['junction_point'], check_mode=False, force=False, warnings=warnings)
+            _checkUpdate = Junction.from_dict(_checkUpdate.get('data', _checkUpdate), srv_separator)
 
-                logger.debug(f"The junction at {j['junction_point']} already exists.")
-                _checkUpdate = dict(c)
-                break
-            elif c.get('id', None) == j['junction_point']:
-                logger.debug(f"The junction at {j['junction_point']} already exists (simple syntax)")
-                warnings.append(f"Had to use simple get syntax unexpectedly for {j['junction_point']}")
-                _checkUpdate = get(isamAppliance, reverseproxy_id, j['junction_point'], check_mode=False, force=False, warnings=warnings)
-                _checkUpdate = _checkUpdate.get('data', _checkUpdate)
-                if _checkUpdate.get('servers', None) is not None:
-                    if type(_checkUpdate.get('servers', [])) is str:
-                        srvs = _checkUpdate['servers'].split(srv_separator)
-                        logger.debug("Servers in raw string: {0}".format(_checkUpdate['servers']))
-                        logger.debug("Number of servers in junction: {0}".format(len(srvs)))
-                        for srv in srvs:
-                            logger.debug("Parsing Server: {0}".format(srv))
-                            server = {}
-                            for s in srv.split(';'):
-                                if s != '':
-                                    kv = s.split('!')
-                                    server[kv[0]] = kv[1]
-                            servers.append(server)
-                        _checkUpdate['servers'] = servers
-                else:
-                    _checkUpdate['servers'] = []
-                break
-
-        if _checkUpdate:
+        if _checkUpdate is not None:
             __firstserver = j.get('servers', [''])[0]
             for _field in list(server_fields.keys()):
                 if __firstserver.get(_field, None) is not None and j.get(_field, None) is None:
@@ -898,9 +902,8 @@ def junction_server_exists(isamAppliance, srvs, server_hostname: str, server_por
             server_json['server_dn'] = server_dn
         if server_uuid is not None:
             server_json['server_uuid'] = server_uuid
-        else:
-            # Server UUID gets generated if not specified
-            srv.pop('server_uuid', None)
+        # The parsed servers are shared, so collect the current values instead of updating srv
+        current_srv = {k: v for k, v in srv.items() if k != 'server_uuid' or server_uuid is not None}
         if not isVirtualJunction:
             if virtual_hostname is not None:
                 logger.debug("Only for standard junctions - {0}.".format(virtual_hostname))
@@ -911,15 +914,15 @@ def junction_server_exists(isamAppliance, srvs, server_hostname: str, server_por
                 else:
                     server_json['virtual_junction_hostname'] = server_json['server_hostname'] + ":" + server_json[
                         'server_port']
-            if 'virtual_junction_hostname' not in srv:
+            if 'virtual_junction_hostname' not in current_srv:
                 # this is not in the returned servers object for virtual host junctions, it's in the junction's object
                 if virtual_hostname is not None:
-                    srv['virtual_junction_hostname'] = virtual_hostname
+                    current_srv['virtual_junction_hostname'] = virtual_hostname
                 else:
                     if srv['server_port'] in ['80', '443', 80, 443]:
-                        srv['virtual_junction_hostname'] = srv['server_hostname']
+                        current_srv['virtual_junction_hostname'] = srv['server_hostname']
                     else:
-                        srv['virtual_junction_hostname'] = 'fuckoff' # srv['server_hostname'] + ":" + srv['server_port']
+                        current_srv['virtual_junction_hostname'] = srv['server_hostname'] + ":" + str(srv['server_port'])
         if windows_style_url is None:
             server_json['windows_style_url'] = 'no'
         else:
@@ -935,21 +938,20 @@ def junction_server_exists(isamAppliance, srvs, server_hostname: str, server_por
             else:
                 server_json['server_cn'] = server_cn
 
-        srv = {k: v for k, v in srv.items() if k in server_json.keys()}
+        current_srv = {k: v for k, v in current_srv.items() if k in server_json}
 
-        current_servers = json.dumps(srv, skipkeys=True, sort_keys=True)
-        new_servers = json.dumps(server_json, skipkeys=True, sort_keys=True)
-        if current_servers != new_servers:
+        if current_srv != server_json:
             logger.debug("\n\nServers are found to be different. See following JSON for difference.\n\n")
         else:
             logger.debug("\n\nServers are the same.  See comparison below.\n\n")
-        logger.debug(f"\nNew Server JSON: {new_servers}")
-        logger.debug(f"\nOld Server JSON: {current_servers}")
+        logger.debug(f"\nNew Server JSON: {server_json}")
+        logger.debug(f"\nOld Server JSON: {current_srv}")
         break
   return server_found
 
 def junction_exists(isamAppliance, exist_jct, new_j):
-    # perform a comparison.  we receive the actual current junction as input here
+    # perform a comparison.  we receive the actual current junction as input here (dict or parsed Junction)
+    exist_jct = Junction.from_dict(exist_jct, server_separator(isamAppliance))
     __srvs = exist_jct.get('servers', None)
     new_j.pop('isVirtualJunction', None)
     logger.debug(f"\n\nServers in junction {new_j['junction_point']}:\n{__srvs}")
@@ -958,79 +960,16 @@ def junction_exists(isamAppliance, exist_jct, new_j):
         __result = False
     if __result:
         # ok we still need to compare
-        # exist_jct = dict(_checkUpdate)
         new_jct = dict(new_j)
         # remove the server fields - this has already been compared
         for _field, kval in server_fields.items():
             new_jct.pop(_field, None)
-        # junction_type
-        if exist_jct.get('junction_type', None) is not None:
-            exist_jct['junction_type'] = exist_jct.get('junction_type', '').lower()
-        # insert_ltpa_cookies
-        if exist_jct.get('insert_ltpa_cookies', None) is None:
-            exist_jct['insert_ltpa_cookies'] = 'no'
-        # sms_environment
-        if exist_jct.get('sms_environment', None) is None:
-            exist_jct['sms_environment'] = ""
-        # vhost_label
-        if exist_jct.get('vhost_label', None) is None:
-            exist_jct['vhost_label'] = ""
-        # request_encoding utf8_bin, utf8_uri, lcp_bin, and lcp_uri.
-        __re = exist_jct.get('request_encoding', None)
-        if __re is not None:
-            if __re == 'UTF-8, URI Encoded':
-                exist_jct['request_encoding'] = 'utf8_uri'
-            elif __re == 'UTF-8, Binary':
-                exist_jct['request_encoding'] = 'utf8_bin'
-            elif __re == 'Local Code Page, Binary':
-                exist_jct['request_encoding'] = 'lcp_bin'
-            elif __re == 'Local Code Page, URI Encoded':
-                exist_jct['request_encoding'] = 'lcp_uri'
-
-        # To allow for multiple header values to be sorted during compare convert retrieved data into array
-        __rehh = exist_jct.get('remote_http_header', None)
-        if __rehh is not None:
-            if __rehh.startswith('insert - '):
-                exist_jct['remote_http_header'] = [_word.replace('_', '-') for _word in (__rehh[9:]).split(' ')]
-            # now see if it's actually 'all' - to do that, compare with string ["iv-creds", "iv-groups", "iv-user"]
-            __nrehh = json.dumps(exist_jct.get('remote_http_header', None), skipkeys=True, sort_keys=True, cls=jsonSortedListEncoder)
-            logger.debug(f"Sorted string content of remote_http_header {__nrehh}")
-            if __nrehh == '["iv-creds", "iv-groups", "iv-user"]':
-                exist_jct['remote_http_header'] = ['all']
-            if __nrehh.replace('"', '') == "do not insert":
-                exist_jct['remote_http_header'] = []
-
-        # scripting support default
-        __scripting_support = exist_jct.get('scripting_support', None)
-        if __scripting_support is None:
-            exist_jct['scripting_support'] = 'no'
-
-        # scripting support default
-        __transparent_path_junction = exist_jct.get('transparent_path_junction', None)
-        if __transparent_path_junction is None:
-            exist_jct['transparent_path_junction'] = 'no'
-
-        # basic_auth_mode - filter (default), ignore, supply, gso.
-        __bamode = exist_jct.get('basic_auth_mode', None)
-        if __bamode is not None:
-            # GSO
-            if __bamode == "use GSO":
-                exist_jct['basic_auth_mode'] = 'gso'
-
         # Remove servers field for comparing
         new_jct.pop("servers", None)
-        # only compare values that are in the new request
+        # only compare values that are in the new request - the existing junction is already normalized
         # This does not (always) compare values correctly where you just remove the key.  In that case, you'd have to change a different key as well (eg. description)
-        exist_jct = {k: v for k, v in exist_jct.items() if k in new_jct.keys()}
-
-        newJSON = json.dumps(new_jct, skipkeys=True, sort_keys=True, cls=jsonSortedListEncoder)
-        logger.debug(f"\nSorted Desired  Junction {new_j['junction_point']}:\n\n {newJSON}\n")
-
-        oldJSON = json.dumps(exist_jct, skipkeys=True, sort_keys=True, cls=jsonSortedListEncoder)
-        logger.debug(f"\nSorted Current  Junction {exist_jct.get('junction_point', '')}:\n\n {oldJSON}\n")
-
-        if newJSON != oldJSON:
-            logger.debug("Junctions are found to be different. See JSON for difference.")
+        __diff = exist_jct.differences(new_jct)
+        if __diff:
+            logger.debug(f"Junctions are found to be different for {new_j['junction_point']}: {__diff}")
             __result = False
     return __result
-
@@ -0,0 +1,242 @@
+"""
+Parsed and normalized representation of reverse proxy junctions.
+
+The LMI returns the servers of a junction as one delimited string, and uses display
+values for some junction fields (eg. 'UTF-8, URI Encoded' for request_encoding).
+The classes in here parse and normalize that once, so comparing a junction to the
+desired state is a plain field equality check.
+"""
+import logging
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+
+from ibmsecurity.utilities import tools
+from ibmsecurity.isam.web.reverse_proxy.junctions_config import server_fields
+
+logger = logging.getLogger(__name__)
+
+# Keys as they appear in the parsed servers string (both the input and the LMI names)
+server_keys = tuple(sorted(set(server_fields.keys()) |
+                           {_v['alt_name'] for _v in server_fields.values() if 'alt_name' in _v}))
+
+junction_keys = ('id', 'junction_point', 'junction_type', 'servers', 'active_worker_threads', 'authz_rules',
+                 'basic_auth_mode', 'case_insensitive_url', 'case_sensitive_url', 'client_ip_http',
+                 'cookie_include_path', 'delegation_support', 'description', 'enable_basic_auth', 'force',
+                 'fsso_config_file', 'gso_resource_group', 'http2_junction', 'http2_proxy', 'https_port',
+                 'http_port', 'insert_ltpa_cookies', 'insert_session_cookies', 'junction_cookie_javascript_block',
+                 'junction_hard_limit', 'junction_soft_limit', 'key_label', 'local_ip', 'ltpa_keyfile',
+                 'mutual_auth', 'preserve_cookie', 'priority', 'proxy_hostname', 'proxy_port', 'query_contents',
+                 'remote_http_header', 'request_encoding', 'scripting_support', 'server_cn', 'server_dn',
+                 'server_hostname', 'server_port', 'server_uuid', 'silent', 'sms_environment', 'sni_name',
+                 'stateful_junction', 'tfim_sso', 'transparent_path_junction', 'version_two_cookies',
+                 'vhost_label', 'virtual_hostname', 'virtual_junction_hostname', 'windows_style_url')
+
+# request_encoding: utf8_bin, utf8_uri, lcp_bin, and lcp_uri.
+request_encodings = {
+    'UTF-8, URI Encoded': 'utf8_uri',
+    'UTF-8, Binary': 'utf8_bin',
+    'Local Code Page, Binary': 'lcp_bin',
+    'Local Code Page, URI Encoded': 'lcp_uri'
+}
+
+
+def _intern(value):
+    # Hostnames and yes/no values repeat across thousands of servers
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def comparable(value):
+    """
+    Convert a value so that lists compare regardless of their order (like jsonSortedListEncoder)
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted(comparable(_v) for _v in value))
+    return value
+
+
+class _Record(Mapping):
+    """
+    Read-only mapping stored in slots. Keys that are not known upfront are kept in _extra.
+    """
+    __slots__ = ('_extra',)
+    _fields = ()
+
+    def __init__(self, data):
+        self._extra = None
+        for _k, _v in data.items():
+            self._set(_k, _v)
+
+    def _set(self, key, value):
+        value = _intern(value)
+        if key in self._fields:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[_intern(key)] = value
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for _k in self.__slots__:
+            if hasattr(self, _k):
+                yield _k
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _k in self)
+
+    def as_dict(self):
+        return {_k: self[_k] for _k in self}
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, self.as_dict())
+
+
+class JunctionServer(_Record):
+    """
+    A single backend server of a junction
+    """
+    __slots__ = server_keys
+    _fields = frozenset(server_keys)
+
+    @classmethod
+    def from_string(cls, srv):
+        """
+        Parse one server from the LMI format: key!value;key!value;...
+        """
+        server = {}
+        for s in srv.split(';'):
+            if s != '':
+                kv = s.split('!')
+                server[kv[0]] = kv[1]
+        return cls(server)
+
+
+class Junction(_Record):
+    """
+    A junction with parsed servers, and values normalized to the format used as input for `junctions.set`
+    """
+    __slots__ = junction_keys
+    _fields = frozenset(junction_keys)
+
+    @classmethod
+    def from_dict(cls, data, srv_separator='#'):
+        """
+        Build a normalized junction from the output of `junctions.get` or an entry of the detailed `get_all`
+        """
+        if isinstance(data, Junction):
+            return data
+        jct = cls({})
+        for _k, _v in data.items():
+            if _k == 'servers':
+                _v = parse_servers_list(_v, srv_separator)
+            jct._set(_k, _v)
+        jct._normalize()
+        return jct
+
+    def _normalize(self):
+        # junction_type
+        if self.get('junction_type') is not None:
+            self._set('junction_type', self['junction_type'].lower())
+        # defaults
+        for _k, _default in (('insert_ltpa_cookies', 'no'), ('sms_environment', ''), ('vhost_label', ''),
+                             ('scripting_support', 'no'), ('transparent_path_junction', 'no')):
+            if self.get(_k) is None:
+                self._set(_k, _default)
+        req_enc = self.get('request_encoding')
+        if req_enc is not None:
+            self._set('request_encoding', request_encodings.get(req_enc, req_enc))
+        # To allow for multiple header values to be sorted during compare convert retrieved data into a tuple
+        rehh = self.get('remote_http_header')
+        if rehh is not None:
+            if isinstance(rehh, str) and rehh.startswith('insert - '):
+                rehh = tuple(_word.replace('_', '-') for _word in (rehh[9:]).split(' '))
+            sorted_rehh = comparable(rehh)
+            if sorted_rehh == ('iv-creds', 'iv-groups', 'iv-user'):
+                rehh = ('all',)
+            elif sorted_rehh == 'do not insert':
+                rehh = ()
+            self._set('remote_http_header', rehh)
+        # basic_auth_mode - filter (default), ignore, supply, gso.
+        if self.get('basic_auth_mode') == 'use GSO':
+            self._set('basic_auth_mode', 'gso')
+
+    def differences(self, new_jct):
+        """
+        Return the keys of new_jct that have a different (or no) value in this junction
+        """
+        return [_k for _k, _v in new_jct.items()
+                if _k not in self or comparable(self[_k]) != comparable(_v)]
+
+    def matches(self, new_jct):
+        """
+        True when all values in new_jct are the same in this junction
+        """
+        for _k, _v in new_jct.items():
+            if _k not in self or comparable(self[_k]) != comparable(_v):
+                return False
+        return True
+
+
+def server_separator(isamAppliance):
+    """
+    Separator between servers in the servers string - changed after 9.0.1.0
+    """
+    if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
+        return '#'
+    return '&'
+
+
+@lru_cache(maxsize=4096)
+def parse_servers(servers, srv_separator='#'):
+    """
+    Parse the servers string of a junction into a tuple of JunctionServer objects.
+    Results are cached, an unchanged junction is only parsed once.
+    """
+    logger.debug("Servers in raw string: {0}".format(servers))
+    srvs = servers.split(srv_separator)
+    logger.debug("Number of servers in junction: {0}".format(len(srvs)))
+    return tuple(JunctionServer.from_string(srv) for srv in srvs)
+
+
+def parse_servers_list(servers, srv_separator='#'):
+    """
+    Servers can be a string (LMI), a list of dicts (`junctions.get`) or None
+    """
+    if servers is None:
+        return ()
+    if isinstance(servers, str):
+        return parse_servers(servers, srv_separator)
+    return tuple(srv if isinstance(srv, JunctionServer) else JunctionServer(srv) for srv in servers)
+
+
+def index_junctions(isamAppliance, junctions):
+    """
+    Build the parsed junctions from the data of `junctions.get_all` once.
+
+    :return: 2 dicts: parsed junctions by junction_point (detailed list) and the raw entries by id (simple list)
+    """
+    srv_separator = server_separator(isamAppliance)
+    by_point = {}
+    by_id = {}
+    if not isinstance(junctions, list):
+        return by_point, by_id
+    for c in junctions:
+        if c.get('junction_point', None) is not None:
+            by_point.setdefault(c['junction_point'], Junction.from_dict(c, srv_separator))
+        elif c.get('id', None) is not None:
+            by_id.setdefault(c['id'], c)
+    return by_point, by_id
@@ -30,7 +30,7 @@ def get(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
             break
     return ret_obj_new
 
-def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_port, junction_type="tcp", check_mode=False, force=False, warnings=[],
+def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_port, junction_type="tcp", check_mode=False, force=False, warnings=None,
         **optionargs):
     """
     Adding a back-end server to an existing standard or virtual junctions
@@ -62,6 +62,8 @@ def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
     :param force:
     :return:
     """
+    if warnings is None:
+        warnings = []
     # Search for the UUID of the junctioned server
     if not force:
         ret_obj = search(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_port)
@@ -123,7 +125,7 @@ def add(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
 
     return isamAppliance.create_return_object()
 
-def set(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_port, junction_type="tcp", check_mode=False, force=False, warnings=[],
+def set(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_port, junction_type="tcp", check_mode=False, force=False, warnings=None,
         **optionargs):
     """
     Adding a back-end server to an existing standard or virtual junctions
@@ -154,6 +156,8 @@ def set(isamAppliance, reverseproxy_id, junction_point, server_hostname, server_
     :param force:
     :return:
     """
+    if warnings is None:
+        warnings = []
     # load option args
     #   server_dn=None,
     #   stateful_junction='no', case_sensitive_url='no', windows_style_url='no', virtual_hostname=None,
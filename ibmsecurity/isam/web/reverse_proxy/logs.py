@@ -1,5 +1,6 @@
 import logging
 from ibmsecurity.utilities import tools
+from ibmsecurity.appliance.ibmappliance import IBMError
 
 logger = logging.getLogger(__name__)
 
@@ -68,3 +69,46 @@ def export_file(isamAppliance, instance_id, file_id, filename, check_mode=False,
                 filename, requires_model=requires_model)
 
     return isamAppliance.create_return_object(warnings=ret_obj['warnings'])
+
+
+def follow(isamAppliance, instance_id, file_id, checkpoint_file=None, size=1000, poll_interval=None):
+    """
+    Following a log file - generator with the lines added since the last call
+
+    :param checkpoint_file: JSON file to persist the position in, so the next run continues where this one ended
+    :param size: maximum number of lines per request
+    :param poll_interval: seconds between polls, None to stop after reading the new lines
+    :return: generator of dicts with instance_id, file_id, start (line number) and lines
+    """
+    return follow_all(isamAppliance, [(instance_id, file_id)], checkpoint_file=checkpoint_file, size=size,
+                      poll_interval=poll_interval)
+
+
+def follow_all(isamAppliance, files, checkpoint_file=None, size=1000, poll_interval=None, max_workers=4):
+    """
+    Following several log files of one or more instances concurrently
+
+    :param files: list of (instance_id, file_id) tuples
+    :return: generator of dicts with instance_id, file_id, start (line number) and lines
+    """
+    from ibmsecurity.utilities import logfollow
+
+    def _list_sizes(instance_id):
+        ret_obj = get_all(isamAppliance, instance_id)
+        return {f['id']: int(f.get('file_size', 0)) for f in ret_obj['data']}
+
+    def _read_lines(instance_id, file_id, start, size):
+        try:
+            ret_obj = get(isamAppliance, instance_id, file_id, start=start, size=size)
+        except IBMError:
+            # Exception thrown if the file is empty
+            return []
+        if not isinstance(ret_obj['data'], dict):
+            return []
+        return ret_obj['data'].get('contents', '').splitlines()
+
+    checkpoints = logfollow.Checkpoints(checkpoint_file)
+    for chunk in logfollow.follow(files, _list_sizes, _read_lines, checkpoints, key_prefix=isamAppliance.hostname,
+                                  size=size, poll_interval=poll_interval, max_workers=max_workers):
+        yield {'instance_id': chunk['group'], 'file_id': chunk['file_id'], 'start': chunk['start'],
+               'lines': chunk['lines']}
@@ -1,6 +1,7 @@
 import logging
 # import ibmsecurity.utilities.tools
 from ibmsecurity.utilities import tools
+from ibmsecurity.appliance.ibmappliance import IBMError
 
 logger = logging.getLogger(__name__)
 requires_model = "Appliance"
@@ -39,7 +40,7 @@ def get(isamAppliance, instance_id, component_id, file_id, options=None,
     Retrieving snippets of a statistics log file for a component - Reverse Proxy
     """
     return isamAppliance.invoke_get("Retrieving snippet of a statistics log file - Reverse Proxy",
-                                    "{0}/{1}/statistics/{2}/stats_files/{3}".format(uri,
+                                    "{0}/{1}/statistics/{2}/stats_files/{3}{4}".format(uri,
                                                                                     instance_id,
                                                                                     component_id,
                                                                                     file_id,
@@ -65,6 +66,54 @@ def export_file(isamAppliance, instance_id, component_id, file_id, filename, che
     return isamAppliance.create_return_object()
 
 
+def collect(isamAppliance, instance_id, component_id, file_id, columns=None, size=1000, check_mode=False,
+            force=False):
+    """
+    Parsing a statistics log file into columns (timestamps and counters) - Reverse Proxy
+
+    Pass the columns of a previous call to only retrieve and append the lines added since then.
+
+    :param columns: StatisticsColumns from a previous call, or None to start from the first line
+    :param size: number of lines to retrieve per request
+    :return: return object with the StatisticsColumns as data
+    """
+    from ibmsecurity.isam.web.reverse_proxy.statistics_columns import StatisticsColumns
+
+    if columns is None:
+        columns = StatisticsColumns(component=component_id)
+    warnings = []
+    while True:
+        try:
+            ret_obj = get(isamAppliance, instance_id, component_id, file_id, start=columns.next_line, size=size)
+        except IBMError:
+            # Exception thrown if the file is empty (or there are no lines after start)
+            break
+        warnings = ret_obj['warnings']
+        if not isinstance(ret_obj['data'], dict):
+            break
+        lines = ret_obj['data'].get('contents', '').splitlines()
+        columns.append_lines(lines)
+        if len(lines) < size:
+            break
+
+    ret_obj = isamAppliance.create_return_object(warnings=warnings)
+    ret_obj['data'] = columns
+    return ret_obj
+
+
+def load_file(filename, component_id=None):
+    """
+    Parsing an exported statistics log file into columns, line by line
+    """
+    from ibmsecurity.isam.web.reverse_proxy.statistics_columns import StatisticsColumns
+
+    columns = StatisticsColumns(component=component_id)
+    with open(filename, 'r', errors='ignore') as f:
+        columns.append_lines(f)
+    columns.flush()
+    return columns
+
+
 def set(isamAppliance, instance_id, component_id, status, hours, mins, secs,
         count, flush_interval, rollover_size, max_rollover_files, compress,
         check_mode=False, force=False):
@@ -0,0 +1,144 @@
+"""
+Columnar storage for reverse proxy statistics log files (pdweb.http, pdweb.threads, ...)
+
+A statistics log contains records like:
+
+    2024-01-15-10:00:00.000+00:00I----- pdweb.threads
+       active           : 0
+       total            : 50
+
+Records are parsed into one array of timestamps and one array per counter, so rates and
+percentiles are computed over contiguous buffers instead of lists of dicts.
+NumPy is used for the computations when it is installed.
+"""
+import logging
+import math
+import re
+from array import array
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+header_re = re.compile(r'^(\d{4}-\d{2}-\d{2}-\d{2}:\d{2}:\d{2})(\.\d+)?([+-]\d{2}:?\d{2})?I-+\s+(\S+)')
+counter_re = re.compile(r'^\s*(.+?)\s*:\s*([-+]?\d+(?:\.\d+)?)\s*$')
+
+
+def _timestamp(date_time, fraction, timezone):
+    if timezone is None:
+        timezone = '+0000'
+    ts = datetime.strptime(date_time + timezone.replace(':', ''), '%Y-%m-%d-%H:%M:%S%z').timestamp()
+    if fraction:
+        ts += float(fraction)
+    return ts
+
+
+class StatisticsColumns(object):
+    """
+    Timestamps and counters of a statistics log, stored as array('d') columns.
+    Feed lines incrementally with `append_lines`; `next_line` is the line to continue from on the next poll.
+    """
+
+    def __init__(self, component=None):
+        self.component = component
+        self.timestamps = array('d')
+        self.columns = {}
+        self.next_line = 1
+        self._pending = None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append_lines(self, lines):
+        """
+        Parse lines and append the complete records.
+        The last record stays pending until the next header (or `flush`), it may not be complete yet.
+        """
+        for line in lines:
+            self.next_line += 1
+            m = header_re.match(line)
+            if m is not None:
+                self.flush()
+                if self.component is None or m.group(4) == self.component:
+                    self._pending = (_timestamp(m.group(1), m.group(2), m.group(3)), {})
+                continue
+            if self._pending is None:
+                continue
+            m = counter_re.match(line)
+            if m is not None:
+                self._pending[1][m.group(1)] = float(m.group(2))
+
+    def flush(self):
+        """
+        Append the pending record
+        """
+        if self._pending is None:
+            return
+        ts, counters = self._pending
+        self._pending = None
+        length = len(self.timestamps)
+        self.timestamps.append(ts)
+        for name, value in counters.items():
+            if name not in self.columns:
+                # Counter that was not in the earlier records
+                self.columns[name] = array('d', [math.nan]) * length
+            self.columns[name].append(value)
+        for name, column in self.columns.items():
+            if len(column) == length:
+                column.append(math.nan)
+
+    def column(self, name):
+        """
+        Copy of the values of a counter, so the columns can still grow while the caller holds it
+        """
+        if numpy is not None:
+            return numpy.array(self.columns[name], dtype=numpy.float64)
+        return array('d', self.columns[name])
+
+    def deltas(self, name):
+        """
+        Difference between consecutive values of a counter. A negative difference means the counter was reset
+        (eg. restart of the reverse proxy), then the new value is the delta.
+        """
+        values = self.columns[name]
+        if numpy is not None:
+            values = numpy.frombuffer(values, dtype=numpy.float64)
+            d = numpy.diff(values)
+            return numpy.where(d < 0, values[1:], d)
+        return array('d', [(b - a) if b >= a else b for a, b in zip(values, values[1:])])
+
+    def rates(self, name):
+        """
+        Per second rate of a counter between consecutive records
+        """
+        d = self.deltas(name)
+        if numpy is not None:
+            dt = numpy.diff(numpy.frombuffer(self.timestamps, dtype=numpy.float64))
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where(dt > 0, d / dt, numpy.nan)
+        ts = self.timestamps
+        return array('d', [(v / (b - a)) if b > a else math.nan for v, a, b in zip(d, ts, ts[1:])])
+
+    def percentile(self, name, q, values=None):
+        """
+        Percentile (0-100) of a counter (or of values, eg. the output of `rates`), ignoring missing values
+        """
+        if values is None:
+            values = self.columns[name]
+        if numpy is not None:
+            values = numpy.asarray(values, dtype=numpy.float64)
+            if values.size == 0 or numpy.isnan(values).all():
+                return math.nan
+            return float(numpy.nanpercentile(values, q))
+        values = sorted(v for v in values if not math.isnan(v))
+        if not values:
+            return math.nan
+        # linear interpolation, same as numpy's default
+        k = (len(values) - 1) * q / 100.0
+        f = math.floor(k)
+        c = min(f + 1, len(values) - 1)
+        return values[f] + (values[c] - values[f]) * (k - f)
@@ -54,6 +54,144 @@ def export_file(isamAppliance, instance_id, component_id, file_id, filepath, che
     return isamAppliance.create_return_object(warnings=warnings)
 
 
+def export_all(isamAppliance, instance_id, component_id, target_dir, delete_archived=False, digest=False,
+               max_workers=4, check_mode=False, force=False):
+    """
+    Exporting all transaction logging data files and rollover files for a component to a directory
+
+    Files that already exist in target_dir with the same name and size are skipped (unless force is True).
+    The others are downloaded concurrently.
+
+    :param target_dir: directory to export the files to
+    :param delete_archived: delete the files that are archived in target_dir from the appliance (one request),
+                            'deleted' lists them only when the appliance deleted them
+    :param digest: keep the sha256 of the exported files in target_dir/.translog_digests.json, and only skip
+                   files that still match it
+    :param max_workers: maximum number of concurrent downloads
+    :return: data contains the lists of exported, skipped and deleted files
+    """
+    import json
+    from ibmsecurity.utilities.parallel import bounded_map
+
+    ret_obj = get_files(isamAppliance, instance_id, component_id)
+    warnings = list(ret_obj['warnings'])
+    digest_file = os.path.join(target_dir, ".translog_digests.json")
+    digests = {}
+    if digest and os.path.exists(digest_file):
+        with open(digest_file, 'r') as f:
+            digests = json.load(f)
+
+    to_export = []
+    skipped = []
+    for obj in ret_obj['data']:
+        filepath = os.path.join(target_dir, obj['id'])
+        if force is False and _archived(filepath, obj.get('file_size', None), digests.get(obj['id']) if digest else None,
+                                        digest):
+            skipped.append(obj['id'])
+        else:
+            to_export.append(obj['id'])
+
+    if check_mode is True:
+        ret_obj = isamAppliance.create_return_object(changed=(to_export != [] or
+                                                              (delete_archived and ret_obj['data'] != [])),
+                                                     warnings=warnings)
+        ret_obj['data'] = {'exported': to_export, 'skipped': skipped, 'deleted': []}
+        return ret_obj
+
+    if to_export and not os.path.exists(target_dir):
+        os.makedirs(target_dir)
+
+    def _export(file_id):
+        # Download to a temporary name, an interrupted download is never taken for an archived file
+        filepath = os.path.join(target_dir, file_id)
+        tmp_filepath = filepath + ".part"
+        try:
+            ret_obj = isamAppliance.invoke_get_file(
+                "Exporting the transaction logging data file or rollover transaction logging data file for a component",
+                "{0}/{1}/transaction_logging/{2}/translog_files/{3}?export".format(uri, instance_id, component_id,
+                                                                                   file_id),
+                tmp_filepath, ignore_error=True, requires_model=requires_model)
+            exported_ok = ret_obj['rc'] == 0 and os.path.exists(tmp_filepath)
+        except Exception as e:
+            # Eg. the connection broke off during the download, the other files are still exported
+            logger.error("Exporting transaction log file {0} failed: {1}".format(file_id, e))
+            exported_ok = False
+        if not exported_ok:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            return False, None
+        os.replace(tmp_filepath, filepath)
+        if digest:
+            return True, _sha256(filepath)
+        return True, None
+
+    exported = []
+    for file_id, (exported_ok, sha256) in bounded_map(_export, to_export, max_workers=max_workers, ordered=False):
+        if not exported_ok:
+            warnings.append("Exporting transaction log file '{0}' failed.".format(file_id))
+            continue
+        exported.append(file_id)
+        if digest:
+            digests[file_id] = sha256
+
+    if digest:
+        # Write to a temporary file first, so a crash never leaves a truncated digest file
+        tmp_digest_file = digest_file + '.tmp'
+        with open(tmp_digest_file, 'w') as f:
+            json.dump(digests, f)
+        os.replace(tmp_digest_file, digest_file)
+
+    deleted = []
+    if delete_archived and (exported or skipped):
+        # The files are in the listing above, no need to list them again
+        to_delete = exported + skipped
+        if len(to_delete) == 1:
+            del_obj = isamAppliance.invoke_delete(
+                "Deleting the transaction logging data file or rollover file for a component",
+                "{0}/{1}/transaction_logging/{2}/translog_files/{3}".format(uri, instance_id, component_id,
+                                                                            to_delete[0]),
+                ignore_error=True, requires_model=requires_model)
+        else:
+            del_obj = isamAppliance.invoke_put(
+                "Deleting multiple transaction logging data file and rollover files for a component",
+                "{0}/{1}/transaction_logging/{2}/translog_files?action=delete".format(uri, instance_id, component_id),
+                {
+                    'files': [{'name': file_id} for file_id in to_delete]
+                }, ignore_error=True, requires_model=requires_model)
+        warnings.extend(del_obj['warnings'])
+        if del_obj['rc'] == 0 and del_obj['changed'] is True:
+            deleted = to_delete
+        else:
+            warnings.append("Deleting the archived transaction log files failed.")
+
+    ret_obj = isamAppliance.create_return_object(changed=(exported != [] or deleted != []), warnings=warnings)
+    ret_obj['data'] = {'exported': exported, 'skipped': skipped, 'deleted': deleted}
+    return ret_obj
+
+
+def _archived(filepath, file_size, sha256, digest):
+    """
+    Check if a file is already in the archive
+    """
+    if not os.path.exists(filepath):
+        return False
+    if file_size is not None and os.path.getsize(filepath) != int(file_size):
+        return False
+    if digest and (sha256 is None or _sha256(filepath) != sha256):
+        return False
+    return True
+
+
+def _sha256(filepath):
+    import hashlib
+
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def update(isamAppliance, instance_id, component_id, status, rollover_size, max_rollover_files, compress,
            check_mode=False, force=False):
     """
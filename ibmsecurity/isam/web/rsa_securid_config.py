@@ -77,7 +77,7 @@ def test(isamAppliance, username, passcode, check_mode=False, force=False):
                                             requires_modules=requires_modules,
                                             requires_version=requires_version,
                                             ignore_error=True,
-                                            requires_model=requires_model)
+                                            requires_model=requires_model, pending_change=False)
         if ret_obj['changed'] is True:
             ret_obj['changed'] = False
 
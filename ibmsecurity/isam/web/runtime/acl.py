@@ -25,7 +25,7 @@ def get_list(isamAppliance, isamUser, acl_attribute_name=None, acl_attribute_val
                                             "acl_attribute_name": acl_attribute_name,
                                             "acl_attribute_value": acl_attribute_value,
                                             "admin_domain": admin_domain
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
 
     return ret_obj
@@ -41,7 +41,7 @@ def get(isamAppliance, isamUser, acl_name, admin_domain='Default'):
                                             "admin_pwd": isamUser.password,
                                             "acl_name": acl_name,
                                             "admin_domain": admin_domain
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
 
     return ret_obj
@@ -61,7 +61,7 @@ def get_object_list(isamAppliance, isamUser, object=None, acl_name=None, acl_att
                                             "acl_attribute_name": acl_attribute_name,
                                             "acl_attribute_value": acl_attribute_value,
                                             "admin_domain": admin_domain
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
 
     return ret_obj
@@ -1,5 +1,10 @@
+import hashlib
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import ibmsecurity.utilities.tools
+from ibmsecurity.utilities.parallel import bounded_map
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +28,7 @@ def retrieve(isamAppliance, admin_id, admin_pwd, object='/', admin_domain='Defau
                                             "admin_pwd": admin_pwd,
                                             "admin_domain": admin_domain,
                                             "object": object
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
     if ret_obj['rc'] == 404:
         logger.info(f"Object {object} could not be found in {admin_domain} for list and show")
@@ -44,7 +49,7 @@ def get(isamAppliance, admin_id, admin_pwd, object='/', admin_domain='Default',
                                             "admin_pwd": admin_pwd,
                                             "admin_domain": admin_domain,
                                             "object": object
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
     if ret_obj['rc'] == 404:
         logger.info(f"Object {object} could not be found in {admin_domain}")
@@ -56,7 +61,7 @@ def get(isamAppliance, admin_id, admin_pwd, object='/', admin_domain='Default',
 def compare(isamAppliance1, isamAppliance2, admin_id, admin_pwd, admin_domain='Default', check_mode=False, force=False):
     """
     Compare objects between two appliances
-    Note that this only compares the first level
+    Note that this only compares the first level, use compare_tree for the complete object space
     """
     ret_obj1 = retrieve(isamAppliance1, admin_id, admin_pwd, '/', admin_domain)
     ret_obj2 = retrieve(isamAppliance2, admin_id, admin_pwd, '/', admin_domain)
@@ -69,3 +74,152 @@ def compare(isamAppliance1, isamAppliance2, admin_id, admin_pwd, admin_domain='D
         obj['script'] = ret_obj['data']['contents']
 
     return ibmsecurity.utilities.tools.json_compare(ret_obj1, ret_obj2, deleted_keys=[])
+
+
+def _object_path(parent, obj):
+    name = obj.get('id', obj.get('name', ''))
+    if name.startswith('/'):
+        return name
+    return "{0}/{1}".format(parent.rstrip('/'), name)
+
+
+def walk(isamAppliance, admin_id, admin_pwd, object='/', admin_domain='Default', max_depth=None, max_workers=8):
+    """
+    Generator with all objects below object, breadth-first
+
+    All objects of a level are listed (objectlistandshowext) with at most max_workers requests at the same time.
+    Every object is listed once, even if it is returned more than once.
+
+    :param max_depth: number of levels to descend (None for all)
+    :return: generator of (path, object) tuples, object is the entry returned by objectlistandshowext
+    """
+    visited = {object}
+    level = [object]
+    depth = 0
+    while level and (max_depth is None or depth < max_depth):
+        next_level = []
+        for parent, ret_obj in bounded_map(
+                lambda _obj: retrieve(isamAppliance, admin_id, admin_pwd, object=_obj, admin_domain=admin_domain),
+                level, max_workers=max_workers):
+            if not isinstance(ret_obj['data'], list):
+                continue
+            for obj in ret_obj['data']:
+                path = _object_path(parent, obj)
+                if path in visited:
+                    continue
+                visited.add(path)
+                next_level.append(path)
+                yield path, obj
+        level = next_level
+        depth += 1
+
+
+class ObjectTree(object):
+    """
+    Protected object space as a tree of nodes, with a hash per subtree
+
+    The hash of a node covers its own attributes and the hashes of its children, so two trees (or subtrees) are
+    equal when their hashes are equal and only subtrees with a different hash need to be compared.
+    """
+    __slots__ = ('name', 'attributes', 'children', '_digest')
+
+    def __init__(self, name='/', attributes=None):
+        self.name = name
+        self.attributes = attributes
+        self.children = {}
+        self._digest = None
+
+    @classmethod
+    def from_walk(cls, objects, root='/'):
+        """
+        Build a tree from the output of walk (or any iterable of (path, attributes) tuples)
+        """
+        tree = cls(root)
+        for path, attributes in objects:
+            tree.insert(path, attributes)
+        return tree
+
+    def insert(self, path, attributes):
+        node = self
+        prefix = self.name.rstrip('/')
+        if path.startswith(prefix + '/'):
+            path = path[len(prefix):]
+        for name in path.strip('/').split('/'):
+            child = node.children.get(name)
+            if child is None:
+                child = node.children[name] = ObjectTree(name)
+            node._digest = None
+            node = child
+        node.attributes = attributes
+        node._digest = None
+        return node
+
+    def __len__(self):
+        return 1 + sum(len(child) for child in self.children.values())
+
+    def digest(self):
+        if self._digest is None:
+            h = hashlib.sha256(json.dumps(self.attributes, sort_keys=True, default=str).encode('utf-8'))
+            for name in sorted(self.children):
+                h.update(b'\0' + name.encode('utf-8') + b'\0' + self.children[name].digest())
+            self._digest = h.digest()
+        return self._digest
+
+    def paths(self, path=None):
+        if path is None:
+            path = self.name
+        yield path
+        for name in sorted(self.children):
+            yield from self.children[name].paths("{0}/{1}".format(path.rstrip('/'), name))
+
+    def diff(self, other, path=None):
+        """
+        Differences with another tree, only descending into subtrees with a different hash
+
+        :return: dict with the paths that were deleted (only in self), added (only in other) and changed
+        """
+        result = {'deleted': [], 'added': [], 'changed': []}
+        self._diff(other, self.name if path is None else path, result)
+        return result
+
+    def _diff(self, other, path, result):
+        if self.digest() == other.digest():
+            return
+        if json.dumps(self.attributes, sort_keys=True, default=str) != \
+                json.dumps(other.attributes, sort_keys=True, default=str):
+            result['changed'].append(path)
+        for name in sorted(set(self.children) | set(other.children)):
+            child_path = "{0}/{1}".format(path.rstrip('/'), name)
+            if name not in other.children:
+                result['deleted'].extend(self.children[name].paths(child_path))
+            elif name not in self.children:
+                result['added'].extend(other.children[name].paths(child_path))
+            else:
+                self.children[name]._diff(other.children[name], child_path, result)
+
+
+def get_tree(isamAppliance, admin_id, admin_pwd, object='/', admin_domain='Default', max_workers=8,
+             check_mode=False, force=False):
+    """
+    Retrieve the complete object space below object as an ObjectTree
+    """
+    return ObjectTree.from_walk(walk(isamAppliance, admin_id, admin_pwd, object=object, admin_domain=admin_domain,
+                                     max_workers=max_workers), root=object)
+
+
+def compare_tree(isamAppliance1, isamAppliance2, admin_id, admin_pwd, object='/', admin_domain='Default',
+                 max_workers=8, check_mode=False, force=False):
+    """
+    Compare the complete object space below object between two appliances
+    Both object spaces are retrieved at the same time, then only subtrees with a different hash are compared.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(get_tree, isamAppliance, admin_id, admin_pwd, object=object,
+                                   admin_domain=admin_domain, max_workers=max_workers)
+                   for isamAppliance in (isamAppliance1, isamAppliance2)]
+        tree1, tree2 = [f.result() for f in futures]
+
+    diff = tree1.diff(tree2)
+    data = {'matches': tree1.digest() == tree2.digest(), 'objects1': len(tree1) - 1, 'objects2': len(tree2) - 1}
+    data.update(diff)
+    return isamAppliance1.create_return_object(data=data)
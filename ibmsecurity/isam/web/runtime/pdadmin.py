@@ -1,5 +1,7 @@
 import logging
 
+from ibmsecurity.utilities.parallel import bounded_map
+
 try:
     basestring
 except NameError:
@@ -7,6 +9,9 @@ except NameError:
 
 logger = logging.getLogger(__name__)
 
+# pdadmin echoes every command after this prompt
+command_prompt = "cmd> "
+
 
 def execute(isamAppliance, isamUser, commands, admin_domain='Default'):
     """
@@ -22,4 +27,121 @@ def execute(isamAppliance, isamUser, commands, admin_domain='Default'):
                                          "admin_pwd": isamUser.password,
                                          "commands": commands,
                                          "admin_domain": admin_domain
-                                     })
+                                     }, pending_change=False)
+
+
+def _chunks(commands, chunk_size, max_chunk_bytes):
+    """
+    Split the commands in chunks of at most chunk_size commands and (about) max_chunk_bytes of JSON
+    """
+    chunk = []
+    chunk_bytes = 0
+    for index, command in enumerate(commands):
+        command_bytes = len(command.encode('utf-8')) + 4  # quotes, comma and space in the JSON list
+        if chunk and (len(chunk) >= chunk_size or chunk_bytes + command_bytes > max_chunk_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(index)
+        chunk_bytes += command_bytes
+    if chunk:
+        yield chunk
+
+
+def _output(ret_obj):
+    data = ret_obj['data']
+    if isinstance(data, dict):
+        return data.get('result', data.get('message', ''))
+    if isinstance(data, bytes):
+        return data.decode('utf-8', errors='replace')
+    return str(data)
+
+
+def split_output(commands, output):
+    """
+    Split the output of a pdadmin call in the output per command, using the "cmd> " prompt that precedes every command
+
+    :return: list with the output of each command, None if the output could not be split
+    """
+    if output is None:
+        return None
+    outputs = []
+    for line in output.splitlines():
+        if line.startswith(command_prompt):
+            outputs.append([])
+        elif outputs:
+            outputs[-1].append(line)
+    if len(outputs) > len(commands) or (outputs == [] and commands):
+        return None
+    return ['\n'.join(lines) for lines in outputs]
+
+
+def _failed(output):
+    return any(line.lstrip().startswith('Error:') for line in output.splitlines())
+
+
+def execute_batch(isamAppliance, isamUser, commands, admin_domain='Default', chunk_size=100,
+                  max_chunk_bytes=65536, max_workers=1, retries=1):
+    """
+    Execute a long list of pdadmin commands in chunks, with the result of every command
+
+    The commands are sent in chunks of at most chunk_size commands (and about max_chunk_bytes). The output of each
+    chunk is split in the output per command. When a chunk fails, only the commands that did not complete are sent
+    again (at most retries times).
+    With max_workers > 1, several chunks are executed at the same time: only use this when the order of the commands
+    does not matter (eg. attaching existing ACLs).
+
+    :return: return object, data has 'results' (command, rc and output of every command, in the order of the
+             commands) and 'failed' (number of failed commands)
+    """
+    if isinstance(commands, basestring):
+        import ast
+        commands = ast.literal_eval(commands)
+
+    results = [{'command': command, 'rc': None, 'output': None} for command in commands]
+    warnings = []
+
+    def _run(indexes):
+        attempt = 0
+        while True:
+            ret_obj = isamAppliance.invoke_post("Execute pdadmin commands", "/isam/pdadmin/",
+                                                {
+                                                    "admin_id": isamUser.username,
+                                                    "admin_pwd": isamUser.password,
+                                                    "commands": [commands[i] for i in indexes],
+                                                    "admin_domain": admin_domain
+                                                }, ignore_error=True, pending_change=False)
+            output = _output(ret_obj)
+            outputs = split_output([commands[i] for i in indexes], output)
+            if ret_obj['rc'] == 0:
+                if outputs is None or len(outputs) != len(indexes):
+                    # No per-command output, keep the output of the chunk with its last command
+                    outputs = [''] * (len(indexes) - 1) + [output]
+                for i, command_output in zip(indexes, outputs):
+                    results[i]['output'] = command_output
+                    results[i]['rc'] = 1 if _failed(command_output) else 0
+                return
+            # Commands with output before the failing one have completed
+            done = len(outputs) - 1 if outputs else 0
+            for i, command_output in zip(indexes[:done], outputs or []):
+                results[i]['output'] = command_output
+                results[i]['rc'] = 1 if _failed(command_output) else 0
+            indexes = indexes[done:]
+            attempt += 1
+            if attempt > retries:
+                for i in indexes:
+                    results[i]['rc'] = ret_obj['rc']
+                results[indexes[0]]['output'] = output
+                return
+            logger.info("pdadmin chunk failed (rc {0}), retrying {1} commands".format(ret_obj['rc'], len(indexes)))
+
+    chunks = list(_chunks(commands, chunk_size, max_chunk_bytes))
+    logger.debug("Executing {0} pdadmin commands in {1} chunks".format(len(commands), len(chunks)))
+    for _chunk, _result in bounded_map(_run, chunks, max_workers=max_workers):
+        pass
+
+    failed = len([r for r in results if r['rc'] != 0])
+    if failed:
+        warnings.append("{0} of {1} pdadmin commands failed.".format(failed, len(commands)))
+    return isamAppliance.create_return_object(data={'results': results, 'failed': failed},
+                                              changed=len(commands) > failed, warnings=warnings)
@@ -0,0 +1,252 @@
+"""
+In-memory index of the ACLs and POPs of the policy server, and the objects they are attached to
+
+    index = PolicyIndex.build(isamAppliance, isamUser)
+    index.objects_for_acl('default-webseal')
+    index.acls_for_entry('Group', 'iv-admin')
+    index.save('policy_index.json')
+
+Building the index retrieves every ACL and POP (and its objects) once, with a bounded number of concurrent requests.
+After that, questions are answered from the inverted indexes without calls to the appliance.
+"""
+import json
+import logging
+import os
+import time
+
+import ibmsecurity.isam.web.runtime.acl
+import ibmsecurity.isam.web.runtime.pop
+from ibmsecurity.appliance.ibmappliance import IBMError
+from ibmsecurity.utilities.parallel import bounded_map
+
+logger = logging.getLogger(__name__)
+
+
+def _names(data):
+    """
+    Names from a pdadmin list, which is either a list of names or a list of dicts
+    """
+    if not isinstance(data, list):
+        return []
+    names = []
+    for item in data:
+        if isinstance(item, dict):
+            item = item.get('name', item.get('id', None))
+        if item is not None:
+            names.append(item)
+    return names
+
+
+def _listing(what, ret_obj):
+    """
+    Names from a list call, a failed call raises: it must not look like all of them were deleted
+    """
+    if ret_obj['rc'] != 0 or not isinstance(ret_obj['data'], list):
+        raise IBMError("999", "Unable to list the {0} of the policy server: {1}".format(
+            what, "; ".join(ret_obj['warnings']) or ret_obj['data']))
+    return _names(ret_obj['data'])
+
+
+def _entry_key(entry):
+    """
+    "type:id" for an ACL entry (eg. "Group:iv-admin"), just the type for Any-other and Unauthenticated
+    """
+    entry_type = entry.get('type', '')
+    entry_id = entry.get('id', entry.get('name', None))
+    if entry_id:
+        return "{0}:{1}".format(entry_type, entry_id)
+    return entry_type
+
+
+class PolicyIndex(object):
+    """
+    ACLs and POPs with the inverted indexes acl->objects, object->acl, pop->objects, object->pop and
+    entry->acls
+    """
+
+    def __init__(self, admin_domain='Default'):
+        self.admin_domain = admin_domain
+        self.acls = {}
+        self.pops = {}
+        self.acl_objects = {}
+        self.pop_objects = {}
+        self.object_acl = {}
+        self.object_pop = {}
+        self.entry_acls = {}
+        self.updated = None
+
+    @classmethod
+    def build(cls, isamAppliance, isamUser, admin_domain='Default', max_workers=8):
+        index = cls(admin_domain=admin_domain)
+        index.refresh(isamAppliance, isamUser, acls=True, pops=True, max_workers=max_workers)
+        return index
+
+    def refresh(self, isamAppliance, isamUser, acls=None, pops=None, max_workers=8):
+        """
+        Update the index
+
+        The lists of ACLs and POPs are always retrieved: new ones are loaded and deleted ones are removed.
+        ACLs and POPs that exist in both are only loaded again when named in acls/pops (True to load all),
+        eg. the ACLs that were just modified.
+        """
+        acl_names = _listing("ACLs", ibmsecurity.isam.web.runtime.acl.get_list(
+            isamAppliance, isamUser, admin_domain=self.admin_domain))
+        pop_names = _listing("POPs", ibmsecurity.isam.web.runtime.pop.get_names(
+            isamAppliance, isamUser.username, isamUser.password, admin_domain=self.admin_domain))
+
+        for name in set(self.acls) - set(acl_names):
+            self._remove_acl(name)
+        for name in set(self.pops) - set(pop_names):
+            self._remove_pop(name)
+
+        acl_names = [name for name in acl_names
+                     if name not in self.acls or acls is True or (acls is not None and name in acls)]
+        pop_names = [name for name in pop_names
+                     if name not in self.pops or pops is True or (pops is not None and name in pops)]
+        logger.debug("Loading {0} ACLs and {1} POPs".format(len(acl_names), len(pop_names)))
+
+        for name, (acl, objects) in bounded_map(lambda _name: self._load_acl(isamAppliance, isamUser, _name),
+                                                acl_names, max_workers=max_workers):
+            self._add_acl(name, acl, objects)
+        for name, (pop, objects) in bounded_map(lambda _name: self._load_pop(isamAppliance, isamUser, _name),
+                                                pop_names, max_workers=max_workers):
+            self._add_pop(name, pop, objects)
+
+        self.updated = time.time()
+        return self
+
+    def _load_acl(self, isamAppliance, isamUser, name):
+        acl = ibmsecurity.isam.web.runtime.acl.get(isamAppliance, isamUser, name,
+                                                   admin_domain=self.admin_domain)['data']
+        objects = ibmsecurity.isam.web.runtime.acl.get_object_list(isamAppliance, isamUser, acl_name=name,
+                                                                   admin_domain=self.admin_domain)['data']
+        return acl, _names(objects)
+
+    def _load_pop(self, isamAppliance, isamUser, name):
+        pop = ibmsecurity.isam.web.runtime.pop.retrieve(isamAppliance, isamUser.username, isamUser.password, name,
+                                                        admin_domain=self.admin_domain)['data']
+        objects = ibmsecurity.isam.web.runtime.pop.get_objects(isamAppliance, isamUser.username, isamUser.password,
+                                                               pop_name=name, admin_domain=self.admin_domain)['data']
+        return pop, _names(objects)
+
+    def _add_acl(self, name, acl, objects):
+        self._remove_acl(name)
+        self.acls[name] = acl
+        self.acl_objects[name] = set(objects)
+        for obj in objects:
+            self.object_acl[obj] = name
+        if isinstance(acl, dict):
+            for entry in acl.get('entries', []):
+                self.entry_acls.setdefault(_entry_key(entry), set()).add(name)
+
+    def _remove_acl(self, name):
+        self.acls.pop(name, None)
+        for obj in self.acl_objects.pop(name, ()):
+            if self.object_acl.get(obj) == name:
+                del self.object_acl[obj]
+        for key in [key for key, names in self.entry_acls.items() if name in names]:
+            self.entry_acls[key].discard(name)
+            if not self.entry_acls[key]:
+                del self.entry_acls[key]
+
+    def _add_pop(self, name, pop, objects):
+        self._remove_pop(name)
+        self.pops[name] = pop
+        self.pop_objects[name] = set(objects)
+        for obj in objects:
+            self.object_pop[obj] = name
+
+    def _remove_pop(self, name):
+        self.pops.pop(name, None)
+        for obj in self.pop_objects.pop(name, ()):
+            if self.object_pop.get(obj) == name:
+                del self.object_pop[obj]
+
+    def objects_for_acl(self, name):
+        return sorted(self.acl_objects.get(name, ()))
+
+    def objects_for_pop(self, name):
+        return sorted(self.pop_objects.get(name, ()))
+
+    def acl_for_object(self, obj):
+        return self.object_acl.get(obj, None)
+
+    def pop_for_object(self, obj):
+        return self.object_pop.get(obj, None)
+
+    def acls_for_entry(self, entry_type, entry_id=None):
+        """
+        ACLs with an entry for a user or group (eg. 'Group', 'iv-admin'), or Any-other/Unauthenticated
+        """
+        key = entry_type if entry_id is None else "{0}:{1}".format(entry_type, entry_id)
+        return sorted(self.entry_acls.get(key, ()))
+
+    def unattached_acls(self):
+        return sorted(name for name in self.acls if not self.acl_objects.get(name))
+
+    def as_dict(self):
+        return {
+            'admin_domain': self.admin_domain,
+            'updated': self.updated,
+            'acls': {name: {'acl': acl, 'objects': sorted(self.acl_objects.get(name, ()))}
+                     for name, acl in self.acls.items()},
+            'pops': {name: {'pop': pop, 'objects': sorted(self.pop_objects.get(name, ()))}
+                     for name, pop in self.pops.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(admin_domain=data.get('admin_domain', 'Default'))
+        for name, acl in data.get('acls', {}).items():
+            index._add_acl(name, acl['acl'], acl['objects'])
+        for name, pop in data.get('pops', {}).items():
+            index._add_pop(name, pop['pop'], pop['objects'])
+        index.updated = data.get('updated', None)
+        return index
+
+    def save(self, filename):
+        # Write to a temporary file first, so a crash never leaves a truncated index
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump(self.as_dict(), f)
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def diff(self, other):
+        """
+        Differences with another index (eg. of another appliance)
+
+        :return: dict with the ACLs and POPs that were deleted (only in self), added (only in other) and changed
+                 (different definition or attached to different objects)
+        """
+
+        def _diff(mine, theirs, objects_mine, objects_theirs):
+            return {
+                'deleted': sorted(set(mine) - set(theirs)),
+                'added': sorted(set(theirs) - set(mine)),
+                'changed': sorted(name for name in set(mine) & set(theirs)
+                                  if json.dumps(mine[name], sort_keys=True) != json.dumps(theirs[name], sort_keys=True)
+                                  or objects_mine.get(name, set()) != objects_theirs.get(name, set()))
+            }
+
+        return {'acls': _diff(self.acls, other.acls, self.acl_objects, other.acl_objects),
+                'pops': _diff(self.pops, other.pops, self.pop_objects, other.pop_objects)}
+
+
+def compare(isamAppliance1, isamAppliance2, isamUser1, isamUser2, admin_domain='Default', index1=None, index2=None,
+            max_workers=8):
+    """
+    Compare the ACLs, POPs and their attachments between two appliances
+    Pass an existing index (eg. PolicyIndex.load) as index1/index2 to skip retrieving it.
+    """
+    if index1 is None:
+        index1 = PolicyIndex.build(isamAppliance1, isamUser1, admin_domain=admin_domain, max_workers=max_workers)
+    if index2 is None:
+        index2 = PolicyIndex.build(isamAppliance2, isamUser2, admin_domain=admin_domain, max_workers=max_workers)
+    data = index1.diff(index2)
+    data['matches'] = not any(names for part in data.values() for names in part.values())
+    return isamAppliance1.create_return_object(data=data)
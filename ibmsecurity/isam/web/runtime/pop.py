@@ -36,13 +36,37 @@ def get(isamAppliance, admin_id, admin_pwd, admin_domain='Default', **kwargs):
     ret_obj = isamAppliance.invoke_post("Retrieve a list of POPs",
                                         f"{uri}/poplistext/{version}",
                                         ignore_error=True,
-                                        data=input_args)
+                                        data=input_args, pending_change=False)
     ret_obj['changed'] = False
     if ret_obj['rc'] == 404:
         logger.info(f"No POPs found matching your arguments {input_args}")
         return isamAppliance.create_return_object()
     return ret_obj
 
+def get_names(isamAppliance, admin_id, admin_pwd, admin_domain='Default', **kwargs):
+    """
+    Retrieve the names of all POPs (pdadmin "pop list")
+
+    rc is not 0 when pdadmin reports an error, the output is in warnings then
+    """
+    from ibmsecurity.isam.web.runtime.pdadmin import command_prompt
+
+    ret_obj = isamAppliance.invoke_post("Retrieve the names of all POPs", "/isam/pdadmin/",
+                                        {
+                                            "admin_id": admin_id,
+                                            "admin_pwd": admin_pwd,
+                                            "commands": ["pop list"],
+                                            "admin_domain": admin_domain
+                                        }, pending_change=False)
+    data = ret_obj['data']
+    output = data.get('result', '') if isinstance(data, dict) else ''
+    lines = [line.strip() for line in output.splitlines()
+             if line.strip() != '' and not line.startswith(command_prompt)]
+    if [line for line in lines if line.startswith('Error:')]:
+        return isamAppliance.create_return_object(rc=1, warnings=["pdadmin pop list failed: {0}".format(output)])
+    return isamAppliance.create_return_object(data=lines)
+
+
 def retrieve(isamAppliance, admin_id, admin_pwd, pop_name, admin_domain='Default', **kwargs):
     """
     Retrieve a specific POP (show)
@@ -55,7 +79,7 @@ def retrieve(isamAppliance, admin_id, admin_pwd, pop_name, admin_domain='Default
                                             "admin_pwd": admin_pwd,
                                             "pop_name": pop_name,
                                             "admin_domain": admin_domain
-                                        })
+                                        }, pending_change=False)
     ret_obj['changed'] = False
     if ret_obj['rc'] == 404:
         logger.info(f"No POP {pop_name} found in {admin_domain}")
@@ -91,7 +115,7 @@ def get_objects(isamAppliance, admin_id, admin_pwd, **kwargs):
     ret_obj = isamAppliance.invoke_post("Retrieve a list of protected objects",
                                         f"{uri}/popfindext/{version}",
                                         ignore_error=True,
-                                        data=input_args)
+                                        data=input_args, pending_change=False)
     if ret_obj['rc'] == 404:
         logger.info(f"No pops found for your arguments {input_args}")
         return isamAppliance.create_return_object()
@@ -154,6 +154,9 @@ def execute(isamAppliance, operation='restart', check_mode=False, force=False):
     :param operation:
     :return:
     """
+    if operation == "restart" and force is False and isamAppliance.changeset is not None:
+        return isamAppliance.changeset.restart_web_runtime()
+
     check_value, warnings = _check(isamAppliance)
 
     if (force is False):
@@ -3,7 +3,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def reboot(isvgAppliance, check_mode=False, force=False):
+def reboot(isvgAppliance, check_mode=False, force=False, wait_time=300):
     """
     Reboot the appliance
     """
@@ -12,7 +12,7 @@ def reboot(isvgAppliance, check_mode=False, force=False):
     else:
         # obtain appliance lastboot time
         import ibmsecurity.isvg.firmware
-        import time
+        from ibmsecurity.utilities.waiter import Waiter
         ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
         for firm in ret_obj_appliance['data']:
             if firm['active'] is True:
@@ -26,22 +26,27 @@ def reboot(isvgAppliance, check_mode=False, force=False):
 
         # Depending on resource allocated, isvg appliance can take up to 30s or more before it reboots
         # after it is being told to do so.
-        # Loop until appliance returns an error, or reboot is detected, before returning control.
-        try:
-            while True:
+        # Wait until appliance returns an error, or reboot is detected, before returning control.
+        def _reboot_initiated():
+            try:
                 ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
-                for firm in ret_obj_appliance['data']:
-                    if firm['active'] is True:
-                        last_boot = firm['last_boot']
-                        logger.info(
-                            "Active partition last boot time {0} after reboot process initiated.".format(last_boot))
-                        if last_boot > before_reboot_last_boot:
-                            raise Exception ("Break out of loop")
-                time.sleep(15)
-        except Exception as e:
-            logger.debug("Exception occured: {0}. Assuming appliance has now initiated reboot process".format(e))
-            pass
-        
+            except Exception as e:
+                logger.debug("Exception occured: {0}. Assuming appliance has now initiated reboot process".format(e))
+                return True
+            for firm in ret_obj_appliance['data']:
+                if firm['active'] is True:
+                    last_boot = firm['last_boot']
+                    logger.info(
+                        "Active partition last boot time {0} after reboot process initiated.".format(last_boot))
+                    if last_boot > before_reboot_last_boot:
+                        return True
+            return False
+
+        waiter = Waiter(wait_time=wait_time, max_delay=15)
+        # No TCP check, an appliance that does not answer has initiated the reboot
+        waiter.add(isvgAppliance.hostname, _reboot_initiated, transport=isvgAppliance.transport)
+        waiter.wait()
+
         return ret_obj
 
 
@@ -0,0 +1,165 @@
+"""
+Local cache of the artifacts (fixpacks, extensions, geolocation databases, ...) that are uploaded to appliances
+
+    registry = ibmsecurity.utilities.artifacts.get_registry()
+    registry.sha256('/tmp/9021_fix.fixpack')
+    registry.metadata('/tmp/9021_fix.fixpack', 'fixpack_name', extract_name)
+    registry.summary()
+
+For every file the size, mtime and SHA-256 are kept; metadata extracted from the file (fixpack name, extension id) is
+kept per SHA-256. Nothing is read from a file again until its size or mtime changes.
+Uploads are recorded per appliance, so an upload of the same contents can be skipped, and the bytes that were not
+uploaded are counted.
+
+The cache is kept in ~/.ibmsecurity/artifacts.json, set the environment variable IBMSECURITY_ARTIFACT_CACHE to use
+another file, or to an empty value to keep the cache in memory only.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+default_filename = os.path.join(os.path.expanduser('~'), '.ibmsecurity', 'artifacts.json')
+chunk_size = 1024 * 1024
+
+
+def file_sha256(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactRegistry(object):
+    """
+    Size, mtime, SHA-256, extracted metadata and uploads of artifact files
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        # absolute path: {'size': ..., 'mtime': ..., 'sha256': ...}
+        self.files = {}
+        # sha256: {'size': ..., 'metadata': {...}, 'uploads': {target: time}}
+        self.artifacts = {}
+        self.skipped = 0
+        self.bytes_avoided = 0
+        self._lock = threading.RLock()
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+                self.files = data.get('files', {})
+                self.artifacts = data.get('artifacts', {})
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable artifact cache {0}: {1}".format(filename, e))
+
+    def _entry(self, filename):
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        with self._lock:
+            entry = self.files.get(path, None)
+            if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+                return entry
+        logger.debug("Calculating SHA-256 of {0}".format(path))
+        entry = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': file_sha256(path)}
+        with self._lock:
+            self.files[path] = entry
+            self.artifacts.setdefault(entry['sha256'], {'size': entry['size'], 'metadata': {}, 'uploads': {}})
+            self._save()
+        return entry
+
+    def sha256(self, filename):
+        return self._entry(filename)['sha256']
+
+    def size(self, filename):
+        return self._entry(filename)['size']
+
+    def metadata(self, filename, key, extract=None):
+        """
+        Metadata of the contents of a file (eg. 'fixpack_name')
+
+        :param extract: function(filename) that extracts the value when it is not cached, None only looks it up
+        """
+        sha256 = self.sha256(filename)
+        with self._lock:
+            metadata = self.artifacts[sha256]['metadata']
+            if key in metadata or extract is None:
+                return metadata.get(key, None)
+        value = extract(filename)
+        self.set_metadata(filename, key, value)
+        return value
+
+    def set_metadata(self, filename, key, value):
+        sha256 = self.sha256(filename)
+        with self._lock:
+            self.artifacts[sha256]['metadata'][key] = value
+            self._save()
+
+    def record_upload(self, filename, target):
+        """
+        Record that the contents of filename were uploaded to target (eg. "<hostname>:geolocation-db")
+        """
+        sha256 = self.sha256(filename)
+        with self._lock:
+            self.artifacts[sha256]['uploads'][target] = time.time()
+            self._save()
+
+    def uploaded(self, filename, target):
+        """
+        Time the contents of filename were last uploaded to target, None if never
+        """
+        sha256 = self.sha256(filename)
+        with self._lock:
+            return self.artifacts[sha256]['uploads'].get(target, None)
+
+    def skip(self, filename, reason="already applied"):
+        """
+        Count an upload that is not done, returns the number of bytes avoided
+        """
+        # The size only, the SHA-256 is not needed for that
+        size = os.stat(filename).st_size
+        with self._lock:
+            self.skipped += 1
+            self.bytes_avoided += size
+        logger.info("Skipping upload of {0} ({1} bytes), {2}.".format(filename, size, reason))
+        return size
+
+    def summary(self):
+        with self._lock:
+            return {'skipped': self.skipped, 'bytes_avoided': self.bytes_avoided}
+
+    def _save(self):
+        if self.filename is None:
+            return
+        try:
+            directory = os.path.dirname(self.filename)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Write to a temporary file first, so a crash never leaves a truncated cache
+            tmp_filename = "{0}.{1}.tmp".format(self.filename, os.getpid())
+            with open(tmp_filename, 'w') as f:
+                json.dump({'files': self.files, 'artifacts': self.artifacts}, f)
+            os.replace(tmp_filename, self.filename)
+        except OSError as e:
+            logger.warning("Unable to save artifact cache {0}: {1}".format(self.filename, e))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    The registry shared by all modules in this process
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            filename = os.environ.get('IBMSECURITY_ARTIFACT_CACHE', default_filename)
+            _registry = ArtifactRegistry(os.path.expanduser(filename) if filename else None)
+        return _registry
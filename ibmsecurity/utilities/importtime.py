@@ -0,0 +1,94 @@
+"""
+Import time budget, based on "python -X importtime"
+
+    python -m ibmsecurity.utilities.importtime
+    python -m ibmsecurity.utilities.importtime --budget-ms 150 --runs 5 ibmsecurity.isam.base.fixpack
+
+Every run imports the modules in a new interpreter, the median of the runs is compared to the budget. The exit code
+is 1 when the budget is exceeded, so it can be used in a build. The modules of ibmsecurity that took the most time are
+listed, to show what a single call into the package pulls in.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+# Cold start of a single-method CLI call (eg. testisam_cmd.py)
+default_modules = ['ibmsecurity.appliance.isamappliance', 'ibmsecurity.isam.web.reverse_proxy.junctions']
+default_budget_ms = 200
+
+_line_re = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(modules, python=None):
+    """
+    Import modules in a new interpreter
+
+    :return: dict of module name: (self us, cumulative us, nesting level)
+    """
+    if python is None:
+        python = sys.executable
+    code = "; ".join("import {0}".format(module) for module in modules)
+    proc = subprocess.run([python, '-X', 'importtime', '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+    timings = {}
+    for line in proc.stderr.splitlines():
+        m = _line_re.match(line)
+        if m is not None:
+            # Nesting is shown with two spaces per level after one space
+            timings[m.group(4)] = (int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2)
+    return timings
+
+
+# Imported by the interpreter before the modules are
+_startup_modules = ('site', 'encodings')
+
+
+def total_ms(timings):
+    """
+    Time of all imports, the cumulative time of the top level imports (without the interpreter startup)
+    """
+    return sum(cumulative for name, (_self, cumulative, level) in timings.items()
+               if level == 0 and name.split('.')[0] not in _startup_modules) / 1000.0
+
+
+def run(modules, runs=5, budget_ms=default_budget_ms, top=10, python=None):
+    """
+    Measure runs times and report
+
+    :return: (median ms, number of ibmsecurity modules imported, within budget)
+    """
+    totals = []
+    timings = {}
+    for _i in range(runs):
+        timings = measure(modules, python=python)
+        totals.append(total_ms(timings))
+    median = statistics.median(totals)
+    own = sorted(((name, value[0]) for name, value in timings.items() if name.split('.')[0] == 'ibmsecurity'),
+                 key=lambda item: item[1], reverse=True)
+
+    print("Import of {0}: median {1:.1f} ms over {2} runs (budget {3} ms), {4} ibmsecurity modules".format(
+        ", ".join(modules), median, runs, budget_ms, len(own)))
+    for name, self_us in own[:top]:
+        print("  {0:8.1f} ms  {1}".format(self_us / 1000.0, name))
+    return median, len(own), median <= budget_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import time of ibmsecurity modules against a budget")
+    parser.add_argument('modules', nargs='*', default=default_modules)
+    parser.add_argument('--budget-ms', type=float, default=default_budget_ms)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="number of slowest ibmsecurity modules to list")
+    args = parser.parse_args(argv)
+
+    _median, _count, ok = run(args.modules, runs=args.runs, budget_ms=args.budget_ms, top=args.top)
+    if not ok:
+        print("Import time budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+PEP 562 lazy loading of the submodules of a package
+
+In the __init__.py of a package:
+
+    from ibmsecurity.utilities.lazy import lazy_submodules
+
+    __getattr__, __dir__ = lazy_submodules(globals())
+
+After "import ibmsecurity", ibmsecurity.isam.web.reverse_proxy.junctions.get_all(...) imports the packages and
+the junctions module on first access, nothing else is imported.
+"""
+import importlib
+import pkgutil
+
+
+def lazy_submodules(module_globals):
+    """
+    Module level __getattr__ and __dir__ functions that import a submodule when it is accessed as an attribute
+    """
+    name = module_globals['__name__']
+    path = module_globals['__path__']
+    submodules = []
+
+    def _submodules():
+        # Listed on first use, the package directory is not read at import
+        if not submodules:
+            submodules.extend(info.name for info in pkgutil.iter_modules(path))
+        return submodules
+
+    def __getattr__(attr):
+        if attr in _submodules():
+            # import_module also sets the attribute on the package, __getattr__ is not called again for it
+            return importlib.import_module("{0}.{1}".format(name, attr))
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(name, attr))
+
+    def __dir__():
+        return sorted(set(module_globals) | set(_submodules()))
+
+    return __getattr__, __dir__
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import time
+
+from ibmsecurity.utilities.parallel import bounded_map
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoints(object):
+    """
+    Position (next line and file size) of followed log files, optionally persisted in a JSON file
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.offsets = {}
+        if filename is not None and os.path.exists(filename):
+            with open(filename, 'r') as f:
+                self.offsets = json.load(f)
+
+    def get(self, key):
+        return self.offsets.get(key, {'line': 1, 'file_size': 0})
+
+    def set(self, key, line, file_size):
+        self.offsets[key] = {'line': line, 'file_size': file_size}
+
+    def save(self):
+        if self.filename is None:
+            return
+        # Write to a temporary file first, so a crash never leaves a truncated checkpoint file
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump(self.offsets, f)
+        os.replace(tmp_filename, self.filename)
+
+
+def follow(files, list_sizes, read_lines, checkpoints, key_prefix='', size=1000, poll_interval=None, max_workers=4):
+    """
+    Generator with the lines that were added to log files since the last checkpoint.
+
+    Each poll lists the file sizes once per group (eg. reverse proxy instance). Files with an unchanged size are not
+    read. A file that got smaller has been rolled over, and is read again from the first line.
+    The checkpoint of a chunk is only saved once the consumer asks for the next chunk.
+
+    :param files: list of (group, file_id) tuples
+    :param list_sizes: function(group) returning a dict of file_id: file_size
+    :param read_lines: function(group, file_id, start, size) returning a list of lines (start is 1-based)
+    :param checkpoints: Checkpoints object
+    :param key_prefix: prefix for the checkpoint keys (eg. the hostname of the appliance)
+    :param size: maximum number of lines to read per request
+    :param poll_interval: seconds between polls, None to stop once all files have been read
+    :param max_workers: maximum number of files read concurrently
+    :return: generator of dicts with group, file_id, start and lines
+    """
+    groups = []
+    for group, file_id in files:
+        if group not in groups:
+            groups.append(group)
+
+    while True:
+        sizes = {group: list_sizes(group) for group in groups}
+        to_read = []
+        for group, file_id in files:
+            key = "{0}/{1}/{2}".format(key_prefix, group, file_id)
+            checkpoint = checkpoints.get(key)
+            file_size = sizes[group].get(file_id, None)
+            if file_size is None:
+                logger.debug("Log file {0} not found".format(key))
+                continue
+            if file_size < checkpoint['file_size']:
+                logger.info("Log file {0} was rolled over, reading from the start".format(key))
+                checkpoint = {'line': 1, 'file_size': 0}
+            if file_size != checkpoint['file_size']:
+                to_read.append((key, group, file_id, checkpoint['line'], checkpoint['file_size'], file_size))
+
+        more = False
+        for (key, group, file_id, line, old_size, file_size), lines in bounded_map(
+                lambda _f: read_lines(_f[1], _f[2], _f[3], size), to_read, max_workers=max_workers,
+                ordered=False):
+            if not lines and line > 1 and file_size > old_size:
+                # Grew, but there is nothing after our line: the file was rolled over and grew past the old size
+                logger.info("Log file {0} was rolled over, reading from the start".format(key))
+                checkpoints.set(key, 1, 0)
+                more = True
+                continue
+            if len(lines) >= size:
+                # Only store the file size once we caught up, so the next poll continues reading
+                more = True
+                file_size = old_size
+            if lines:
+                yield {'group': group, 'file_id': file_id, 'start': line, 'lines': lines}
+            checkpoints.set(key, line + len(lines), file_size)
+            checkpoints.save()
+
+        if not more:
+            if poll_interval is None:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,212 @@
+"""
+Index of the public functions of the ibmsecurity modules, for command line dispatchers (eg. testisam_cmd.py)
+
+    registry = MethodRegistry.load()
+    registry.search('junctions')
+    func, kwargs = registry.bind('ibmsecurity.isam.web.reverse_proxy.junctions.get_all',
+                                 {'reverseproxy_id': 'default'}, isamAppliance=isam_server)
+    func(**kwargs)
+
+The index is built from the source files with the ast module, no module is imported to build it. It contains the
+parameters (with defaults) and the first docstring line of every function, and the requires_modules,
+requires_version and requires_model settings of its module. It is saved in ~/.ibmsecurity/methods.json (set
+IBMSECURITY_METHOD_REGISTRY to use another file) and built again when a source file changes.
+Binding only imports the module of the function that is called.
+"""
+import ast
+import fnmatch
+import hashlib
+import importlib
+import json
+import logging
+import os
+
+import ibmsecurity
+
+logger = logging.getLogger(__name__)
+
+default_filename = os.path.join(os.path.expanduser('~'), '.ibmsecurity', 'methods.json')
+module_settings = ('requires_modules', 'requires_version', 'requires_model')
+
+# Arguments that are not given on the command line
+appliance_args = ('isamAppliance', 'isdsAppliance', 'isvgAppliance')
+
+_no_default = object()
+
+
+def _source_files(root):
+    package_dir = os.path.dirname(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for filename in sorted(filenames):
+            if filename.endswith('.py') and filename != '__init__.py':
+                path = os.path.join(dirpath, filename)
+                module = os.path.relpath(path, package_dir)[:-3].replace(os.sep, '.')
+                yield module, path
+
+
+def _fingerprint(files):
+    h = hashlib.sha256()
+    for module, path in files:
+        st = os.stat(path)
+        h.update("{0}:{1}:{2};".format(module, st.st_size, st.st_mtime_ns).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _literal(node):
+    """
+    Value of a literal default, (True, value) when it can be stored in JSON, (False, source) otherwise
+    """
+    try:
+        value = ast.literal_eval(node)
+        json.dumps(value)
+        return True, value
+    except (ValueError, TypeError, SyntaxError):
+        return False, ast.dump(node) if not hasattr(ast, 'unparse') else ast.unparse(node)
+
+
+def _parameters(args):
+    positional = list(getattr(args, 'posonlyargs', [])) + list(args.args)
+    defaults = [_no_default] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    # A keyword-only argument without default has None in kw_defaults
+    kw_defaults = [_no_default if default is None else default for default in args.kw_defaults]
+    params = []
+    for arg, default in list(zip(positional, defaults)) + list(zip(args.kwonlyargs, kw_defaults)):
+        param = {'name': arg.arg, 'required': default is _no_default}
+        if default is not _no_default:
+            literal, value = _literal(default)
+            param['default' if literal else 'default_source'] = value
+        params.append(param)
+    return params, args.kwarg is not None
+
+
+def _index_module(module, path):
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    settings = {}
+    methods = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) \
+                and node.targets[0].id in module_settings:
+            literal, value = _literal(node.value)
+            if literal:
+                settings[node.targets[0].id] = value
+        elif isinstance(node, ast.FunctionDef) and not node.name.startswith('_'):
+            params, var_keyword = _parameters(node.args)
+            doc = ast.get_docstring(node) or ''
+            methods[node.name] = {'params': params, 'var_keyword': var_keyword,
+                                  'doc': doc.strip().split('\n', 1)[0].strip()}
+    for method in methods.values():
+        method.update(settings)
+    return methods
+
+
+class MethodRegistry(object):
+    """
+    Functions by full name (eg. "ibmsecurity.isam.base.fixpack.get")
+    """
+
+    def __init__(self, methods=None, fingerprint=None):
+        self.methods = methods if methods is not None else {}
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, package=ibmsecurity):
+        files = list(_source_files(os.path.dirname(package.__file__)))
+        methods = {}
+        for module, path in files:
+            try:
+                for name, method in _index_module(module, path).items():
+                    methods["{0}.{1}".format(module, name)] = method
+            except SyntaxError as e:
+                logger.warning("Unable to index {0}: {1}".format(path, e))
+        logger.debug("Indexed {0} methods in {1} modules".format(len(methods), len(files)))
+        return cls(methods, _fingerprint(files))
+
+    @classmethod
+    def load(cls, filename=None, package=ibmsecurity):
+        """
+        Load the saved index, build and save it when there is none or the sources changed
+        """
+        if filename is None:
+            filename = os.environ.get('IBMSECURITY_METHOD_REGISTRY', default_filename)
+        fingerprint = _fingerprint(_source_files(os.path.dirname(package.__file__)))
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+                if data.get('fingerprint') == fingerprint:
+                    return cls(data['methods'], fingerprint)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable method index {0}: {1}".format(filename, e))
+        registry = cls.build(package)
+        registry.save(filename)
+        return registry
+
+    def save(self, filename):
+        try:
+            directory = os.path.dirname(filename)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Write to a temporary file first, so a crash never leaves a truncated index
+            tmp_filename = "{0}.{1}.tmp".format(filename, os.getpid())
+            with open(tmp_filename, 'w') as f:
+                json.dump({'fingerprint': self.fingerprint, 'methods': self.methods}, f)
+            os.replace(tmp_filename, filename)
+        except OSError as e:
+            logger.warning("Unable to save method index {0}: {1}".format(filename, e))
+
+    def get(self, name):
+        return self.methods.get(name, None)
+
+    def search(self, pattern=None):
+        """
+        Names of the methods that match pattern: a glob (eg. "*.junctions.get*") or a substring
+        """
+        if not pattern:
+            return sorted(self.methods)
+        if any(c in pattern for c in '*?['):
+            return sorted(name for name in self.methods if fnmatch.fnmatchcase(name, pattern))
+        return sorted(name for name in self.methods if pattern in name)
+
+    def bind(self, name, options, **fixed):
+        """
+        Check the options (strings from the command line) against the parameters of a method and convert them
+
+        A value is converted to the type of the default of its parameter (bool, int, float, list, dict).
+        Prefix a value with "json:" to pass any JSON value.
+        :param fixed: arguments passed as is (eg. isamAppliance)
+        :return: (function, keyword arguments)
+        """
+        method = self.get(name)
+        if method is None:
+            raise ValueError("Unknown method {0}".format(name))
+        params = {param['name']: param for param in method['params']}
+        kwargs = dict(fixed)
+        for key, value in options.items():
+            if key not in params and not method['var_keyword']:
+                raise ValueError("{0} has no parameter {1}, parameters are: {2}".format(
+                    name, key, ", ".join(p for p in params if p not in appliance_args)))
+            kwargs[key] = _convert(value, params.get(key, {}).get('default', None))
+        missing = [p for p, param in params.items() if param['required'] and p not in kwargs]
+        if missing:
+            raise ValueError("{0} requires {1}".format(name, ", ".join(missing)))
+
+        module_name, method_name = name.rsplit('.', 1)
+        return getattr(importlib.import_module(module_name), method_name), kwargs
+
+
+def _convert(value, default):
+    if not isinstance(value, str):
+        return value
+    if value.startswith('json:'):
+        return json.loads(value[5:])
+    if isinstance(default, bool):
+        if value.lower() in ('true', 'yes', '1'):
+            return True
+        if value.lower() in ('false', 'no', '0'):
+            return False
+        raise ValueError("Expected true or false, not {0}".format(value))
+    if isinstance(default, (int, float, list, dict)):
+        return type(default)(json.loads(value))
+    return value
@@ -0,0 +1,77 @@
+"""
+Check that the streamed multipart/form-data body of appliance.transport is the body requests builds
+
+    python -m ibmsecurity.utilities.multipart_check
+
+Encodes the same form fields and files with transport.MultipartStream and with
+requests.Request(data=..., files=...).prepare(), for fields with None values, lists, tuples, bytes, numbers,
+non-ASCII text and quotes in names. The exit code is 1 when a body differs.
+"""
+import os
+import re
+import sys
+import tempfile
+
+import requests
+
+from ibmsecurity.appliance.transport import MultipartStream
+
+# Form fields as the ibmsecurity modules pass them to invoke_post_files/invoke_put_files
+cases = [
+    ('password None', {'password': None, 'operation': 'import'}),
+    ('list value', {'files': ['a.txt', 'b.txt'], 'operation': 'import'}),
+    ('tuple value with None', [('ids', ('1', None, '3')), ('force', True)]),
+    ('bytes and numbers', [('raw', b'\x00\xffdata'), ('port', 443), ('ratio', 0.5)]),
+    ('non-ASCII text', {'label': 'zertifikat-äöü', 'dn': 'CN=測試'}),
+    ('quotes in a name', {'na"me': 'value', 'other\\name': 'value'}),
+    ('no fields', {}),
+]
+
+
+def _files(directory):
+    path = os.path.join(directory, 'upload.bin')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(4096) + b'\r\n--not-a-boundary\r\n')
+    return [('file', 'upload.bin', path, 'application/octet-stream')]
+
+
+def compare(fields, files):
+    """
+    :return: (streamed body, body of requests)
+    """
+    prepared = requests.Request('POST', 'https://appliance.invalid/upload', data=fields,
+                                files=[(formfield, (filename, open(path, 'rb'), mimetype))
+                                       for formfield, filename, path, mimetype in files]).prepare()
+    boundary = re.search(r'boundary=(\S+)', prepared.headers['Content-Type']).group(1)
+    stream = MultipartStream(fields, files, boundary=boundary)
+    try:
+        body = stream.read(17) + stream.read()
+    finally:
+        stream.close()
+    if len(body) != len(stream):
+        raise AssertionError("Content-Length {0} for a body of {1} bytes".format(len(stream), len(body)))
+    return body, prepared.body
+
+
+def main(argv=None):
+    failed = 0
+    directory = tempfile.mkdtemp()
+    try:
+        files = _files(directory)
+        for name, fields in cases:
+            body, expected = compare(fields, files)
+            if body == expected:
+                print("  same       {0}".format(name))
+            else:
+                failed += 1
+                print("  DIFFERENT  {0}\n    streamed: {1!r}\n    requests: {2!r}".format(
+                    name, body[:300], expected[:300]))
+    finally:
+        for filename in os.listdir(directory):
+            os.remove(os.path.join(directory, filename))
+        os.rmdir(directory)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(argv=sys.argv[1:]))
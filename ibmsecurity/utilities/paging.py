@@ -0,0 +1,113 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+default_page_size = 100
+default_prefetch = 2
+
+
+def iter_pages(fetch, page_size=default_page_size, prefetch=default_prefetch, start=None):
+    """
+    Generator with the items of a list API that is paged with start and count, page by page.
+
+    After the first page, the next prefetch pages are requested while the items of a page are handed out, so at
+    most prefetch + 2 pages are in memory. Paging stops at the first page with less than page_size items; the
+    pages requested past the end are not used (also when they failed).
+    Exceptions raised by fetch are re-raised when the page is reached.
+
+    Whether the start index of an API counts from 0 or from 1 is found out from the responses: the first page is
+    requested without start (the first item, whatever the API counts from) and the next pages as if it counts
+    from 0. When it counts from 1, every next page starts with the last item of the page before, that item is
+    left out.
+    An API that does not page is not requested forever: a page with more than page_size items (count is
+    ignored) is handed out as the complete list. When a page is the same as the page before (start is ignored
+    but count is not), a warning is logged and the list is requested once more without start and count, the
+    items that were not handed out yet follow.
+
+    :param fetch: function(start, count) that returns the items of a page as a list (see page_items), start is None
+                  for the first page, fetch(None, None) requests the list without paging
+    :param page_size: count of every request
+    :param prefetch: number of pages requested ahead (0 to request one page at a time)
+    :param start: start of the first page, None for the first item of the API
+    :return: generator of items
+    """
+    # A page of one item can not tell an API that counts from 1 from one that ignores start
+    if page_size is None or page_size < 2:
+        raise ValueError("page_size must be at least 2")
+    if prefetch is None or prefetch < 0:
+        prefetch = 0
+    starts = _starts(start, page_size)
+    pending = deque()
+    previous = None
+    handed_out = 0
+    with ThreadPoolExecutor(max_workers=prefetch + 1) as executor:
+        try:
+            while True:
+                # Nothing is requested ahead of the first page: a short list (or a request that is not sent) ends there
+                while len(pending) <= (prefetch if previous is not None else 0):
+                    pending.append(executor.submit(fetch, next(starts), page_size))
+                page = _page(pending.popleft().result())
+                logger.debug("Page of {0} items".format(len(page)))
+                if previous is not None and page == previous:
+                    logger.warning("Page is the same as the one before, start is not supported: requesting the "
+                                   "list without paging after {0} items".format(handed_out))
+                    for item in _page(fetch(None, None))[handed_out:]:
+                        yield item
+                    return
+                if len(page) > page_size:
+                    logger.debug("Page has more than {0} items, count is not supported: the complete list".format(
+                        page_size))
+                    for item in page:
+                        yield item
+                    return
+                items = page
+                if previous and page and page[0] == previous[-1]:
+                    items = page[1:]
+                last = len(page) < page_size
+                previous = page
+                for item in items:
+                    handed_out += 1
+                    yield item
+                if last:
+                    return
+        finally:
+            # Past the end, or the caller stopped: do not wait for pages that have not started yet
+            for future in pending:
+                future.cancel()
+
+
+def page_items(return_obj):
+    """
+    Items of a page from the return object of a get_all, for the fetch function of iter_pages
+
+    A request that was not sent (a required module or version is missing) has no list but warnings: the warnings
+    are logged and the page is empty.
+    """
+    data = return_obj['data']
+    if not isinstance(data, list) and return_obj.get('warnings'):
+        for warning in return_obj['warnings']:
+            logger.warning(warning)
+        return []
+    return data
+
+
+def _page(page):
+    if page is None:
+        return []
+    if not isinstance(page, list):
+        raise TypeError("Expected a list of items, got {0}".format(type(page).__name__))
+    return page
+
+
+def _starts(start, page_size):
+    """
+    Start of every page, None for the first page when start is None
+    """
+    if start is None:
+        yield None
+        start = page_size
+    while True:
+        yield start
+        start += page_size
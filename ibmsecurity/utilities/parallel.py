@@ -0,0 +1,43 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+def bounded_map(func, iterable, max_workers=8, ordered=True):
+    """
+    Run func for every item of iterable in a thread pool, and yield the results as a generator.
+
+    At most max_workers calls are in flight at any time, so the input is only consumed as fast as
+    results are handed out (memory stays bounded for long inputs).
+    Exceptions raised by func are re-raised when the corresponding result is yielded.
+
+    :param func: function taking a single item
+    :param iterable: the items
+    :param max_workers: maximum number of concurrent calls
+    :param ordered: yield results in input order (True) or as soon as they complete (False)
+    :return: generator of (item, result) tuples
+    """
+    if max_workers is None or max_workers < 1:
+        max_workers = 1
+    items = iter(iterable)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            if ordered:
+                item, future = pending.pop(0)
+                result = future.result()
+            else:
+                done, _ = wait([f for _i, f in pending], return_when=FIRST_COMPLETED)
+                index = next(i for i, (_i, f) in enumerate(pending) if f in done)
+                item, future = pending.pop(index)
+                result = future.result()
+            # Keep the pool filled
+            for next_item in items:
+                pending.append((next_item, executor.submit(func, next_item)))
+                break
+            yield item, result
@@ -0,0 +1,134 @@
+"""
+Benchmark of the processing of a large JSON response (eg. a detailed junction list)
+
+    python -m ibmsecurity.utilities.response_benchmark
+    python -m ibmsecurity.utilities.response_benchmark --size-mb 20 --runs 5
+
+Compares the processing before the body was decoded once (legacy) with ISAMAppliance._process_response, for a
+call that uses 'data' and for one that does not (eg. a check that only looks at rc). Reports the median CPU time and
+the peak memory (tracemalloc) of the processing, the body itself is not counted.
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from ibmsecurity.appliance.ibmappliance import IBMResponse
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+
+
+def large_body(size_mb):
+    """
+    JSON body of about size_mb MB: a list of junction like entries
+    """
+    entry = {'junction_point': None, 'junction_type': 'ssl', 'server_hostname': 'backend.example.com',
+             'server_port': 443, 'stateful_junction': 'no', 'transparent_path_junction': 'no',
+             'description': 'x' * 200, 'servers': [{'server_state': 'running', 'server_uuid': None}]}
+    entries = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        entry = dict(entry, junction_point="/app{0}".format(len(entries)))
+        entry['servers'] = [{'server_state': 'running', 'server_uuid': "{0:032x}".format(len(entries))}]
+        data = json.dumps(entry)
+        size += len(data) + 1
+        entries.append(data)
+    return "[{0}]".format(",".join(entries)).encode('utf-8')
+
+
+def response(body):
+    http_response = requests.models.Response()
+    http_response.status_code = 200
+    http_response.headers['Content-Type'] = 'application/json'
+    http_response._content = body
+    return http_response
+
+
+def legacy_process_response(return_obj, http_response):
+    """
+    Body handling of _process_response before it was decoded once (status handling and logging left out)
+    """
+    try:
+        json_data = json.loads(http_response.text)
+        return_obj['data'] = json_data
+    except ValueError:
+        return_obj['data'] = http_response.content
+        return
+
+    if http_response.text == "":
+        json_data = {}
+    else:
+        json_data = json.loads(http_response.text)
+
+    return_obj['data'] = json_data
+    try:
+        json_data = json.loads(http_response.content.decode("utf-8"))
+        return_obj['data'] = json_data
+    except UnicodeDecodeError:
+        return_obj['data'] = http_response.content
+
+
+class _Appliance(object):
+    # What _process_response uses of the appliance
+    logger = logging.getLogger(__name__)
+    debug = False
+
+
+def current_process_response(return_obj, http_response):
+    ISAMAppliance._process_response(_Appliance(), return_obj, http_response, False)
+
+
+def measure(process, body, use_data):
+    """
+    Process one response
+
+    :return: (CPU secs, peak bytes allocated)
+    """
+    http_response = response(body)
+    return_obj = IBMResponse({'rc': 0, 'data': {}, 'changed': False, 'warnings': [], 'status_code': 0})
+    tracemalloc.start()
+    start = time.process_time()
+    process(return_obj, http_response)
+    if use_data:
+        return_obj['data']
+    elapsed = time.process_time() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(size_mb=10, runs=3):
+    """
+    Measure runs times and report
+
+    :return: dict of (implementation, use_data): (median CPU secs, median peak bytes)
+    """
+    body = large_body(size_mb)
+    print("Response body: {0:.1f} MB, median of {1} runs".format(len(body) / 1024.0 / 1024.0, runs))
+    results = {}
+    for use_data in (True, False):
+        for name, process in (('legacy', legacy_process_response), ('current', current_process_response)):
+            measurements = [measure(process, body, use_data) for _i in range(runs)]
+            elapsed = statistics.median(m[0] for m in measurements)
+            peak = statistics.median(m[1] for m in measurements)
+            results[(name, use_data)] = (elapsed, peak)
+            print("  {0:8} {1:12} {2:8.3f} secs  {3:8.1f} MB peak".format(
+                name, "data used" if use_data else "data unused", elapsed, peak / 1024.0 / 1024.0))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the processing of a large JSON response")
+    parser.add_argument('--size-mb', type=float, default=10)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+    run(size_mb=args.size_mb, runs=args.runs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Soak test of one ISAMAppliance object shared by a pool of worker threads
+
+    python -m ibmsecurity.utilities.soak
+    python -m ibmsecurity.utilities.soak --calls 100000 --workers 4
+
+The requests are answered in memory (no appliance is needed) and go through the complete invoke path: warnings
+processing, the transport session, response processing and the change set. The workers also refresh the facts now
+and then. Traced memory is sampled during the run: after the warm-up it has to stay flat (within --tolerance-mb),
+and the warnings of a return object must never grow across calls. The exit code is 1 when either check fails.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import requests.adapters
+
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+from ibmsecurity.isam.changeset import ChangeSet
+from ibmsecurity.user.applianceuser import ApplianceUser
+
+# Answers of the in-memory appliance, by path
+_answers = {
+    '/core/sys/versions': {'firmware_version': '10.0.6.0', 'deployment_model': 'Appliance'},
+    '/setup_complete': {'configured': True},
+    '/isam/capabilities/v1': [{'id': 'wga', 'enabled': 'True'}],
+    '/isam/pending_changes': {'changes': []},
+    '/isam/pending_changes/count': {'count': 0},
+}
+
+
+class _MemoryAdapter(requests.adapters.BaseAdapter):
+    """
+    Answers every request with the JSON for its path (an empty object for unknown paths)
+    """
+
+    def send(self, request, **kwargs):
+        path = requests.utils.urlparse(request.url).path
+        response = requests.models.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(_answers.get(path, {})).encode('utf-8')
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class SoakAppliance(ISAMAppliance):
+    """
+    ISAMAppliance whose requests are answered in memory
+    """
+
+    def get_facts(self):
+        # Mounted before the first request, the constructor collects the facts
+        if not isinstance(self.session.get_adapter('https://'), _MemoryAdapter):
+            self.session.mount('https://', _MemoryAdapter())
+            # No proxies to look up in the environment for every request
+            self.session.trust_env = False
+        super(SoakAppliance, self).get_facts()
+
+
+def _call(isamAppliance, number):
+    """
+    One call, the kind depends on its number
+
+    :return: number of warnings of the return object
+    """
+    kind = number % 5
+    if kind == 0:
+        ret_obj = isamAppliance.invoke_get("Soak GET", "/soak/get")
+    elif kind == 1:
+        # Not activated, the warning path without a request
+        ret_obj = isamAppliance.invoke_get("Soak GET", "/soak/mga", requires_modules=['mga'])
+    elif kind == 2:
+        ret_obj = isamAppliance.invoke_post("Soak POST", "/soak/post", {'number': number},
+                                            warnings=["Caller warning"])
+    elif kind == 3:
+        ret_obj = isamAppliance.invoke_put("Soak PUT", "/wga/reverseproxy/soak{0}".format(number % 3), {})
+    else:
+        ret_obj = isamAppliance.create_return_object(warnings=["Created"])
+        if number % 1000 == 4:
+            isamAppliance.get_facts()
+    # Callers modify what they get back, that must not leak into later calls
+    ret_obj['warnings'].append("Added by caller")
+    return len(ret_obj['warnings'])
+
+
+def run(calls=1000000, workers=8, samples=10, tolerance_mb=1.0):
+    """
+    Make calls on one appliance from workers threads
+
+    :return: (memory samples in bytes, most warnings seen on a return object, memory is flat)
+    """
+    isamAppliance = SoakAppliance(hostname='soak.invalid', user=ApplianceUser(password='soak'), debug=False)
+    step = max(1, calls // samples)
+    counter = iter(range(calls))
+    lock = threading.Lock()
+    memory = []
+    most_warnings = [0]
+
+    def _worker():
+        most = 0
+        while True:
+            with lock:
+                number = next(counter, None)
+                if number is not None and number % step == 0:
+                    memory.append(tracemalloc.get_traced_memory()[0])
+            if number is None:
+                break
+            most = max(most, _call(isamAppliance, number))
+        with lock:
+            most_warnings[0] = max(most_warnings[0], most)
+
+    tracemalloc.start()
+    start = time.time()
+    with ChangeSet(isamAppliance) as changes:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_worker) for _i in range(workers)]:
+                future.result()
+    memory.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+    elapsed = time.time() - start
+
+    # The first sample is taken before the caches and pools are warmed up
+    warm = memory[1:] or memory
+    growth = max(warm) - min(warm)
+    flat = growth <= tolerance_mb * 1024 * 1024
+    print("{0} calls from {1} threads in {2:.1f} secs".format(calls, workers, elapsed))
+    print("Traced memory (MB): {0}".format(" ".join("{0:.2f}".format(m / 1024.0 / 1024.0) for m in memory)))
+    print("Growth after warm-up: {0:.3f} MB (tolerance {1} MB), most warnings on a return object: {2}".format(
+        growth / 1024.0 / 1024.0, tolerance_mb, most_warnings[0]))
+    print("Change set: reverse proxies {0}".format(sorted(changes.reverse_proxies)))
+    return memory, most_warnings[0], flat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test of one appliance object shared by worker threads")
+    parser.add_argument('--calls', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--tolerance-mb', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    _memory, most_warnings, flat = run(calls=args.calls, workers=args.workers, samples=args.samples,
+                                       tolerance_mb=args.tolerance_mb)
+    # A caller warning, the warning of the call and the one added by the caller
+    if most_warnings > 3:
+        print("Warnings grow across calls")
+        return 1
+    if not flat:
+        print("Memory is not flat")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
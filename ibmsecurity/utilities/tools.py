@@ -1,3 +1,4 @@
+import base64
 import random
 import string
 import logging
@@ -9,6 +10,7 @@ import re
 from io import open
 import zipfile
 import json
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -261,6 +263,169 @@ def strings(filename, min=4):
             yield result
 
 
+class BoundedCache(object):
+    """
+    Cache that keeps the maxsize most recently used values, can be used from several threads
+
+    With a filename the values are kept in that JSON file across processes (the keys must be strings and the values
+    JSON): it is read on first use and written after every new value, merged with what other processes wrote.
+    """
+
+    def __init__(self, maxsize=1024, filename=None):
+        import threading
+        from collections import OrderedDict
+
+        self.maxsize = maxsize
+        self.filename = filename
+        self._values = OrderedDict()
+        self._loaded = filename is None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, compute):
+        """
+        The value for key, compute() is called (outside the lock) when it is not in the cache
+        """
+        with self._lock:
+            self._load()
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+        value = compute()
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            self._trim()
+            self._save()
+        return value
+
+    def _trim(self):
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+
+    def _read(self):
+        import os
+
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache {0}: {1}".format(self.filename, e))
+            return {}
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        for key, value in self._read().items():
+            self._values.setdefault(key, value)
+        self._trim()
+
+    def _save(self):
+        import os
+
+        if self.filename is None:
+            return
+        # Values of other processes first, so the ones used here are the most recent
+        values = self._read()
+        for key in self._values:
+            values.pop(key, None)
+        values.update(self._values)
+        keys = list(values)[-self.maxsize:]
+        try:
+            directory = os.path.dirname(self.filename)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            # Write to a temporary file first, so a crash never leaves a truncated cache
+            tmp_filename = "{0}.{1}.tmp".format(self.filename, os.getpid())
+            with open(tmp_filename, 'w') as f:
+                json.dump({key: values[key] for key in keys}, f)
+            os.replace(tmp_filename, self.filename)
+        except OSError as e:
+            logger.warning("Unable to save cache {0}: {1}".format(self.filename, e))
+
+
+_cert_fingerprint_cache = None
+_cert_fingerprint_cache_lock = threading.Lock()
+
+
+def get_cert_fingerprint_cache():
+    """
+    Fingerprints of certificates on appliances, shared by the ssl_certificates modules, see cert_entry_key.
+    Kept in ~/.ibmsecurity/cert_fingerprints.json, set the environment variable IBMSECURITY_CERT_FINGERPRINTS to use
+    another file, or to an empty value to keep them in memory only.
+    """
+    import os
+
+    global _cert_fingerprint_cache
+    with _cert_fingerprint_cache_lock:
+        if _cert_fingerprint_cache is None:
+            filename = os.environ.get('IBMSECURITY_CERT_FINGERPRINTS',
+                                      os.path.join(os.path.expanduser('~'), '.ibmsecurity', 'cert_fingerprints.json'))
+            _cert_fingerprint_cache = BoundedCache(maxsize=4096,
+                                                   filename=os.path.expanduser(filename) if filename else None)
+        return _cert_fingerprint_cache
+
+
+def cert_entry_key(kind, hostname, kdb_id, cert):
+    """
+    Key of a certificate for get_cert_fingerprint_cache, cert is its entry in the get_all list of its certificate
+    database. A certificate that is replaced under the same label gets another key (validity or serial number).
+    """
+    return "{0}|{1}|{2}|{3}|{4}|{5}|{6}".format(kind, hostname, kdb_id, cert['id'], cert.get('notbefore', ''),
+                                                cert.get('notafter', ''), cert.get('serial_number', ''))
+
+
+_pem_cert_re = re.compile(r'-----BEGIN CERTIFICATE-----(.+?)-----END CERTIFICATE-----', re.DOTALL)
+
+
+def cert_fingerprints(contents):
+    """
+    SHA-256 fingerprints (hex) of the certificates in PEM contents (str or bytes).
+    Contents without PEM certificates are taken as a single DER certificate.
+    """
+    if isinstance(contents, bytes):
+        text = contents.decode('latin-1')
+    else:
+        text = contents
+    blocks = _pem_cert_re.findall(text)
+    if not blocks:
+        if not isinstance(contents, bytes):
+            contents = contents.encode('latin-1')
+        return [hashlib.sha256(contents).hexdigest()]
+    return [hashlib.sha256(base64.b64decode(''.join(block.split()))).hexdigest() for block in blocks]
+
+
+def cert_file_fingerprints(filename, password=None):
+    """
+    SHA-256 fingerprints of the certificates in a PEM, DER or (with a password) PKCS#12 file.
+    PKCS#12 needs the cryptography package, None is returned if it is not installed or the file could not be read.
+    """
+    with open(filename, 'rb') as f:
+        contents = f.read()
+    if password is None:
+        return cert_fingerprints(contents)
+    try:
+        from cryptography.hazmat.primitives.serialization import Encoding, pkcs12
+    except ImportError:
+        logger.debug("Install the cryptography package to calculate the fingerprint of PKCS#12 files")
+        return None
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    try:
+        _key, cert, additional_certs = pkcs12.load_key_and_certificates(contents, password)
+    except ValueError as e:
+        logger.debug("Unable to read {0} as PKCS#12: {1}".format(filename, e))
+        return None
+    certs = ([cert] if cert is not None else []) + list(additional_certs or [])
+    return [hashlib.sha256(c.public_bytes(Encoding.DER)).hexdigest() for c in certs]
+
+
 def path_leaf(path):
     head, tail = ntpath.split(path)
     return tail or ntpath.basename(head)
@@ -0,0 +1,190 @@
+import errno
+import heapq
+import logging
+import random
+import selectors
+import socket
+import time
+
+from ibmsecurity.utilities.parallel import bounded_map
+
+logger = logging.getLogger(__name__)
+
+_connect_in_progress = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN,
+                        getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+
+def appliance_endpoint(appliance):
+    """
+    Host and port that requests to the appliance connect to (the admin proxy if one is used)
+    """
+    if getattr(appliance, 'adminProxyHostname', None) is not None:
+        return appliance.adminProxyHostname, appliance.adminProxyPort
+    return appliance.hostname, appliance.lmi_port
+
+
+class Waiter(object):
+    """
+    Wait for a number of appliances (LMI restart, reboot, ...) to be ready.
+
+    Every target has a ready() function. Before calling it, a non-blocking TCP connect with a short timeout checks
+    if the host accepts connections; the connect checks of all targets that are due run at the same time, from a
+    single thread. The ready() calls of the reachable targets then run concurrently (at most max_workers), the
+    requests of an appliance with a read timeout of request_timeout, so a host that accepts connections but does
+    not answer does not hold up the others. wait() returns at most a few request timeouts (the retries of the
+    transport) after wait_time.
+    The delay between checks starts at min_delay, grows by factor up to max_delay, and has random jitter so a
+    fleet does not poll in lock step. When a host becomes reachable again the delay is reset to min_delay, so
+    its restart is detected soon after it completes.
+    """
+
+    def __init__(self, wait_time=300, min_delay=1, max_delay=5, factor=1.5, jitter=0.2, connect_timeout=2,
+                 request_timeout=10, max_workers=8):
+        self.wait_time = wait_time
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.factor = factor
+        self.jitter = jitter
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.max_workers = max_workers
+        self.targets = {}
+
+    def add(self, key, ready, hostname=None, port=None, initial_delay=0, transport=None):
+        """
+        Add a target
+
+        :param key: name of the target in the results (eg. the hostname)
+        :param ready: function without arguments, returns True when the target is ready. Exceptions count as not ready.
+        :param hostname: host for the TCP check (None to skip the check)
+        :param port: port for the TCP check
+        :param initial_delay: seconds before the first check
+        :param transport: Transport of the appliance that ready() sends its requests with, they get request_timeout
+        """
+        self.targets[key] = {'ready': ready, 'hostname': hostname, 'port': port, 'delay': self.min_delay,
+                             'reachable': None, 'initial_delay': initial_delay, 'transport': transport}
+
+    def add_appliance(self, appliance, ready, initial_delay=0):
+        hostname, port = appliance_endpoint(appliance)
+        self.add(appliance.hostname, ready, hostname=hostname, port=port, initial_delay=initial_delay,
+                 transport=getattr(appliance, 'transport', None))
+
+    def wait(self):
+        """
+        Wait until all targets are ready or wait_time has passed
+
+        :return: dict with the seconds until each target was ready (None if it was not ready in time)
+        """
+        start = time.monotonic()
+        results = {key: None for key in self.targets}
+        queue = []
+        for seq, (key, target) in enumerate(self.targets.items()):
+            heapq.heappush(queue, (start + target['initial_delay'], seq, key))
+        seq = len(queue)
+
+        while queue:
+            now = time.monotonic()
+            if now - start >= self.wait_time:
+                break
+            if queue[0][0] > now:
+                time.sleep(min(queue[0][0] - now, self.wait_time - (now - start)))
+                continue
+            due = []
+            while queue and queue[0][0] <= now:
+                due.append(heapq.heappop(queue)[2])
+
+            reachable = self._reachable([key for key in due if self.targets[key]['hostname'] is not None])
+            to_check = []
+            for key in due:
+                target = self.targets[key]
+                if target['hostname'] is not None:
+                    if key not in reachable:
+                        logger.debug("{0} is not accepting connections yet.".format(key))
+                        target['reachable'] = False
+                        seq = self._schedule(queue, key, seq)
+                        continue
+                    if target['reachable'] is False:
+                        # Just came back, check often until ready
+                        target['delay'] = self.min_delay
+                    target['reachable'] = True
+                to_check.append(key)
+
+            # Requests do not run (much) past wait_time
+            timeout = max(0.1, min(self.request_timeout, self.wait_time - (time.monotonic() - start)))
+            for key, ready_at in bounded_map(lambda _key: self._ready(_key, timeout), to_check,
+                                             max_workers=self.max_workers, ordered=False):
+                if ready_at is not None and ready_at - start <= self.wait_time:
+                    results[key] = ready_at - start
+                    logger.info("{0} is ready after {1:.1f} secs.".format(key, results[key]))
+                else:
+                    seq = self._schedule(queue, key, seq)
+
+        for key, elapsed in results.items():
+            if elapsed is None:
+                logger.warning("{0} not ready after {1} secs.".format(key, self.wait_time))
+        return results
+
+    def _ready(self, key, timeout):
+        """
+        Call ready() of a target, returns the time it was ready (None if it is not)
+        """
+        target = self.targets[key]
+        try:
+            if target['transport'] is not None:
+                with target['transport'].request_timeout((self.connect_timeout, timeout)):
+                    ready = target['ready']()
+            else:
+                ready = target['ready']()
+        except Exception as e:
+            logger.debug("{0} is not ready yet: {1}".format(key, e))
+            ready = False
+        return time.monotonic() if ready else None
+
+    def _schedule(self, queue, key, seq):
+        target = self.targets[key]
+        delay = target['delay'] * random.uniform(1 - self.jitter, 1 + self.jitter)
+        target['delay'] = min(self.max_delay, target['delay'] * self.factor)
+        heapq.heappush(queue, (time.monotonic() + delay, seq, key))
+        return seq + 1
+
+    def _reachable(self, keys):
+        """
+        Non-blocking TCP connect to all targets at the same time, returns the keys that accepted the connection
+        """
+        reachable = set()
+        if not keys:
+            return reachable
+        selector = selectors.DefaultSelector()
+        try:
+            for key in keys:
+                target = self.targets[key]
+                try:
+                    family, socktype, proto, _name, address = socket.getaddrinfo(target['hostname'], target['port'],
+                                                                                 type=socket.SOCK_STREAM)[0]
+                    sock = socket.socket(family, socktype, proto)
+                except OSError as e:
+                    logger.debug("Unable to resolve {0}: {1}".format(target['hostname'], e))
+                    continue
+                sock.setblocking(False)
+                if sock.connect_ex(address) not in _connect_in_progress:
+                    sock.close()
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, key)
+
+            deadline = time.monotonic() + self.connect_timeout
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for selector_key, _events in selector.select(remaining):
+                    sock = selector_key.fileobj
+                    if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        reachable.add(selector_key.data)
+                    selector.unregister(sock)
+                    sock.close()
+        finally:
+            for selector_key in list(selector.get_map().values()):
+                selector.unregister(selector_key.fileobj)
+                selector_key.fileobj.close()
+            selector.close()
+        return reachable
@@ -27,9 +27,8 @@ def import_submodules(package, recursive=True):
 
 import ibmsecurity
 
-# Import all packages within ibmsecurity - recursively
-# Note: Advisable to replace this code with specific imports for production code
-import_submodules(ibmsecurity)
+# Submodules of ibmsecurity are imported on first use (see ibmsecurity/utilities/lazy.py)
+# Call import_submodules(ibmsecurity) to import all of them up front
 
 # Setup logging to send to stdout, format and set log level
 # logging.getLogger(__name__).addHandler(logging.NullHandler())
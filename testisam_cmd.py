@@ -2,6 +2,9 @@
 Usage:  testisam_generic.py
         testisam_generic.py [--hostname=ISAM_LMI --username=ISAM_ADMIN --password=ISAM_ADMIN_PASSWORD
            --lmi_port=443 --method=ibm.isam.appliance.get --method_options="name=test" --commit]
+        testisam_generic.py --list [--search=PATTERN]
+        testisam_generic.py --batch=FILE [--username=ISAM_ADMIN --password=ISAM_ADMIN_PASSWORD --lmi_port=443
+           --workers=8 --commit]
 
 Options:
   --hostname=hostname    Hostname (eg. isamlmi.local.com)
@@ -10,18 +13,24 @@ Options:
   --lmi_port=443        The lmi port, defaults to 443
   --method=ibm.isam.method  The method to call
   --method_options="name=name"  String of key-value pairs "name=test,key2=key2"
+                                Values are converted to the type of the parameter default,
+                                prefix a value with json: to pass JSON (eg. "data=json:{\"a\": 1}")
+  --list  List the methods and their parameters, from the method index
+  --search=PATTERN  Only list methods matching a glob (eg. "*.junctions.get*") or a substring
   --commit  Perform commit of the changes.  Not required if you do a GET
+  --batch=FILE  Run the steps (host, method, options) in a JSON/YAML file, see ibmsecurity/isam/batch.py
+                The hosts run in parallel, with --commit there is one commit per host at the end
+  --workers=8  Number of hosts to run in parallel in batch mode
   -h --help     Show this screen.
 
 """
 import logging.config
 import pprint
-from ibmsecurity.appliance.isamappliance import ISAMAppliance
-from ibmsecurity.user.applianceuser import ApplianceUser
 import pkgutil
 import importlib
-import json
+import sys
 import ibmsecurity
+from ibmsecurity.utilities.method_registry import MethodRegistry, appliance_args
 
 from docopt import docopt
 
@@ -45,9 +54,8 @@ def import_submodules(package, recursive=True):
     return results
 
 
-# Import all packages within ibmsecurity - recursively
-# Note: Advisable to replace this code with specific imports for production code
-import_submodules(ibmsecurity)
+# Submodules of ibmsecurity are imported on first use (see ibmsecurity/utilities/lazy.py)
+# Call import_submodules(ibmsecurity) to import all of them up front
 
 # Setup logging to send to stdout, format and set log level
 # logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -94,7 +102,7 @@ def p(jdata):
 def load_args(__doc__):
     args = docopt(__doc__)
     method = None
-    _options = "isamAppliance=isam_server"
+    _options = {}
     commit = False
     if args['--commit']:
         commit = True
@@ -119,39 +127,74 @@ def load_args(__doc__):
     if args["--method_options"]:
         _newoptions = args["--method_options"]
         # split in key/value pairs
-        d = dict(kv.split('=', 1) for kv in _newoptions.split(','))
-        for k, v in d.items():
-            logging.debug(f"VALUE: {v}")
-            if 'json.' in v:
-                _options = _options + "," + k + "=" + eval(v)
-            else:
-                _options = _options + "," + k + "='" + str(v) + "'"
-            logging.debug(_options)
+        _options = dict(kv.split('=', 1) for kv in _newoptions.split(','))
+        logging.debug(_options)
 
     return commit, hostname, username, password, lmi_port, method, _options
 
 
+def list_methods(registry, pattern=None):
+    for name in registry.search(pattern):
+        method = registry.get(name)
+        params = []
+        for param in method['params']:
+            if param['name'] in appliance_args:
+                continue
+            if param['required']:
+                params.append(param['name'])
+            else:
+                params.append("{0}={1!r}".format(param['name'], param.get('default', param.get('default_source'))))
+        print("{0}({1})".format(name, ", ".join(params)))
+        if method['doc']:
+            print("    " + method['doc'])
+
+
 if __name__ == "__main__":
     """
     This test program should not execute when imported, which would otherwise
     cause problems when generating the documentation.
     """
+    args = docopt(__doc__)
+    # Methods and their parameters are looked up in an index, built on first use
+    registry = MethodRegistry.load()
+    if args['--list']:
+        list_methods(registry, args['--search'])
+        sys.exit(0)
+
     commit, hostname, username, password, lmi_port, isam_module, options = load_args(__doc__)
 
+    if args['--batch']:
+        import ibmsecurity.isam.batch
+        hosts, steps = ibmsecurity.isam.batch.load_steps(args['--batch'])
+        try:
+            results = ibmsecurity.isam.batch.run(steps, hosts=hosts, commit=commit,
+                                                 max_workers=int(args['--workers'] or 8), registry=registry,
+                                                 defaults={'username': username, 'password': password,
+                                                           'lmi_port': lmi_port})
+        except ValueError as e:
+            sys.exit(str(e))
+        for line in ibmsecurity.isam.batch.report(results):
+            print(line)
+        sys.exit(1 if [r for r in results if r['error']] else 0)
+
+    # Check the options before connecting to the appliance
+    try:
+        func_ptr, kwargs = registry.bind(isam_module, options, isamAppliance=None)
+    except ValueError as e:
+        sys.exit(str(e))
+    logging.debug(func_ptr)
+
+    from ibmsecurity.appliance.isamappliance import ISAMAppliance
+    from ibmsecurity.user.applianceuser import ApplianceUser
+
     # Create a user credential for ISAM appliance
     u = ApplianceUser(username=username, password=password)
     # Create an ISAM appliance with above credential
     isam_server = ISAMAppliance(hostname=hostname, user=u, lmi_port=lmi_port)
-
-    # Run the method with options
-    module_name, method_name = isam_module.rsplit('.', 1)
-    mod = importlib.import_module(module_name)
-    func_ptr = getattr(mod, method_name)  # Convert action to actual function pointer
-    logging.debug(func_ptr)
-    func_call = 'func_ptr(' + options + ')'
+    kwargs['isamAppliance'] = isam_server
 
     # Execute requested 'action'
-    p(eval(func_call))
+    p(func_ptr(**kwargs))
 
     # Commit or Deploy the changes
     if commit:
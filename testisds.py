@@ -28,8 +28,8 @@ def import_submodules(package, recursive=True):
 
 import ibmsecurity
 
-# Import all packages within ibmsecurity!!!
-import_submodules(ibmsecurity)
+# Submodules of ibmsecurity are imported on first use (see ibmsecurity/utilities/lazy.py)
+# Call import_submodules(ibmsecurity) to import all of them up front
 
 # logging.getLogger(__name__).addHandler(logging.NullHandler())
 logging.basicConfig()